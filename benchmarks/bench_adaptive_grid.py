@@ -0,0 +1,44 @@
+# Copyright (c) 2026 Oscar Fuentes Fernández
+# SPDX-License-Identifier: AGPL-3.0-or-later
+"""Benchmark: adaptive coarse-to-fine grid vs the dense grid (cost and interval accuracy).
+
+    python benchmarks/bench_adaptive_grid.py --sizes 401x321,4000x4000
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from dataclasses import replace
+
+from hqcb_hhh.inference import grid_posterior
+
+from bench_grid_posterior import BASE, parse_sizes
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--sizes", default="401x321,4000x4000")
+    ap.add_argument("--eps", type=float, default=1e-6)
+    args = ap.parse_args()
+
+    for n_g, n_h in parse_sizes(args.sizes):
+        cfg = replace(BASE, grid_gamma=n_g, grid_H0=n_h)
+        t0 = time.perf_counter()
+        dense = grid_posterior(cfg, method="grid")
+        t_dense = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        ada = grid_posterior(cfg, adaptive_eps=args.eps)
+        t_ada = time.perf_counter() - t0
+
+        info = ada["adaptive"]
+        print(f"grid {n_g}x{n_h}: dense {n_g * n_h} cells {t_dense:.3f}s ; "
+              f"adaptive {info['n_evaluations']} evals {t_ada:.3f}s ; levels {info['levels']}")
+        for key in ("gamma_68", "gamma_95"):
+            d, a = dense["summary"][key], ada["summary"][key]
+            print(f"  {key}: dense [{d[0]:.6f}, {d[1]:.6f}]  adaptive [{a[0]:.6f}, {a[1]:.6f}]")
+        print(f"  error bound: {info['error_bound']}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,70 @@
+# Copyright (c) 2026 Oscar Fuentes Fernández
+# SPDX-License-Identifier: AGPL-3.0-or-later
+"""Benchmark: bao_loglike_hqcb_grid vs a per-gamma loop over bao_loglike_hqcb.
+
+The loop is timed on at most --loop-max gamma values and extrapolated beyond that.
+
+    python benchmarks/bench_bao_loglike.py
+    python benchmarks/bench_bao_loglike.py --sizes 10000,100000,1000000 --n-data 500
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+
+from hqcb_hhh.inference import (
+    BAOMockDataset,
+    bao_loglike_hqcb,
+    bao_loglike_hqcb_grid,
+    load_bao_mock_csv,
+)
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def synthetic_dataset(n: int, seed: int = 0) -> BAOMockDataset:
+    rng = np.random.default_rng(seed)
+    z = np.sort(rng.uniform(0.1, 2.5, n))
+    a = rng.normal(size=(n, n)) / np.sqrt(n)
+    cov = 0.01 * (a @ a.T + np.eye(n))
+    return BAOMockDataset(z=z, dv_over_rd=5.0 + 4.0 * z, cov=cov)
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--sizes", default="10000,100000,1000000")
+    ap.add_argument("--n-data", type=int, default=0, help="synthetic N (0 = shipped BAO mock)")
+    ap.add_argument("--loop-max", type=int, default=20000)
+    args = ap.parse_args()
+
+    if args.n_data > 0:
+        bao = synthetic_dataset(args.n_data)
+    else:
+        d = ROOT / "data" / "likelihoods" / "bao_mock"
+        bao = load_bao_mock_csv(str(d / "bao.csv"), str(d / "cov.txt"))
+
+    print(f"BAO N = {bao.z.shape[0]}")
+    print(f"{'n_gamma':>9} {'loop [s]':>10} {'grid [s]':>10} {'speedup':>9}")
+    for m in (int(x) for x in args.sizes.split(",")):
+        gammas = np.linspace(3.0, 4.5, m)
+
+        n_loop = min(m, args.loop_max)
+        t0 = time.perf_counter()
+        for g in gammas[:n_loop]:
+            bao_loglike_hqcb(bao, float(g), 11.0 / 3.0, 1.0, 0.2)
+        t_loop = (time.perf_counter() - t0) * (m / n_loop)
+
+        t0 = time.perf_counter()
+        bao_loglike_hqcb_grid(bao, gammas, 11.0 / 3.0, 1.0, 0.2)
+        t_grid = time.perf_counter() - t0
+
+        tag = "" if n_loop == m else " (loop extrapolated)"
+        print(f"{m:>9} {t_loop:>10.3f} {t_grid:>10.4f} {t_loop / t_grid:>8.1f}x{tag}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,53 @@
+# Copyright (c) 2026 Oscar Fuentes Fernández
+# SPDX-License-Identifier: AGPL-3.0-or-later
+"""Benchmark: grid_posterior scaling with workers (1/2/4/8) on thread and process pools.
+
+    python benchmarks/bench_grid_parallel.py
+    python benchmarks/bench_grid_parallel.py --size 4000x4000 --backends process
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import time
+from dataclasses import replace
+
+from hqcb_hhh.inference import grid_posterior
+
+from bench_grid_posterior import BASE, parse_sizes
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--size", default="10000x10000")
+    ap.add_argument("--workers", default="1,2,4,8")
+    ap.add_argument("--backends", default="thread,process")
+    ap.add_argument("--block-mb", type=float, default=64.0)
+    ap.add_argument("--repeat", type=int, default=1)
+    args = ap.parse_args()
+
+    (n_g, n_h), = parse_sizes(args.size)
+    cfg = replace(BASE, grid_gamma=n_g, grid_H0=n_h)
+    print(f"grid {n_g}x{n_h}, block budget {args.block_mb} MB, cpu_count={os.cpu_count()}")
+    print(f"{'backend':>8} {'workers':>8} {'time [s]':>10} {'speedup':>8}")
+
+    for backend in args.backends.split(","):
+        t1 = None
+        ref = None
+        for w in (int(x) for x in args.workers.split(",")):
+            best = float("inf")
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                res = grid_posterior(cfg, memory_budget_mb=args.block_mb, workers=w, backend=backend)
+                best = min(best, time.perf_counter() - t0)
+            if ref is None:
+                ref = res
+            elif res != ref:
+                raise SystemExit(f"result mismatch for backend={backend} workers={w}")
+            t1 = best if t1 is None else t1
+            print(f"{backend:>8} {w:>8} {best:>10.3f} {t1 / best:>7.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,91 @@
+# Copyright (c) 2026 Oscar Fuentes Fernández
+# SPDX-License-Identifier: AGPL-3.0-or-later
+"""Benchmark: vectorized grid_posterior vs the former per-cell Python loop.
+
+The loop reference is timed on a subset of gamma rows and extrapolated to the
+full grid when the grid is large (a 10k x 10k loop would take minutes).
+
+    python benchmarks/bench_grid_posterior.py
+    python benchmarks/bench_grid_posterior.py --sizes 401x321,2001x2001
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from dataclasses import replace
+
+import numpy as np
+
+from hqcb_hhh.inference import HQCBInferenceConfig, grid_posterior
+from hqcb_hhh.inference.models import loglike_gaussian, predict_H0_early
+
+BASE = HQCBInferenceConfig(
+    z_rec=1100.0,
+    rd0_mpc=147.0,
+    H0_local_obs=73.0,
+    H0_local_sigma=1.0,
+    H0_early_obs=67.4,
+    H0_early_sigma=0.6,
+    gamma_ref=11.0 / 3.0,
+    kappa_b=1.0,
+    beta_rd_sensitivity=0.25,
+    gamma_min=3.0,
+    gamma_max=4.5,
+    H0_min=60.0,
+    H0_max=80.0,
+    grid_gamma=401,
+    grid_H0=321,
+)
+
+
+def loop_loglike(cfg: HQCBInferenceConfig, n_rows: int) -> np.ndarray:
+    """The pre-vectorization double loop, restricted to the first n_rows gamma rows."""
+    gammas = np.linspace(cfg.gamma_min, cfg.gamma_max, cfg.grid_gamma, dtype=float)[:n_rows]
+    H0s = np.linspace(cfg.H0_min, cfg.H0_max, cfg.grid_H0, dtype=float)
+    logpost = np.empty((gammas.shape[0], H0s.shape[0]), dtype=float)
+    for i, g in enumerate(gammas):
+        for j, h0 in enumerate(H0s):
+            pred = predict_H0_early(float(h0), cfg.z_rec, float(g), cfg.gamma_ref, cfg.kappa_b,
+                                    cfg.beta_rd_sensitivity)
+            ll = 0.0
+            ll += loglike_gaussian(cfg.H0_local_obs, float(h0), cfg.H0_local_sigma)
+            ll += loglike_gaussian(cfg.H0_early_obs, pred, cfg.H0_early_sigma)
+            logpost[i, j] = ll
+    return logpost
+
+
+def parse_sizes(text: str) -> list[tuple[int, int]]:
+    out = []
+    for item in text.split(","):
+        g, h = item.lower().split("x")
+        out.append((int(g), int(h)))
+    return out
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--sizes", default="401x321,2001x2001,10000x10000")
+    ap.add_argument("--loop-cells", type=int, default=200_000,
+                    help="max cells evaluated by the loop reference before extrapolating")
+    args = ap.parse_args()
+
+    print(f"{'grid':>13} {'loop [s]':>11} {'vector [s]':>11} {'speedup':>9}")
+    for n_g, n_h in parse_sizes(args.sizes):
+        cfg = replace(BASE, grid_gamma=n_g, grid_H0=n_h)
+
+        n_rows = max(1, min(n_g, args.loop_cells // n_h))
+        t0 = time.perf_counter()
+        loop_loglike(cfg, n_rows)
+        t_loop = (time.perf_counter() - t0) * (n_g / n_rows)
+
+        t0 = time.perf_counter()
+        grid_posterior(cfg, method="grid")
+        t_vec = time.perf_counter() - t0
+
+        tag = "" if n_rows == n_g else " (loop extrapolated)"
+        print(f"{n_g:>6}x{n_h:<6} {t_loop:>11.3f} {t_vec:>11.3f} {t_loop / t_vec:>8.1f}x{tag}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
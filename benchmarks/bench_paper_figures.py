@@ -0,0 +1,73 @@
+# Copyright (c) 2026 Oscar Fuentes Fernández
+# SPDX-License-Identifier: AGPL-3.0-or-later
+"""Benchmark: wall-clock of the paper-figure build, subprocess chain vs in-process pipelines.
+
+"subprocess" reproduces the former topology: one driver interpreter, and per stage
+`python -m hqcb_hhh <cmd>` which in turn launched `python scripts/<stage>.py`
+(two interpreter start-ups and a full numpy/scipy/matplotlib/yaml import per stage).
+"in-process" runs the three pipelines in one fresh interpreter, as make_paper_figures does now.
+Outputs go to a temporary directory.
+
+    python benchmarks/bench_paper_figures.py --repeat 3
+"""
+from __future__ import annotations
+
+import argparse
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+COSMO = ROOT / "data" / "cosmology"
+
+# Salto intermedio: un intérprete que sólo lanza el script (lo que hacía cli.main)
+HOP = "import subprocess, sys; sys.exit(subprocess.run([sys.executable] + sys.argv[1:]).returncode)"
+
+
+def stages(out: Path) -> list[list[str]]:
+    return [
+        [str(ROOT / "scripts" / "hqcb_b_demo.py"), "--config", str(COSMO / "hqcb_b_toy.yaml"),
+         "--figdir", str(out)],
+        [str(ROOT / "scripts" / "hqcb_infer.py"), "--config", str(COSMO / "hqcb_infer_toy.yaml"),
+         "--out", str(out / "toy.json"), "--figdir", str(out)],
+        [str(ROOT / "scripts" / "hqcb_infer_data.py"), "--config", str(COSMO / "hqcb_infer_data_mock.yaml"),
+         "--out", str(out / "data.json"), "--figdir", str(out)],
+    ]
+
+
+def run_subprocess_chain(out: Path) -> None:
+    for cmd in stages(out):
+        subprocess.run([sys.executable, "-c", HOP] + cmd, check=True, capture_output=True)
+
+
+def run_in_process(out: Path) -> None:
+    code = (
+        "from hqcb_hhh.pipelines import run_demo_b, run_infer_toy, run_infer_data\n"
+        f"run_demo_b({str(COSMO / 'hqcb_b_toy.yaml')!r}, figdir={str(out)!r})\n"
+        f"run_infer_toy({str(COSMO / 'hqcb_infer_toy.yaml')!r}, out={str(out / 'toy.json')!r}, figdir={str(out)!r})\n"
+        f"run_infer_data({str(COSMO / 'hqcb_infer_data_mock.yaml')!r}, out={str(out / 'data.json')!r}, "
+        f"figdir={str(out)!r})\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True, capture_output=True)
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    for label, fn in (("subprocess", run_subprocess_chain), ("in-process", run_in_process)):
+        times = []
+        for _ in range(args.repeat):
+            with tempfile.TemporaryDirectory() as tmp:
+                t0 = time.perf_counter()
+                fn(Path(tmp))
+                times.append(time.perf_counter() - t0)
+        print(f"{label:>11}: best {min(times):.3f}s  mean {sum(times) / len(times):.3f}s  (n={args.repeat})")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,73 @@
+# Copyright (c) 2026 Oscar Fuentes Fernández
+# SPDX-License-Identifier: AGPL-3.0-or-later
+"""Benchmark: JSON vs npy/npz result files (write time, read time, size).
+
+Each grid is written with and without the 2D log-posterior. Reading "npy"
+memory-maps the arrays, so its read time does not grow with the grid; JSON
+with the 2D posterior is skipped above --json-2d-max-cells (it needs several
+GB of Python lists at 5000 x 5000).
+
+    python benchmarks/bench_result_io.py
+    python benchmarks/bench_result_io.py --sizes 401x321,2001x2001
+"""
+from __future__ import annotations
+
+import argparse
+import shutil
+import tempfile
+import time
+from dataclasses import replace
+from pathlib import Path
+
+import numpy as np
+
+from bench_grid_posterior import BASE, parse_sizes
+from hqcb_hhh.inference import grid_posterior
+from hqcb_hhh.io import load_result, write_result
+
+
+def _size(path: Path) -> int:
+    if path.is_dir():
+        return sum(p.stat().st_size for p in path.iterdir())
+    return path.stat().st_size
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--sizes", default="401x321,5000x5000")
+    ap.add_argument("--json-2d-max-cells", type=int, default=4_000_000)
+    args = ap.parse_args()
+
+    print(f"{'grid':>13} {'2D':>3} {'format':>6} {'write [s]':>10} {'read [s]':>9} {'size [MB]':>10}")
+    for n_g, n_h in parse_sizes(args.sizes):
+        res = grid_posterior(replace(BASE, grid_gamma=n_g, grid_H0=n_h),
+                             as_arrays=True, keep_logpost=True)
+        logpost = res["posterior"].pop("logpost")  # type: ignore[union-attr]
+        for with_2d in (False, True):
+            if with_2d:
+                res["posterior"]["logpost"] = logpost  # type: ignore[index]
+            for fmt in ("json", "npz", "npy"):
+                if fmt == "json" and with_2d and n_g * n_h > args.json_2d_max_cells:
+                    print(f"{n_g:>6}x{n_h:<6} {'yes':>3} {fmt:>6} {'skipped':>10}")
+                    continue
+                tmp = Path(tempfile.mkdtemp(prefix="hqcb_bench_"))
+                try:
+                    t0 = time.perf_counter()
+                    written = write_result(res, tmp / "res.json", fmt)
+                    t_write = time.perf_counter() - t0
+                    target = written.parent if fmt == "npy" else written
+                    t0 = time.perf_counter()
+                    back = load_result(target)
+                    float(np.sum(back["posterior"]["p_gamma"]))  # toca los datos
+                    t_read = time.perf_counter() - t0
+                    size = _size(target) + (_size(tmp / "res.npz") if fmt == "npz" else 0)
+                finally:
+                    shutil.rmtree(tmp)
+                flag = "yes" if with_2d else "no"
+                print(f"{n_g:>6}x{n_h:<6} {flag:>3} {fmt:>6} {t_write:>10.3f} {t_read:>9.3f} "
+                      f"{size / 1024**2:>10.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,65 @@
+# Copyright (c) 2026 Oscar Fuentes Fernández
+# SPDX-License-Identifier: AGPL-3.0-or-later
+"""Benchmark: ensemble sampler vs dense grid, and where the crossover lies.
+
+At 2D both are timed: grid cells/s and sampler samples/s and effective
+samples/s (ESS/s). The grid cost at n_dim free parameters is then
+extrapolated as points_per_axis**n_dim cells at the measured 2D cell rate and
+compared with the sampler run time measured at that dimension.
+
+    python benchmarks/bench_sampler.py
+    python benchmarks/bench_sampler.py --points-per-axis 300 --n-steps 4000
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from dataclasses import replace
+
+from bench_grid_posterior import BASE
+from hqcb_hhh.inference import grid_posterior
+from hqcb_hhh.inference.sampling import FreeParameter, default_free_parameters, sample_posterior
+
+# Parámetros extra liberados en orden al subir la dimensión (3D, 4D)
+EXTRA = (
+    FreeParameter("kappa_b", 0.5, 2.0),
+    FreeParameter("beta_rd_sensitivity", 0.1, 0.5),
+)
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--points-per-axis", type=int, default=300)
+    ap.add_argument("--n-walkers", type=int, default=32)
+    ap.add_argument("--n-steps", type=int, default=4000)
+    args = ap.parse_args()
+    n = args.points_per_axis
+
+    cfg = replace(BASE, grid_gamma=n, grid_H0=n)
+    t0 = time.perf_counter()
+    grid_posterior(cfg, method="grid")
+    t_grid = time.perf_counter() - t0
+    cells_per_s = n * n / t_grid
+    print(f"grid 2D {n}x{n}: {t_grid:.3f} s ({cells_per_s:.3g} cells/s)")
+
+    print(f"{'n_dim':>5} {'grid [s]':>12} {'sampler [s]':>12} {'samples/s':>10} "
+          f"{'min ESS':>8} {'ESS/s':>8} {'faster':>8}")
+    for n_dim in (2, 3, 4):
+        free = default_free_parameters(cfg) + EXTRA[:n_dim - 2]
+        t0 = time.perf_counter()
+        res = sample_posterior(cfg, free=free, n_walkers=args.n_walkers, n_steps=args.n_steps,
+                               as_arrays=True)
+        t_s = time.perf_counter() - t0
+        diag = res["diagnostics"]
+        ess = min(diag["ess"].values())  # type: ignore[attr-defined]
+        t_g = t_grid if n_dim == 2 else n ** n_dim / cells_per_s
+        tag = "" if n_dim == 2 else " (extrapolated)"
+        faster = "grid" if t_g < t_s else "sampler"
+        print(f"{n_dim:>5} {t_g:>12.3g} {t_s:>12.3f} "
+              f"{args.n_walkers * args.n_steps / t_s:>10.3g} {ess:>8.0f} {ess / t_s:>8.0f} "
+              f"{faster:>8}{tag}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
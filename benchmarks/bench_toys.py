@@ -0,0 +1,55 @@
+# Copyright (c) 2026 Oscar Fuentes Fernández
+# SPDX-License-Identifier: AGPL-3.0-or-later
+"""Benchmark: pseudo-experiment throughput (toys/s) for both toy engines.
+
+kappa_lambda toys are fitted in closed form; HQCB toys (H0 + BAO) use the
+batched scan + golden-section fit. Each engine runs serially and with
+--workers processes; the per-toy results are identical in both cases.
+
+    python benchmarks/bench_toys.py
+    python benchmarks/bench_toys.py --n-rate 1000000 --n-hqcb 200000 --workers 4
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from pathlib import Path
+
+from bench_grid_posterior import BASE
+from hqcb_hhh.inference import load_bao_mock_csv
+from hqcb_hhh.inference.toys import hqcb_toys
+from hqcb_hhh.io import load_config
+from hqcb_hhh.toys import rate_toys
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--n-rate", type=int, default=1_000_000)
+    ap.add_argument("--n-hqcb", type=int, default=100_000)
+    ap.add_argument("--workers", type=int, default=4)
+    args = ap.parse_args()
+
+    cfg = load_config(ROOT / "data" / "projections" / "hl_lhc_baseline.yaml")
+    bao_dir = ROOT / "data" / "likelihoods" / "bao_mock"
+    bao = load_bao_mock_csv(str(bao_dir / "bao.csv"), str(bao_dir / "cov.txt"))
+    jobs = {
+        "kappa_lambda": (args.n_rate, lambda w: rate_toys(cfg, n_toys=args.n_rate, workers=w)),
+        "hqcb+bao": (args.n_hqcb, lambda w: hqcb_toys(BASE, n_toys=args.n_hqcb, bao=bao,
+                                                      bao_p_sensitivity=0.2, workers=w)),
+    }
+    print(f"{'engine':>13} {'toys':>9} {'workers':>7} {'time [s]':>9} {'toys/s':>10} {'cov95':>7}")
+    for name, (n, run) in jobs.items():
+        for w in sorted({1, args.workers}):
+            t0 = time.perf_counter()
+            res = run(w)
+            dt = time.perf_counter() - t0
+            cov = res["coverage"]
+            c95 = (cov["95"] if name == "kappa_lambda" else cov["gamma"]["95"])["coverage"]  # type: ignore[index]
+            print(f"{name:>13} {n:>9} {w:>7} {dt:>9.3f} {n / dt:>10.3g} {c95:>7.4f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,313 @@
+# Copyright (c) 2026 Oscar Fuentes Fernández
+# SPDX-License-Identifier: AGPL-3.0-or-later
+"""Benchmark suite: time and peak memory of every hot path, compared with a baseline.
+
+Covers fit_quadratic_sigma and batched fit_polynomial, RateGaussianLikelihood.nll
++ find_interval_1d and the closed-form intervals, grid_posterior, load_bao_mock_csv and bao_loglike_hqcb on synthetic datasets,
+and the CLI pipelines end to end (in process, outputs in a temporary
+directory, no network). Each case is timed over several repeats (min and
+median); the peak of Python/numpy allocations comes from a separate
+tracemalloc run so the tracing overhead does not leak into the timings.
+
+    python benchmarks/run_suite.py                        # -> benchmarks/results/latest.json
+    python benchmarks/run_suite.py --quick --filter grid  # small sizes, matching cases only
+    python benchmarks/run_suite.py --save-baseline        # also write benchmarks/baseline.json
+    python benchmarks/run_suite.py --threshold 0.5        # fail when a case is > 50% slower
+
+The exit status is 1 when a case regresses against the baseline: median time
+(or peak memory) above baseline * (1 + threshold) and beyond a small absolute
+noise floor.
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import statistics
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass, replace
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+
+from bench_grid_posterior import BASE
+
+ROOT = Path(__file__).resolve().parents[1]
+RESULTS = ROOT / "benchmarks" / "results" / "latest.json"
+BASELINE = ROOT / "benchmarks" / "baseline.json"
+
+# Diferencias por debajo de esto son ruido del sistema, no regresiones
+_TIME_FLOOR_S = 2e-3
+_MEMORY_FLOOR_MB = 1.0
+
+
+@dataclass(frozen=True)
+class Case:
+    name: str
+    group: str
+    setup: Callable[[Path], Callable[[], object]]   # setup(tmpdir) -> función a medir
+    params: Dict[str, Any]
+
+
+def _kappa_cases(quick: bool) -> List[Case]:
+    from hqcb_hhh.fitting import fit_polynomial
+    from hqcb_hhh.io import load_config
+    from hqcb_hhh.likelihood import RateGaussianLikelihood, find_interval_1d, quadratic_rate_intervals
+    from hqcb_hhh.theory import fit_quadratic_sigma
+
+    cfg = load_config(ROOT / "data" / "projections" / "hl_lhc_baseline.yaml")
+
+    def fit(_: Path) -> Callable[[], object]:
+        return lambda: fit_quadratic_sigma(cfg.sigma_points)
+
+    def scan(n: int) -> Callable[[Path], Callable[[], object]]:
+        def setup(_: Path) -> Callable[[], object]:
+            model = fit_quadratic_sigma(cfg.sigma_points)
+            s = float(model.sigma(1.0))
+            like = RateGaussianLikelihood(model, s, cfg.rel_uncert_rate * s)
+            grid = np.linspace(cfg.kappa_min, cfg.kappa_max, n)
+            return lambda: find_interval_1d(grid, like.nll(grid), cfg.cl95_delta_nll)
+        return setup
+
+    def analytic(n: int) -> Callable[[Path], Callable[[], object]]:
+        # n escenarios de incertidumbre resueltos en forma cerrada (sin malla)
+        def setup(_: Path) -> Callable[[], object]:
+            m = fit_quadratic_sigma(cfg.sigma_points)
+            s = float(m.sigma(1.0))
+            err = np.linspace(0.05, 1.0, n) * s
+            return lambda: quadratic_rate_intervals(m.a, m.b, m.c, s, err, cfg.cl95_delta_nll,
+                                                    cfg.kappa_min, cfg.kappa_max)
+        return setup
+
+    def batched_fit(n: int) -> Callable[[Path], Callable[[], object]]:
+        # n tablas sigma con los nodos del config (p. ej. toys o barridos de escala)
+        def setup(_: Path) -> Callable[[], object]:
+            ks = np.array([k for k, _ in cfg.sigma_points])
+            ys = np.array([s for _, s in cfg.sigma_points])
+            tables = ys[None, :] * np.random.default_rng(0).uniform(0.9, 1.1, (n, ks.size))
+            return lambda: fit_polynomial(ks, tables)
+        return setup
+
+    sizes = (1_001, 100_001) if quick else (1_001, 100_001, 10_000_001)
+    n_fit = (1_000,) if quick else (1_000, 100_000)
+    n_scen = (1_000, 100_000) if quick else (1_000, 1_000_000)
+    return [Case("fit_quadratic_sigma", "kappa_lambda", fit, {})] + [
+        Case(f"fit_polynomial_batched[{n}]", "kappa_lambda", batched_fit(n), {"n_tables": n}) for n in n_fit
+    ] + [
+        Case(f"rate_nll_interval[{n}]", "kappa_lambda", scan(n), {"n_grid": n}) for n in sizes
+    ] + [
+        Case(f"rate_interval_analytic[{n}]", "kappa_lambda", analytic(n), {"n_scenarios": n}) for n in n_scen
+    ]
+
+
+def _grid_cases(quick: bool) -> List[Case]:
+    from hqcb_hhh.inference import grid_posterior
+
+    def setup(n_g: int, n_h: int, method: str) -> Callable[[Path], Callable[[], object]]:
+        cfg = replace(BASE, grid_gamma=n_g, grid_H0=n_h)
+        return lambda _: (lambda: grid_posterior(cfg, method=method))
+
+    shapes = [(401, 321), (2001, 2001)]
+    if not quick:
+        shapes += [(4001, 1001), (1001, 4001)]
+    out = [Case(f"grid_posterior[{g}x{h}]", "grid_posterior", setup(g, h, "grid"),
+                {"grid_gamma": g, "grid_H0": h, "method": "grid"}) for g, h in shapes]
+    g, h = shapes[-1]
+    out.append(Case(f"grid_posterior_analytic[{g}x{h}]", "grid_posterior", setup(g, h, "analytic"),
+                    {"grid_gamma": g, "grid_H0": h, "method": "analytic"}))
+    return out
+
+
+def write_synthetic_bao(directory: Path, n: int, seed: int = 0) -> tuple[Path, Path]:
+    """BAO CSV + covariance text file of size n (the same layout as data/likelihoods/bao_mock)."""
+    csv, cov_path = directory / f"bao_{n}.csv", directory / f"cov_{n}.txt"
+    if csv.exists() and cov_path.exists():
+        return csv, cov_path
+    rng = np.random.default_rng(seed)
+    z = np.sort(rng.uniform(0.1, 2.5, n))
+    a = rng.normal(size=(n, n)) / np.sqrt(n)
+    cov = 0.01 * (a @ a.T + np.eye(n))
+    cov = 0.5 * (cov + cov.T)
+    rows = "".join(f"{zi:.6f},{5.0 + 4.0 * zi:.6f}\n" for zi in z)
+    csv.write_text("z,dv_over_rd\n" + rows, encoding="utf-8")
+    np.savetxt(cov_path, cov, fmt="%.17g")
+    return csv, cov_path
+
+
+def _bao_cases(quick: bool) -> List[Case]:
+    from hqcb_hhh.inference import bao_loglike_hqcb, load_bao_mock_csv
+
+    def load(n: int) -> Callable[[Path], Callable[[], object]]:
+        def setup(tmp: Path) -> Callable[[], object]:
+            # Los ficheros se comparten entre casos (escribir N = 5000 cuesta ~20 s)
+            csv, cov = write_synthetic_bao(tmp.parent, n)
+            return lambda: load_bao_mock_csv(str(csv), str(cov))
+        return setup
+
+    def loglike(n: int) -> Callable[[Path], Callable[[], object]]:
+        def setup(tmp: Path) -> Callable[[], object]:
+            bao = load_bao_mock_csv(*(str(p) for p in write_synthetic_bao(tmp.parent, n)))
+            gammas = np.linspace(3.0, 4.5, 64)
+
+            def run() -> object:
+                return [bao_loglike_hqcb(bao, float(g), 11.0 / 3.0, 1.0, 0.2) for g in gammas]
+            return run
+        return setup
+
+    sizes = (5, 50, 500) if quick else (5, 50, 500, 5000)
+    return ([Case(f"load_bao_mock_csv[{n}]", "bao", load(n), {"n": n}) for n in sizes]
+            + [Case(f"bao_loglike_hqcb[{n}]", "bao", loglike(n), {"n": n, "n_gamma": 64})
+               for n in sizes])
+
+
+def _cli_cases(quick: bool) -> List[Case]:
+    from hqcb_hhh.cli import main
+
+    infer_toy = str(ROOT / "data" / "cosmology" / "hqcb_infer_toy.yaml")
+    infer_data = str(ROOT / "data" / "cosmology" / "hqcb_infer_data_mock.yaml")
+    projection = str(ROOT / "data" / "projections" / "hl_lhc_baseline.yaml")
+    n_toys = "20000" if quick else "200000"
+    commands = {
+        "asimov": ["asimov", "--config", projection],
+        "infer-toy": ["infer-toy", "--config", infer_toy, "--no-figures", "--no-cache"],
+        "infer-data": ["infer-data", "--config", infer_data, "--no-figures", "--no-cache"],
+        "profile": ["profile", "--config", infer_data],
+        "sample": ["sample", "--config", infer_data, "--n-steps", "300"],
+        "toys": ["toys", "--config", projection, "--n-toys", n_toys],
+    }
+
+    def setup(argv: List[str]) -> Callable[[Path], Callable[[], object]]:
+        def bind(tmp: Path) -> Callable[[], object]:
+            extra = [] if argv[0] == "asimov" else ["--out", str(tmp / f"{argv[0]}.json")]
+            if argv[0] in ("infer-toy", "infer-data"):
+                extra += ["--figdir", str(tmp)]
+
+            def run() -> object:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    rc = main(argv + extra)
+                if rc != 0:
+                    raise RuntimeError(f"{argv[0]} exited with {rc}")
+                return rc
+            return run
+        return bind
+
+    return [Case(f"cli[{name}]", "cli", setup(argv), {"argv": argv})
+            for name, argv in commands.items()]
+
+
+def all_cases(quick: bool) -> List[Case]:
+    return _kappa_cases(quick) + _grid_cases(quick) + _bao_cases(quick) + _cli_cases(quick)
+
+
+def measure(fn: Callable[[], object], min_repeats: int, max_time: float) -> Dict[str, Any]:
+    """Warm-up call, repeats until both min_repeats and max_time are reached, then tracemalloc."""
+    fn()
+    times: List[float] = []
+    start = time.perf_counter()
+    while len(times) < min_repeats or (time.perf_counter() - start < max_time and len(times) < 1000):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    tracemalloc.start()
+    try:
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {"repeats": len(times), "time_min": min(times), "time_median": statistics.median(times),
+            "peak_mb": peak / 1024**2}
+
+
+def compare(
+    current: Dict[str, Any], baseline: Dict[str, Any], threshold: float
+) -> List[Dict[str, Any]]:
+    """Per-case ratios against the baseline; cases missing on either side are skipped."""
+    rows = []
+    for name, cur in current["cases"].items():
+        base = baseline.get("cases", {}).get(name)
+        if base is None:
+            continue
+        t_ratio = cur["time_median"] / base["time_median"]
+        m_ratio = cur["peak_mb"] / base["peak_mb"] if base["peak_mb"] > 0 else 1.0
+        slow = t_ratio > 1.0 + threshold and cur["time_median"] - base["time_median"] > _TIME_FLOOR_S
+        heavy = m_ratio > 1.0 + threshold and cur["peak_mb"] - base["peak_mb"] > _MEMORY_FLOOR_MB
+        rows.append({"name": name, "time_ratio": t_ratio, "memory_ratio": m_ratio,
+                     "regression": bool(slow or heavy)})
+    return rows
+
+
+def environment() -> Dict[str, Any]:
+    import scipy
+
+    from hqcb_hhh import __version__
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "scipy": scipy.__version__,
+        "hqcb_hhh": __version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+    }
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--quick", action="store_true", help="Smaller sizes (a smoke run of every case)")
+    ap.add_argument("--filter", default=None, help="Only cases whose name contains this text")
+    ap.add_argument("--out", default=str(RESULTS))
+    ap.add_argument("--baseline", default=str(BASELINE))
+    ap.add_argument("--save-baseline", action="store_true",
+                    help="Also write the results as the baseline")
+    ap.add_argument("--threshold", type=float, default=0.25,
+                    help="Allowed relative slowdown / memory growth")
+    ap.add_argument("--min-repeats", type=int, default=3)
+    ap.add_argument("--max-time", type=float, default=1.0,
+                    help="Seconds of repeats per case (beyond min)")
+    args = ap.parse_args()
+
+    cases = [c for c in all_cases(args.quick) if args.filter is None or args.filter in c.name]
+    res: Dict[str, Any] = {"environment": environment(), "quick": args.quick,
+                           "threshold": args.threshold, "cases": {}}
+    print(f"{'case':<38} {'median [s]':>11} {'min [s]':>10} {'repeats':>8} {'peak [MB]':>10}")
+    with tempfile.TemporaryDirectory(prefix="hqcb_bench_") as tmp:
+        for case in cases:
+            work = Path(tmp) / str(len(res["cases"]))
+            work.mkdir()
+            m = measure(case.setup(work), args.min_repeats, args.max_time)
+            res["cases"][case.name] = {"group": case.group, "params": case.params, **m}
+            print(f"{case.name:<38} {m['time_median']:>11.5f} {m['time_min']:>10.5f} {m['repeats']:>8} "
+                  f"{m['peak_mb']:>10.2f}", flush=True)
+
+    out = Path(args.out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(res, indent=2), encoding="utf-8")
+    print(f"wrote: {out}")
+
+    status = 0
+    base_path = Path(args.baseline)
+    if base_path.exists():
+        rows = compare(res, json.loads(base_path.read_text(encoding="utf-8")), args.threshold)
+        print(f"\nvs baseline {base_path} (threshold +{100 * args.threshold:.0f}%)")
+        for r in rows:
+            flag = "REGRESSION" if r["regression"] else ""
+            print(f"{r['name']:<38} time x{r['time_ratio']:.2f} memory x{r['memory_ratio']:.2f} {flag}")
+        status = int(any(r["regression"] for r in rows))
+    else:
+        print(f"no baseline at {base_path}; run with --save-baseline to create one")
+    if args.save_baseline:
+        base_path.parent.mkdir(parents=True, exist_ok=True)
+        base_path.write_text(json.dumps(res, indent=2), encoding="utf-8")
+        print(f"baseline saved: {base_path}")
+    return status
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,38 +1,56 @@
 from __future__ import annotations
 
+import argparse
 import shutil
-import subprocess
 from pathlib import Path
-import sys
 
+from hqcb_hhh.cache import ResultCache
+from hqcb_hhh.pipelines import run_demo_b, run_infer_data, run_infer_toy
 
-def run(cmd: list[str]) -> None:
-    p = subprocess.run(cmd)
-    if p.returncode != 0:
-        raise SystemExit(p.returncode)
+
+def run(rc: int) -> None:
+    if rc != 0:
+        raise SystemExit(rc)
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Regenerate docs/ and paper/ figures")
+    p.add_argument("--no-cache", dest="use_cache", action="store_false",
+                   help="Always recompute; do not read or write the result cache")
+    p.add_argument("--refresh", action="store_true",
+                   help="Recompute and overwrite cached results")
+    return p.parse_args()
 
 
 def main() -> int:
+    args = parse_args()
     repo = Path(__file__).resolve().parents[1]
     docs_fig = repo / "docs" / "figures"
     paper_fig = repo / "paper" / "figures"
+    results = repo / "data" / "results"
     docs_fig.mkdir(parents=True, exist_ok=True)
     paper_fig.mkdir(parents=True, exist_ok=True)
 
+    # Todas las etapas en el mismo proceso (numpy/scipy/matplotlib/yaml se importan una vez)
+    # Los posteriores se sirven de la caché si config, datos BAO y fuentes del paquete no cambian
+    cache = ResultCache(repo / ".hqcb_cache", refresh=args.refresh) if args.use_cache else None
+
     # 1) HQCB-B demo (figuras)
-    run([sys.executable, "-m", "hqcb_hhh", "demo-b", "--config", "data/cosmology/hqcb_b_toy.yaml"])
+    run(run_demo_b(repo / "data" / "cosmology" / "hqcb_b_toy.yaml", figdir=docs_fig))
 
     # 2) Inference toy (si existe el script/config en tu repo)
     infer_toy_cfg = repo / "data" / "cosmology" / "hqcb_infer_toy.yaml"
     if infer_toy_cfg.exists():
-        run([sys.executable, "-m", "hqcb_hhh", "infer-toy", "--config", str(infer_toy_cfg)])
+        run(run_infer_toy(infer_toy_cfg, out=results / "hqcb_infer_results.json", figdir=docs_fig,
+                          cache=cache))
     else:
         print("note: infer-toy config not found; skipping")
 
     # 3) Inference data (BAO mock cov)
     infer_data_cfg = repo / "data" / "cosmology" / "hqcb_infer_data_mock.yaml"
     if infer_data_cfg.exists():
-        run([sys.executable, "-m", "hqcb_hhh", "infer-data", "--config", str(infer_data_cfg)])
+        run(run_infer_data(infer_data_cfg, out=results / "hqcb_infer_data_results.json", figdir=docs_fig,
+                           cache=cache))
     else:
         print("note: infer-data config not found; skipping")
 
@@ -52,4 +70,4 @@ def main() -> int:
 
 
 if __name__ == "__main__":
-    raise SystemExit(main())
\ No newline at end of file
+    raise SystemExit(main())
@@ -0,0 +1,228 @@
+# Copyright (c) 2026 Oscar Fuentes Fernández
+# SPDX-License-Identifier: AGPL-3.0-or-later
+"""Content-addressed on-disk cache for inference results.
+
+Keys are SHA-256 digests of a normalized JSON payload (config, input file
+contents, package version and a digest of the package sources). Each entry is a
+JSON document plus an optional .npz holding its arrays (ndarrays and long float
+lists); entries are evicted least-recently-used once the cache grows past ``max_bytes``.
+The ``tables/`` (TableCache) and ``emulator/`` subtrees of the root count towards
+the same budget and are evicted and cleared file by file.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from . import __version__
+
+DEFAULT_CACHE_DIR = ".hqcb_cache"
+DEFAULT_MAX_MB = 256.0
+
+# Listas de floats a partir de esta longitud van al .npz en lugar del JSON
+_MIN_ARRAY_LEN = 16
+_NPZ_TAG = "__npz__"
+
+# Subárboles de root que escriben otras cachés (TableCache, tablas del emulador)
+_AUX_DIRS = ("tables", "emulator")
+
+# Fuentes que entran en la huella de código de las claves
+_PACKAGE_DIR = Path(__file__).resolve().parent
+
+
+def file_digest(path: str | Path) -> str:
+    """SHA-256 of a file's bytes (so moved or touched files still hit)."""
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+@lru_cache(maxsize=1)
+def code_digest() -> str:
+    """SHA-256 of every .py source of the package (relative path + bytes).
+
+    __version__ no cambia entre commits: la huella de las fuentes sí, así que editar
+    el modelo o las likelihoods invalida los resultados guardados. Se calcula una vez
+    por proceso.
+    """
+    h = hashlib.sha256()
+    for p in sorted(_PACKAGE_DIR.rglob("*.py")):
+        h.update(p.relative_to(_PACKAGE_DIR).as_posix().encode("utf-8") + b"\0")
+        h.update(p.read_bytes())
+    return h.hexdigest()
+
+
+def cache_key(kind: str, payload: Dict[str, Any]) -> str:
+    """Digest of (kind, payload, version, code_digest()); payload must be JSON-serializable."""
+    doc = {"kind": kind, "version": __version__, "code": code_digest(), "payload": payload}
+    blob = json.dumps(doc, sort_keys=True, separators=(",", ":"), allow_nan=True)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def _is_float_list(v: Any) -> bool:
+    return (
+        isinstance(v, list)
+        and len(v) >= _MIN_ARRAY_LEN
+        and all(isinstance(x, float) for x in v)
+    )
+
+
+def _split_arrays(obj: Any, path: str, arrays: Dict[str, Any]) -> Any:
+    # Sustituye arrays y listas de floats largas por {"__npz__": ruta} y los acumula en `arrays`
+    import numpy as np
+
+    if isinstance(obj, dict):
+        return {k: _split_arrays(v, f"{path}.{k}" if path else k, arrays) for k, v in obj.items()}
+    if isinstance(obj, np.ndarray) or _is_float_list(obj):
+        arrays[path] = obj
+        return {_NPZ_TAG: path}
+    return obj
+
+
+def _join_arrays(obj: Any, arrays: Any) -> Any:
+    if isinstance(obj, dict):
+        if set(obj) == {_NPZ_TAG}:
+            return arrays[obj[_NPZ_TAG]]
+        return {k: _join_arrays(v, arrays) for k, v in obj.items()}
+    return obj
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    writes: int = 0
+    evictions: int = 0
+
+    def __str__(self) -> str:
+        return (f"hits={self.hits} misses={self.misses} "
+                f"writes={self.writes} evictions={self.evictions}")
+
+
+class ResultCache:
+    """LRU-bounded store of JSON-serializable result dicts under ``root``."""
+
+    def __init__(
+        self,
+        root: str | Path = DEFAULT_CACHE_DIR,
+        max_mb: float = DEFAULT_MAX_MB,
+        refresh: bool = False,
+    ) -> None:
+        if max_mb <= 0:
+            raise ValueError("max_mb must be > 0")
+        self.root = Path(root)
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.refresh = refresh
+        self.stats = CacheStats()
+
+    def _paths(self, key: str) -> Tuple[Path, Path]:
+        d = self.root / key[:2]
+        return d / f"{key}.json", d / f"{key}.npz"
+
+    def get(self, key: str) -> Dict[str, Any] | None:
+        """Cached result for ``key`` or None; with refresh=True every lookup misses.
+
+        Stored arrays come back as np.ndarray.
+        """
+        meta, npz = self._paths(key)
+        if self.refresh or not meta.exists():
+            self.stats.misses += 1
+            return None
+        try:
+            doc = json.loads(meta.read_text(encoding="utf-8"))
+            if npz.exists():
+                import numpy as np
+
+                with np.load(npz) as z:
+                    doc = _join_arrays(doc, {k: z[k] for k in z.files})
+        except (OSError, ValueError, KeyError):
+            # Entrada corrupta o a medio escribir: se trata como fallo y se reescribe
+            self.stats.misses += 1
+            return None
+        os.utime(meta)  # marca de uso para el LRU
+        self.stats.hits += 1
+        out: Dict[str, Any] = doc
+        return out
+
+    def put(self, key: str, result: Dict[str, Any]) -> None:
+        meta, npz = self._paths(key)
+        meta.parent.mkdir(parents=True, exist_ok=True)
+        arrays: Dict[str, Any] = {}
+        doc = _split_arrays(result, "", arrays)
+        # Escritura atómica: primero .npz, luego el JSON que lo referencia
+        if arrays:
+            import numpy as np
+
+            tmp_npz = npz.with_name(npz.stem + ".tmp.npz")
+            payload: Dict[str, Any] = {k: np.asarray(v) for k, v in arrays.items()}
+            np.savez(tmp_npz, **payload)
+            os.replace(tmp_npz, npz)
+        tmp = meta.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(doc), encoding="utf-8")
+        os.replace(tmp, meta)
+        self.stats.writes += 1
+        self.evict()
+
+    def _entries(self) -> List[Tuple[float, int, Tuple[Path, ...]]]:
+        # (último uso, bytes, ficheros) por entrada; en tables/ y emulator/ cada fichero
+        # es una entrada (un índice o una tabla desalojados solo fuerzan a reconstruirlos)
+        out: List[Tuple[float, int, Tuple[Path, ...]]] = []
+        if not self.root.exists():
+            return out
+        for meta in self.root.glob("*/*.json"):
+            if meta.parent.name in _AUX_DIRS:
+                continue
+            npz = meta.with_suffix(".npz")
+            files = (meta, npz) if npz.exists() else (meta,)
+            out.append((meta.stat().st_mtime, sum(p.stat().st_size for p in files), files))
+        for sub in _AUX_DIRS:
+            for p in (self.root / sub).rglob("*"):
+                if p.is_file():
+                    st = p.stat()
+                    out.append((st.st_mtime, st.st_size, (p,)))
+        return out
+
+    def evict(self) -> int:
+        """Drop least-recently-used entries until the cache fits in max_bytes."""
+        entries = sorted(self._entries(), key=lambda e: e[0])
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, files in entries:
+            if total <= self.max_bytes:
+                break
+            for p in files:
+                p.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        self.stats.evictions += removed
+        return removed
+
+    def info(self) -> Dict[str, Any]:
+        entries = self._entries()
+        return {
+            "root": str(self.root),
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+            "max_bytes": self.max_bytes,
+        }
+
+    def clear(self) -> int:
+        """Remove every entry (results, tables and emulator files) and the emptied directories."""
+        entries = self._entries()
+        for _, _, files in entries:
+            for p in files:
+                p.unlink(missing_ok=True)
+        if self.root.exists():
+            # Más profundos primero, para que cada padre quede vacío antes de borrarlo
+            for d in sorted((p for p in self.root.rglob("*") if p.is_dir()),
+                            key=lambda p: len(p.parts), reverse=True):
+                if not any(d.iterdir()):
+                    d.rmdir()
+        return len(entries)
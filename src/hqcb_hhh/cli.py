@@ -1,45 +1,407 @@
 from __future__ import annotations
 
 import argparse
-import subprocess
-import sys
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Tuple
 
+if TYPE_CHECKING:
+    from .cache import ResultCache
 
-def _run(cmd: list[str]) -> int:
-    p = subprocess.run(cmd)
-    return int(p.returncode)
+
+# --- opciones comunes del grid posterior (CLI + scripts/) ---
+
+def add_grid_arguments(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--memory-budget-mb", type=float, default=None,
+                   help="Evaluate the grid in row blocks within this memory budget (streaming mode)")
+    p.add_argument("--workers", type=int, default=1, help="Parallel workers for the grid posterior")
+    p.add_argument("--backend", choices=["thread", "process"], default="thread",
+                   help="Worker pool type used when --workers > 1")
+    p.add_argument("--adaptive-eps", type=float, default=None,
+                   help="Coarse-to-fine grid refining only cells holding (1 - eps) of the mass")
+    p.add_argument("--method", choices=["grid", "auto", "analytic"], default="grid",
+                   help="grid: dense 2-D scan (default); analytic: integrate H0_local in closed "
+                        "form (O(n_gamma)); auto: analytic when valid, else grid")
+    p.add_argument("--checkpoint-dir", default=None,
+                   help="Persist finished gamma-row blocks here; rerun to resume or extend a scan")
+
+
+def grid_options(args: argparse.Namespace) -> Dict[str, Any]:
+    return {
+        "memory_budget_mb": args.memory_budget_mb,
+        "workers": args.workers,
+        "backend": args.backend,
+        "adaptive_eps": args.adaptive_eps,
+        "checkpoint_dir": args.checkpoint_dir,
+        "method": args.method,
+    }
+
+
+def add_figure_arguments(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--no-figures", dest="figures", action="store_false",
+                   help="Skip plotting (matplotlib is never imported)")
+
+
+def add_output_arguments(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--format", dest="fmt", choices=["json", "npy", "npz"], default="json",
+                   help="json: single JSON; npy/npz: JSON sidecar + binary arrays (npy is mmap-able)")
+    p.add_argument("--store-logpost", action="store_true",
+                   help="Also store the 2D log-posterior (requires --format npy/npz)")
+
+
+def output_options(args: argparse.Namespace) -> Dict[str, Any]:
+    if args.store_logpost and args.fmt == "json":
+        raise SystemExit("--store-logpost requires --format npy or npz")
+    return {"fmt": args.fmt, "keep_logpost": args.store_logpost}
+
+
+def add_emulator_arguments(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--emulator", action="store_true",
+                   help="Serve H0_early (and DV/rd) from the tabulated gamma emulator")
+    p.add_argument("--emulator-nodes", type=int, default=257, help="Emulator table nodes in gamma")
+    p.add_argument("--emulator-kind", choices=["cubic", "linear"], default="cubic",
+                   help="Emulator interpolation")
+
+
+def emulator_options(args: argparse.Namespace) -> Dict[str, Any]:
+    if not args.emulator:
+        return {"emulator": None}
+    return {"emulator": {"n_gamma": args.emulator_nodes, "kind": args.emulator_kind}}
+
+
+def add_cache_arguments(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--no-cache", dest="use_cache", action="store_false",
+                   help="Always recompute; do not read or write the result cache")
+    p.add_argument("--refresh", action="store_true",
+                   help="Recompute and overwrite cached results")
+    p.add_argument("--cache-dir", default=".hqcb_cache", help="Result cache directory")
+    p.add_argument("--cache-max-mb", type=float, default=256.0,
+                   help="Evict least-recently-used entries (results, BAO and emulator tables) "
+                        "beyond this size")
+
+
+def add_profile_arguments(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--profile", action="store_true",
+                   help="Write a per-stage wall/CPU/peak-memory report next to the results "
+                        "(also enabled by HQCB_PROFILE=1)")
+    p.add_argument("--profile-pstats", action="store_true",
+                   help="With --profile, also dump cProfile stats of the hottest stage "
+                        "(HQCB_PROFILE=pstats)")
+    p.add_argument("--profile-out", default=None, help="Profile report path (default: <out>.profile.json)")
+
+
+def profile_path(args: argparse.Namespace) -> Path:
+    if args.profile_out:
+        return Path(args.profile_out)
+    out = getattr(args, "out", None)
+    if out is None:
+        return Path("data/results") / f"{args.cmd}.profile.json"
+    return Path(out).with_suffix("").with_name(Path(out).stem + ".profile.json")
+
+
+def make_cache(args: argparse.Namespace) -> ResultCache | None:
+    if not args.use_cache:
+        return None
+    from .cache import ResultCache
+    return ResultCache(args.cache_dir, max_mb=args.cache_max_mb, refresh=args.refresh)
+
+
+def _asimov(args: argparse.Namespace) -> int:
+    import numpy as np
+
+    from .io import load_config
+    from .likelihood import RateGaussianLikelihood, find_interval_1d
+    from .theory import fit_quadratic_sigma
+
+    cfg = load_config(args.config)
+    model = fit_quadratic_sigma(cfg.sigma_points)
+    sigma_sm = float(model.sigma(1.0))
+    like = RateGaussianLikelihood(model=model, sigma_asimov=sigma_sm, sigma_err=cfg.rel_uncert_rate * sigma_sm)
+
+    print(f"Config: {args.config}")
+    print(f"sigma(k) = {model.a:.6g} k^2 + {model.b:.6g} k + {model.c:.6g}  [fb]")
+    grid = np.linspace(cfg.kappa_min, cfg.kappa_max, cfg.n_grid) if args.grid_check else None
+    for label, delta in (("68%", cfg.cl68_delta_nll), ("95%", cfg.cl95_delta_nll)):
+        ivs = like.intervals(delta, cfg.kappa_min, cfg.kappa_max, method=args.method)
+        print(f"{label} CL: " + " U ".join(f"[{lo:.6f}, {hi:.6f}]" for lo, hi in ivs))
+        if grid is not None:
+            lo, hi = find_interval_1d(grid, like.nll(grid), delta)
+            print(f"  grid check ({cfg.n_grid} pts): [{lo:.6f}, {hi:.6f}]")
+    return 0
+
+
+def _forecast_batch(args: argparse.Namespace) -> int:
+    from .forecast import batch_forecast, expand_sweep, load_scenarios, write_table
+
+    scenarios = []
+    if args.configs:
+        scenarios += load_scenarios(args.configs)
+    if args.sweep:
+        scenarios += expand_sweep(args.sweep)
+    if not scenarios:
+        raise SystemExit("forecast-batch: pass --configs and/or --sweep")
+
+    rows = batch_forecast(scenarios, workers=args.workers)
+    out = write_table(rows, args.out)
+    print(f"forecast-batch: {len(rows)} scenarios -> {out}")
+    return 0
+
+
+def parse_free(items: List[str]) -> Dict[str, Tuple[float, float]]:
+    """NAME=LOW:HIGH entries of --free -> {name: (low, high)}."""
+    out: Dict[str, Tuple[float, float]] = {}
+    for item in items:
+        try:
+            name, bounds = item.split("=", 1)
+            lo, hi = bounds.split(":", 1)
+            out[name.strip()] = (float(lo), float(hi))
+        except ValueError:
+            raise SystemExit(f"--free expects NAME=LOW:HIGH, got {item!r}") from None
+    return out
+
+
+def parse_values(text: str | None) -> List[float] | None:
+    """Sweep values: "A,B,C" (list) or "START:STOP:NUM" (NUM evenly spaced values, ends included)."""
+    if text is None:
+        return None
+    try:
+        if ":" in text:
+            start, stop, num = text.split(":")
+            n = int(num)
+            if n < 1:
+                raise ValueError
+            step = (float(stop) - float(start)) / (n - 1) if n > 1 else 0.0
+            return [float(start) + i * step for i in range(n)]
+        return [float(v) for v in text.split(",") if v.strip()]
+    except ValueError:
+        raise SystemExit(f"expected A,B,C or START:STOP:NUM, got {text!r}") from None
+
+
+def parse_truth(items: List[str]) -> Dict[str, float]:
+    """NAME=VALUE entries of --truth -> {name: value}."""
+    out: Dict[str, float] = {}
+    for item in items:
+        try:
+            name, value = item.split("=", 1)
+            out[name.strip()] = float(value)
+        except ValueError:
+            raise SystemExit(f"--truth expects NAME=VALUE, got {item!r}") from None
+    return out
+
+
+def _cache(args: argparse.Namespace) -> int:
+    from .cache import ResultCache
+
+    cache = ResultCache(args.cache_dir)
+    if args.clear:
+        print(f"cache: removed {cache.clear()} entries from {args.cache_dir}")
+        return 0
+    info = cache.info()
+    print(f"cache: {info['entries']} entries, {info['bytes'] / 1024**2:.2f} MB in {info['root']}")
+    return 0
 
 
 def build_parser() -> argparse.ArgumentParser:
     p = argparse.ArgumentParser(prog="hqcb_hhh", description="HQCB repo CLI (demos + inference)")
     sub = p.add_subparsers(dest="cmd", required=True)
 
+    a = sub.add_parser("asimov", help="Asimov kappa_lambda intervals (adaptive root finding)")
+    a.add_argument("--method", choices=["adaptive", "analytic"], default="adaptive",
+                   help="adaptive: Brent root finding (default); analytic: closed-form quadratic roots")
+    a.add_argument("--config", default="data/projections/hl_lhc_baseline.yaml")
+    a.add_argument("--grid-check", action="store_true", help="Cross-check against the dense DeltaNLL grid")
+
+    f = sub.add_parser("forecast-batch", help="Batch Asimov kappa_lambda intervals for many scenarios")
+    f.add_argument("--configs", nargs="*", default=[], help="Scenario YAML files, directories or globs")
+    f.add_argument("--sweep", default=None, help="Sweep spec YAML (base config + parameter lists)")
+    f.add_argument("--out", default="data/results/forecast_batch.csv")
+    f.add_argument("--workers", type=int, default=1, help="Process pool size for large batches")
+
     b = sub.add_parser("demo-b", help="Run HQCB-B demo (figures)")
     b.add_argument("--config", default="data/cosmology/hqcb_b_toy.yaml")
+    b.add_argument("--figdir", default=None, help="Override output.figures_dir from the config")
+    add_figure_arguments(b)
 
     t = sub.add_parser("infer-toy", help="Run HQCB inference toy (posterior gamma) + figures")
     t.add_argument("--config", default="data/cosmology/hqcb_infer_toy.yaml")
+    t.add_argument("--out", default="data/results/hqcb_infer_results.json")
+    t.add_argument("--figdir", default="docs/figures")
+    add_figure_arguments(t)
+    add_grid_arguments(t)
+    add_emulator_arguments(t)
+    add_output_arguments(t)
+    add_cache_arguments(t)
 
     d = sub.add_parser("infer-data", help="Run HQCB inference with BAO mock(cov) + H0 toy")
     d.add_argument("--config", default="data/cosmology/hqcb_infer_data_mock.yaml")
+    d.add_argument("--out", default="data/results/hqcb_infer_data_results.json")
+    d.add_argument("--figdir", default="docs/figures")
+    add_figure_arguments(d)
+    add_grid_arguments(d)
+    add_emulator_arguments(d)
+    add_output_arguments(d)
+    add_cache_arguments(d)
+
+    s = sub.add_parser("sample", help="Ensemble-sampler posterior with extra free parameters")
+    s.add_argument("--config", default="data/cosmology/hqcb_infer_data_mock.yaml")
+    s.add_argument("--out", default="data/results/hqcb_sample_results.json")
+    s.add_argument("--free", action="append", default=[], metavar="NAME=LOW:HIGH",
+                   help="Also sample kappa_b, beta_rd_sensitivity or bao_p_sensitivity (repeatable)")
+    s.add_argument("--n-walkers", type=int, default=32)
+    s.add_argument("--n-steps", type=int, default=2000)
+    s.add_argument("--burn", type=int, default=None, help="Discarded steps (default n_steps // 4)")
+    s.add_argument("--seed", type=int, default=0)
+    s.add_argument("--format", dest="fmt", choices=["json", "npy", "npz"], default="json")
+
+    r = sub.add_parser("profile", help="Profile likelihoods, MLE and Wilks intervals (no grid)")
+    r.add_argument("--config", default="data/cosmology/hqcb_infer_data_mock.yaml")
+    r.add_argument("--out", default="data/results/hqcb_profile_results.json")
+    r.add_argument("--parameter", action="append", default=None, dest="parameters",
+                   help="Parameter to profile (repeatable; default: every free parameter)")
+    r.add_argument("--free", action="append", default=[], metavar="NAME=LOW:HIGH",
+                   help="Also free kappa_b, beta_rd_sensitivity or bao_p_sensitivity (repeatable)")
+    r.add_argument("--n-points", type=int, default=41, help="Profile points per parameter")
+    r.add_argument("--format", dest="fmt", choices=["json", "npy", "npz"], default="json")
+
+    y = sub.add_parser("toys", help="Pseudo-experiments: interval coverage and pulls")
+    y.add_argument("--model", choices=["kappa-lambda", "hqcb"], default="kappa-lambda")
+    y.add_argument("--config", default=None,
+                   help="Projection YAML (kappa-lambda) or inference YAML (hqcb); a default per model")
+    y.add_argument("--out", default="data/results/toys_results.json")
+    y.add_argument("--n-toys", type=int, default=100_000)
+    y.add_argument("--seed", type=int, default=0)
+    y.add_argument("--workers", type=int, default=1, help="Process pool size (results do not depend on it)")
+    y.add_argument("--truth", action="append", default=[], metavar="NAME=VALUE",
+                   help="Generating value: kappa_lambda, or gamma / H0_local (repeatable)")
+    y.add_argument("--keep-toys", action="store_true", help="Also store the per-toy fits")
+    y.add_argument("--format", dest="fmt", choices=["json", "npy", "npz"], default="json")
+
+    e = sub.add_parser("emulator", help="Build or reuse the HQCB prediction table and report its accuracy")
+    e.add_argument("--config", default="data/cosmology/hqcb_infer_data_mock.yaml")
+    e.add_argument("--out", default="data/results/hqcb_emulator_report.json")
+    e.add_argument("--dir", dest="directory", default=".hqcb_cache/emulator", help="Table directory")
+    e.add_argument("--n-gamma", type=int, default=257, help="Table nodes in gamma")
+    e.add_argument("--kind", choices=["cubic", "linear"], default="cubic")
+    e.add_argument("--rebuild", action="store_true", help="Rebuild even if an up-to-date table exists")
+
+    w = sub.add_parser("sweep", help="Posterior summaries over kappa_b x beta x bao_p_sensitivity")
+    w.add_argument("--config", default="data/cosmology/hqcb_infer_data_mock.yaml")
+    w.add_argument("--out", default="data/results/hqcb_sweep.csv")
+    w.add_argument("--kappa-b", default=None, metavar="VALUES",
+                   help="A,B,C or START:STOP:NUM (default: the config value)")
+    w.add_argument("--beta", default=None, metavar="VALUES", help="beta_rd_sensitivity values, as --kappa-b")
+    w.add_argument("--p-sens", default=None, metavar="VALUES", help="bao_p_sensitivity values, as --kappa-b")
+    w.add_argument("--no-bao", dest="use_bao", action="store_false",
+                   help="Ignore bao_csv/bao_cov of the config (H0-only columns)")
+    w.add_argument("--memory-budget-mb", type=float, default=None,
+                   help="Memory for each block of stacked (gamma, H0_local) grids")
+    w.add_argument("--workers", type=int, default=1, help="Parallel workers over grid blocks")
+    w.add_argument("--backend", choices=["thread", "process"], default="thread",
+                   help="Worker pool type used when --workers > 1")
+
+    for sp in sub.choices.values():
+        add_profile_arguments(sp)
+
+    k = sub.add_parser("cache", help="Show or clear the inference result cache")
+    k.add_argument("--cache-dir", default=".hqcb_cache")
+    k.add_argument("--clear", action="store_true",
+                   help="Remove every cached entry, BAO tables and emulator tables")
 
     return p
 
 
 def main(argv: list[str] | None = None) -> int:
+    from . import profiling
+
     args = build_parser().parse_args(argv)
+    env = profiling.env_setting()
+    # `cache` no tiene opciones de perfil: nunca se instrumenta
+    if not hasattr(args, "profile") or not (args.profile or env):
+        return _dispatch(args)
+
+    prof = profiling.enable(cprofile=bool(args.profile_pstats or env == "pstats"))
+    try:
+        rc = _dispatch(args)
+    finally:
+        profiling.disable()
+    import sys
+
+    argv = sys.argv[1:] if argv is None else list(argv)
+    path = prof.write(profile_path(args), {"command": args.cmd, "argv": argv})
+    print(f"profile: {str(path)} (hottest stage: {prof.hottest()})")
+    return rc
+
+
+def _dispatch(args: argparse.Namespace) -> int:
+    if args.cmd == "asimov":
+        return _asimov(args)
+
+    if args.cmd == "forecast-batch":
+        return _forecast_batch(args)
+
+    if args.cmd == "cache":
+        return _cache(args)
+
+    if args.cmd == "sample":
+        from .pipelines import run_sample
+        return run_sample(
+            args.config, out=args.out, free=parse_free(args.free), n_walkers=args.n_walkers,
+            n_steps=args.n_steps, burn=args.burn, seed=args.seed, fmt=args.fmt,
+        )
+
+    if args.cmd == "profile":
+        from .pipelines import run_profile
+        return run_profile(
+            args.config, out=args.out, parameters=args.parameters, free=parse_free(args.free),
+            n_points=args.n_points, fmt=args.fmt,
+        )
+
+    if args.cmd == "toys":
+        from .pipelines import run_toys
+        default = ("data/projections/hl_lhc_baseline.yaml" if args.model == "kappa-lambda"
+                   else "data/cosmology/hqcb_infer_data_mock.yaml")
+        return run_toys(
+            args.model, args.config or default, out=args.out, n_toys=args.n_toys, seed=args.seed,
+            workers=args.workers, truth=parse_truth(args.truth), keep_toys=args.keep_toys, fmt=args.fmt,
+        )
+
+    if args.cmd == "emulator":
+        from .pipelines import run_emulator
+        return run_emulator(
+            args.config, out=args.out, directory=args.directory, n_gamma=args.n_gamma, kind=args.kind,
+            rebuild=args.rebuild,
+        )
+
+    if args.cmd == "sweep":
+        from .pipelines import run_sweep
+        return run_sweep(
+            args.config, out=args.out, kappa_b=parse_values(args.kappa_b), beta=parse_values(args.beta),
+            p_sens=parse_values(args.p_sens), use_bao=args.use_bao, memory_budget_mb=args.memory_budget_mb,
+            workers=args.workers, backend=args.backend,
+        )
 
+    # Pipelines en el mismo proceso (antes: subprocess sobre scripts/*.py)
     if args.cmd == "demo-b":
-        return _run([sys.executable, "scripts/hqcb_b_demo.py", "--config", args.config])
+        from .pipelines import run_demo_b
+        return run_demo_b(args.config, figdir=args.figdir, figures=args.figures)
 
     if args.cmd == "infer-toy":
-        return _run([sys.executable, "scripts/hqcb_infer.py", "--config", args.config])
+        from .pipelines import run_infer_toy
+        return run_infer_toy(
+            args.config, out=args.out, figdir=args.figdir, grid=grid_options(args),
+            figures=args.figures, cache=make_cache(args), **output_options(args),
+            **emulator_options(args),
+        )
 
     if args.cmd == "infer-data":
-        return _run([sys.executable, "scripts/hqcb_infer_data.py", "--config", args.config])
+        from .pipelines import run_infer_data
+        return run_infer_data(
+            args.config, out=args.out, figdir=args.figdir, grid=grid_options(args),
+            figures=args.figures, cache=make_cache(args), **output_options(args),
+            **emulator_options(args),
+        )
 
     raise SystemExit("Unknown command")
 
 
 if __name__ == "__main__":
-    raise SystemExit(main())
\ No newline at end of file
+    raise SystemExit(main())
@@ -0,0 +1,189 @@
+# Copyright (c) 2026 Oscar Fuentes Fernández
+# SPDX-License-Identifier: AGPL-3.0-or-later
+"""Weighted, batched least-squares fits of cross-section polynomials.
+
+A :class:`PolynomialBasis` lists monomials in one or more couplings
+(kappa_lambda alone, or kappa_lambda, kappa_t, c2, ...). :func:`fit_polynomial`
+fits one sigma table or a whole stack of tables that share the same nodes: the
+pseudo-inverse of the (weighted) design matrix is computed once, cached, and
+applied to every table as a single matrix product.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Sequence, Tuple
+
+import numpy as np
+
+# Pseudo-inversas de diseño guardadas (una por base, nodos y errores)
+_PINV_CACHE_SIZE = 128
+
+
+@dataclass(frozen=True)
+class PolynomialBasis:
+    """Monomials prod_v x_v^powers[t][v]; the fitted coefficients follow the order of `powers`."""
+    variables: Tuple[str, ...]
+    powers: Tuple[Tuple[int, ...], ...]
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "variables", tuple(self.variables))
+        object.__setattr__(self, "powers", tuple(tuple(int(e) for e in p) for p in self.powers))
+        if not self.powers:
+            raise ValueError("basis needs at least one monomial")
+        if any(len(p) != len(self.variables) for p in self.powers):
+            raise ValueError("every monomial needs one exponent per variable")
+        if any(e < 0 for p in self.powers for e in p):
+            raise ValueError("exponents must be >= 0")
+        if len(set(self.powers)) != len(self.powers):
+            raise ValueError("repeated monomial in basis")
+
+    @classmethod
+    def power(cls, degree: int, variable: str = "kappa_lambda") -> "PolynomialBasis":
+        """1-D polynomial of `degree`, highest power first (degree 2: a k^2 + b k + c)."""
+        if degree < 0:
+            raise ValueError("degree must be >= 0")
+        return cls((variable,), tuple((d,) for d in range(degree, -1, -1)))
+
+    @property
+    def n_terms(self) -> int:
+        return len(self.powers)
+
+    def _nodes(self, x: np.ndarray | Sequence[float]) -> np.ndarray:
+        # (n_puntos,) para una variable, (n_puntos, n_vars) en general
+        x = np.asarray(x, dtype=float)
+        if len(self.variables) == 1 and x.ndim <= 1:
+            x = x.reshape(-1, 1)
+        if x.ndim != 2 or x.shape[1] != len(self.variables):
+            raise ValueError(f"nodes must have shape (n_points, {len(self.variables)})")
+        return x
+
+    def design(self, x: np.ndarray | Sequence[float]) -> np.ndarray:
+        """Design matrix, shape (n_points, n_terms)."""
+        x = self._nodes(x)
+        p = np.array(self.powers, dtype=float)   # (n_terms, n_vars)
+        X: np.ndarray
+        if x.shape[1] == 1:
+            X = x ** p[:, 0]
+        else:
+            X = np.prod(x[:, None, :] ** p[None, :, :], axis=2)
+        return X
+
+    def evaluate(self, coeffs: np.ndarray, x: np.ndarray | Sequence[float]) -> np.ndarray:
+        """Polynomial values; coeffs (..., n_terms) -> (..., n_points)."""
+        y: np.ndarray = np.asarray(coeffs, dtype=float) @ self.design(x).T
+        return y
+
+
+QUADRATIC = PolynomialBasis.power(2)
+
+
+@dataclass(frozen=True)
+class PolynomialFit:
+    """Least-squares coefficients of one table (n_terms,) or a stack of tables (n_sets, n_terms).
+
+    Con incertidumbres por punto, cov es la covarianza de los coeficientes
+    (X^T W X)^-1 y chi2 el de cada tabla; sin ellas cov es None y chi2 la suma
+    de residuos al cuadrado.
+    """
+    basis: PolynomialBasis
+    coeffs: np.ndarray
+    chi2: np.ndarray | float
+    ndof: int
+    cov: np.ndarray | None = None
+
+    def sigma(self, x: np.ndarray | Sequence[float]) -> np.ndarray:
+        return self.basis.evaluate(self.coeffs, x)
+
+    def errors(self) -> np.ndarray:
+        """1-sigma coefficient uncertainties, sqrt(diag(cov))."""
+        if self.cov is None:
+            raise ValueError("fit has no coefficient covariance (no point uncertainties given)")
+        err: np.ndarray = np.sqrt(np.diagonal(self.cov, axis1=-2, axis2=-1))
+        return err
+
+
+@lru_cache(maxsize=_PINV_CACHE_SIZE)
+def _cached_solver(
+    basis: PolynomialBasis, nodes: Tuple[float, ...], n_vars: int, err: Tuple[float, ...] | None
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray | None]:
+    # (X, P, cov) de solo lectura: el diseño sin pesos sirve para los residuos
+    X = basis.design(np.array(nodes, dtype=float).reshape(-1, n_vars))
+    Xw = X if err is None else X / np.array(err)[:, None]
+    P = np.linalg.pinv(Xw)
+    # Sólo con pesos: cov = (Xw^T Xw)^-1 = P P^T
+    cov = P @ P.T if err is not None else None
+    for a in (X, P, cov):
+        if a is not None:
+            a.setflags(write=False)
+    return X, P, cov
+
+
+def _solver(
+    basis: PolynomialBasis, nodes: np.ndarray | Sequence[float], sigma_err: np.ndarray | None
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray | None]:
+    x = basis._nodes(nodes)
+    if x.shape[0] < basis.n_terms:
+        raise ValueError(f"Need at least {basis.n_terms} points to fit {basis.n_terms} coefficients.")
+    err = None
+    if sigma_err is not None:
+        e = np.asarray(sigma_err, dtype=float)
+        if e.shape != (x.shape[0],):
+            raise ValueError("sigma_err must have one entry per point")
+        if np.any(e <= 0.0):
+            raise ValueError("sigma_err must be > 0")
+        err = tuple(e.tolist())
+    return _cached_solver(basis, tuple(x.ravel().tolist()), x.shape[1], err)
+
+
+def design_pinv(
+    basis: PolynomialBasis, nodes: np.ndarray | Sequence[float], sigma_err: np.ndarray | Sequence[float] | None = None
+) -> Tuple[np.ndarray, np.ndarray | None]:
+    """(P, cov) for the (weighted) design matrix of `nodes`; cached, read-only.
+
+    P es la pseudo-inversa de X (o de W^1/2 X con W = diag(1/sigma_err^2)), así que
+    los coeficientes de una tabla y son P @ y (o P @ (y / sigma_err)).
+    """
+    _, P, cov = _solver(basis, nodes, None if sigma_err is None else np.asarray(sigma_err, dtype=float))
+    return P, cov
+
+
+def fit_polynomial(
+    nodes: np.ndarray | Sequence[float],
+    values: np.ndarray | Sequence[float],
+    basis: PolynomialBasis = QUADRATIC,
+    sigma_err: np.ndarray | Sequence[float] | None = None,
+) -> PolynomialFit:
+    """(Weighted) least-squares fit of `basis` to sigma tables sharing the same nodes.
+
+    values: (n_points,) o (n_sets, n_points). sigma_err: None, (n_points,) común a
+    todas las tablas (una sola pseudo-inversa en caché) o (n_sets, n_points), que
+    se resuelve como pila de pseudo-inversas.
+    """
+    y = np.asarray(values, dtype=float)
+    e = None if sigma_err is None else np.asarray(sigma_err, dtype=float)
+    if e is not None and e.ndim == 2:
+        X = basis.design(nodes)
+        if y.shape != e.shape or y.shape[-1] != X.shape[0]:
+            raise ValueError("per-set sigma_err must have the shape of values (n_sets, n_points)")
+        if X.shape[0] < basis.n_terms:
+            raise ValueError(f"Need at least {basis.n_terms} points to fit {basis.n_terms} coefficients.")
+        if np.any(e <= 0.0):
+            raise ValueError("sigma_err must be > 0")
+        P = np.linalg.pinv(X[None, :, :] / e[:, :, None])     # (n_sets, n_terms, n_points)
+        coeffs = np.einsum("stp,sp->st", P, y / e)
+        resid = (y - coeffs @ X.T) / e
+        return PolynomialFit(basis, coeffs, np.sum(resid * resid, axis=-1), X.shape[0] - basis.n_terms,
+                             P @ np.swapaxes(P, 1, 2))
+
+    X, P, cov = _solver(basis, nodes, e)
+    if y.ndim > 2 or y.shape[-1] != X.shape[0]:
+        raise ValueError("values must have shape (n_points,) or (n_sets, n_points)")
+    coeffs = (y if e is None else y / e) @ P.T
+    resid = y - coeffs @ X.T
+    if e is not None:
+        resid = resid / e
+    chi2 = np.sum(resid * resid, axis=-1)
+    if cov is not None and y.ndim == 2:
+        cov = np.broadcast_to(cov, (y.shape[0],) + cov.shape)
+    return PolynomialFit(basis, coeffs, chi2 if y.ndim == 2 else float(chi2), X.shape[0] - basis.n_terms, cov)
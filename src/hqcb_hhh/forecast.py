@@ -0,0 +1,197 @@
+# Copyright (c) 2026 Oscar Fuentes Fernández
+# SPDX-License-Identifier: AGPL-3.0-or-later
+from __future__ import annotations
+
+import csv
+import glob
+import itertools
+import math
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from .io import Config, load_config
+from .fitting import QUADRATIC, fit_polynomial
+
+# Por debajo de este número de escenarios no compensa arrancar un pool de procesos
+MIN_SCENARIOS_PER_WORKER = 256
+
+TABLE_COLUMNS = [
+    "name", "rel_uncert_rate", "lumi_abinv", "a", "b", "c", "sigma_sm",
+    "cl68_lo", "cl68_hi", "cl95_lo", "cl95_hi",
+]
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """A named kappa_lambda forecast configuration."""
+    name: str
+    config: Config
+
+
+def load_scenarios(patterns: Sequence[str]) -> List[Scenario]:
+    """Load scenario YAMLs from files, directories (*.yaml inside) or glob patterns."""
+    paths: List[Path] = []
+    for pat in patterns:
+        p = Path(pat)
+        if p.is_dir():
+            paths += sorted(p.glob("*.yaml"))
+        elif p.exists():
+            paths.append(p)
+        else:
+            paths += sorted(Path(m) for m in glob.glob(pat))
+    if not paths:
+        raise FileNotFoundError(f"No scenario configs matched: {list(patterns)}")
+    return [Scenario(name=p.stem, config=load_config(p)) for p in paths]
+
+
+def expand_sweep(spec_path: str | Path) -> List[Scenario]:
+    """Cartesian product of rel_uncert_rate x lumi_abinv x sigma_scale around a base config.
+
+    Luminosidad: rel_uncert_rate escala como sqrt(lumi_base / lumi).
+    sigma_scale: multiplica todos los puntos sigma del escenario base.
+    """
+    import yaml
+
+    spec_p = Path(spec_path)
+    spec: Dict[str, Any] = yaml.safe_load(spec_p.read_text(encoding="utf-8"))
+    base = load_config((spec_p.parent / spec["base"]).resolve())
+    sweep = spec.get("sweep", {})
+
+    unknown = set(sweep) - {"rel_uncert_rate", "lumi_abinv", "sigma_scale"}
+    if unknown:
+        raise ValueError(f"Unknown sweep keys: {sorted(unknown)}")
+
+    rels = [float(x) for x in sweep.get("rel_uncert_rate", [base.rel_uncert_rate])]
+    lumis = [float(x) for x in sweep.get("lumi_abinv", [base.lumi_abinv])]
+    scales = [float(x) for x in sweep.get("sigma_scale", [1.0])]
+
+    out: List[Scenario] = []
+    for rel, lumi, scale in itertools.product(rels, lumis, scales):
+        cfg = replace(
+            base,
+            rel_uncert_rate=rel * math.sqrt(base.lumi_abinv / lumi),
+            lumi_abinv=lumi,
+            sigma_points=[(k, s * scale) for k, s in base.sigma_points],
+        )
+        out.append(Scenario(name=f"rel{rel:g}_lumi{lumi:g}_scale{scale:g}", config=cfg))
+    return out
+
+
+def fit_coefficients(configs: Sequence[Config]) -> np.ndarray:
+    """Quadratic coefficients (a, b, c) for every scenario, shape (n_scenarios, 3).
+
+    Los escenarios con los mismos nodos de kappa_lambda se ajustan juntos: una sola
+    pseudo-inversa del diseño aplicada a la pila de tablas sigma.
+    """
+    groups: Dict[Tuple[float, ...], List[int]] = {}
+    for i, cfg in enumerate(configs):
+        if len(cfg.sigma_points) < 3:
+            raise ValueError("Need at least 3 points to fit a quadratic model.")
+        groups.setdefault(tuple(k for k, _ in cfg.sigma_points), []).append(i)
+
+    coeffs = np.empty((len(configs), 3), dtype=float)
+    for nodes, idx in groups.items():
+        ys = np.array([[s for _, s in configs[i].sigma_points] for i in idx], dtype=float)
+        coeffs[idx] = fit_polynomial(nodes, ys, QUADRATIC).coeffs
+    return coeffs
+
+
+def nll_curves(coeffs: np.ndarray, sigma_err: np.ndarray, grid: np.ndarray) -> np.ndarray:
+    """Asimov (SM truth) NLL of every scenario on a shared grid, shape (n_scenarios, n_grid)."""
+    a, b, c = (coeffs[:, i:i + 1] for i in range(3))
+    sigma_sm = a + b + c
+    s = a * grid**2 + b * grid + c
+    nll: np.ndarray = 0.5 * ((s - sigma_sm) / sigma_err[:, None]) ** 2
+    return nll
+
+
+def intervals_from_curves(grid: np.ndarray, nll: np.ndarray, delta: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Row-wise find_interval_1d: extreme grid points with NLL - min(NLL) <= delta (NaN if none)."""
+    mask = (nll - np.min(nll, axis=1, keepdims=True)) <= delta
+    lo = np.where(mask, grid[None, :], np.inf).min(axis=1)
+    hi = np.where(mask, grid[None, :], -np.inf).max(axis=1)
+    empty = ~np.any(mask, axis=1)
+    lo[empty] = np.nan
+    hi[empty] = np.nan
+    return lo, hi
+
+
+def _forecast_group(scenarios: Sequence[Scenario]) -> List[Dict[str, Any]]:
+    # Todos los escenarios del grupo comparten rango/resolución del escaneo y umbrales
+    cfg0 = scenarios[0].config
+    configs = [s.config for s in scenarios]
+    coeffs = fit_coefficients(configs)
+    sigma_sm = coeffs.sum(axis=1)
+    sigma_err = np.array([c.rel_uncert_rate for c in configs]) * sigma_sm
+    grid = np.linspace(cfg0.kappa_min, cfg0.kappa_max, cfg0.n_grid)
+    nll = nll_curves(coeffs, sigma_err, grid)
+    lo68, hi68 = intervals_from_curves(grid, nll, cfg0.cl68_delta_nll)
+    lo95, hi95 = intervals_from_curves(grid, nll, cfg0.cl95_delta_nll)
+
+    rows = []
+    for i, sc in enumerate(scenarios):
+        rows.append({
+            "name": sc.name,
+            "rel_uncert_rate": sc.config.rel_uncert_rate,
+            "lumi_abinv": sc.config.lumi_abinv,
+            "a": float(coeffs[i, 0]),
+            "b": float(coeffs[i, 1]),
+            "c": float(coeffs[i, 2]),
+            "sigma_sm": float(sigma_sm[i]),
+            "cl68_lo": float(lo68[i]),
+            "cl68_hi": float(hi68[i]),
+            "cl95_lo": float(lo95[i]),
+            "cl95_hi": float(hi95[i]),
+        })
+    return rows
+
+
+def batch_forecast(scenarios: Sequence[Scenario], workers: int = 1) -> List[Dict[str, Any]]:
+    """68%/95% kappa_lambda intervals for many scenarios, one array operation per scan group.
+
+    Los escenarios se agrupan por (kappa_min, kappa_max, n_grid, umbrales); con
+    workers > 1 y miles de escenarios los grupos se trocean en un pool de procesos.
+    El orden de la tabla es el de entrada.
+    """
+    if workers < 1:
+        raise ValueError("workers must be >= 1")
+
+    groups: Dict[Tuple[float, float, int, float, float], List[int]] = {}
+    for i, sc in enumerate(scenarios):
+        c = sc.config
+        groups.setdefault((c.kappa_min, c.kappa_max, c.n_grid, c.cl68_delta_nll, c.cl95_delta_nll), []).append(i)
+
+    chunks: List[List[int]] = []
+    for idx in groups.values():
+        n_chunks = max(1, min(workers, len(idx) // MIN_SCENARIOS_PER_WORKER))
+        chunks += [[int(i) for i in c] for c in np.array_split(np.array(idx), n_chunks)]
+
+    jobs = [[scenarios[i] for i in ch] for ch in chunks]
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_forecast_group, jobs))
+    else:
+        results = [_forecast_group(j) for j in jobs]
+
+    rows: List[Dict[str, Any]] = [{}] * len(scenarios)
+    for ch, res in zip(chunks, results):
+        for i, row in zip(ch, res):
+            rows[i] = row
+    return rows
+
+
+def write_table(
+    rows: Sequence[Dict[str, Any]], path: str | Path, columns: Sequence[str] = TABLE_COLUMNS
+) -> Path:
+    out = Path(path)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with out.open("w", encoding="utf-8", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=list(columns))
+        w.writeheader()
+        for row in rows:
+            w.writerow({k: (f"{v:.10g}" if isinstance(v, float) else v) for k, v in row.items()})
+    return out
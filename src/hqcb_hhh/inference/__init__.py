@@ -1,2 +1,58 @@
-from .models import HQCBInferenceConfig, grid_posterior
-from .likelihoods import BAOMockDataset, load_bao_mock_csv, bao_loglike_hqcb
+from __future__ import annotations
+
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .likelihoods import (
+        BAOMockDataset,
+        GaussianCovFactor,
+        bao_loglike_hqcb,
+        bao_loglike_hqcb_grid,
+        load_bao_mock_csv,
+    )
+    from .emulator import HQCBEmulator
+    from .models import HQCBInferenceConfig, grid_posterior
+    from .profile import profile_likelihood
+    from .sampling import sample_posterior
+
+# Carga perezosa (PEP 562): `import hqcb_hhh.inference` no arrastra numpy/scipy
+# hasta que se pide uno de estos nombres.
+_EXPORTS = {
+    "HQCBInferenceConfig": ".models",
+    "grid_posterior": ".models",
+    "BAOMockDataset": ".likelihoods",
+    "GaussianCovFactor": ".likelihoods",
+    "load_bao_mock_csv": ".likelihoods",
+    "bao_loglike_hqcb": ".likelihoods",
+    "bao_loglike_hqcb_grid": ".likelihoods",
+    "sample_posterior": ".sampling",
+    "profile_likelihood": ".profile",
+    "HQCBEmulator": ".emulator",
+}
+
+# Lista literal (no derivada de _EXPORTS) para que mypy/ruff vean los nombres reexportados
+__all__ = [
+    "HQCBInferenceConfig",
+    "grid_posterior",
+    "BAOMockDataset",
+    "GaussianCovFactor",
+    "load_bao_mock_csv",
+    "bao_loglike_hqcb",
+    "bao_loglike_hqcb_grid",
+    "sample_posterior",
+    "profile_likelihood",
+    "HQCBEmulator",
+]
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+from typing import Dict, Tuple
+
+import numpy as np
+
+from .models import HQCBInferenceConfig, grid_axes, loglike_points, summarize_grid
+
+
+def _initial_edges(n: int, n_cells: int) -> np.ndarray:
+    return np.unique(np.round(np.linspace(0, n, min(n_cells, n) + 1)).astype(int))
+
+
+def _spread(i0: np.ndarray, i1: np.ndarray, w: np.ndarray, n: int) -> np.ndarray:
+    # Reparte w[k] uniformemente en las filas [i0[k], i1[k]) con un array de diferencias
+    diff = np.zeros(n + 1, dtype=float)
+    per = w / (i1 - i0)
+    np.add.at(diff, i0, per)
+    np.add.at(diff, i1, -per)
+    return np.cumsum(diff[:-1])
+
+
+def _straddle_profile(i0: np.ndarray, i1: np.ndarray, w: np.ndarray, n: int) -> np.ndarray:
+    # S[x] = masa de las celdas no resueltas que contienen el nodo x en su interior
+    # (filas [i0, i1-1)): cota del error de la CDF marginal en el nodo x
+    keep = (i1 - i0) > 1
+    diff = np.zeros(n + 1, dtype=float)
+    np.add.at(diff, i0[keep], w[keep])
+    np.add.at(diff, i1[keep] - 1, -w[keep])
+    return np.cumsum(diff[:-1])
+
+
+def adaptive_grid_posterior(
+    cfg: HQCBInferenceConfig,
+    *,
+    eps: float = 1e-6,
+    cell_tol: float = 1e-3,
+    cdf_tol: float = 1e-3,
+    coarse: Tuple[int, int] = (32, 32),
+    as_arrays: bool = False,
+) -> Dict[str, object]:
+    """Coarse-to-fine posterior on the (grid_gamma x grid_H0) grid of cfg.
+
+    Las celdas son bloques de nodos del grid fino. Cada hoja se estima con su
+    punto medio y sus 4 esquinas (regla tipo Simpson, con estimación de error).
+    Sólo se refinan hojas dentro del conjunto que acumula (1 - eps) de la masa:
+      - en 2x2 si su error de cuadratura supera cell_tol de la masa total;
+      - sólo en gamma si contienen un nodo donde la cota de error de la CDF
+        marginal de gamma supera cdf_tol (para los intervalos de credibilidad).
+    Las hojas 1x1 son exactamente los nodos del grid denso, así que el resultado
+    converge al de grid_posterior. La rejilla gruesa (coarse) debe resolver el pico.
+
+    Devuelve la misma estructura que grid_posterior más un bloque "adaptive"
+    con el número de evaluaciones y las cotas de error (masa de cola no
+    refinada, error de cuadratura y error máximo de las CDF marginales).
+    """
+    if not 0.0 < eps < 1.0:
+        raise ValueError("eps must be in (0, 1)")
+    if cell_tol <= 0.0 or cdf_tol <= 0.0:
+        raise ValueError("cell_tol and cdf_tol must be > 0")
+
+    gammas, H0s = grid_axes(cfg)
+    n_g, n_h = gammas.shape[0], H0s.shape[0]
+    dg = (cfg.gamma_max - cfg.gamma_min) / max(n_g - 1, 1)
+    dh = (cfg.H0_max - cfg.H0_min) / max(n_h - 1, 1)
+
+    # Cache de log-likelihood por índices duplicados (admite medios nodos)
+    cache: Dict[Tuple[int, int], float] = {}
+
+    def evaluate(ki: np.ndarray, kj: np.ndarray) -> np.ndarray:
+        keys = list(zip(ki.tolist(), kj.tolist()))
+        missing = sorted({k for k in keys if k not in cache})
+        if missing:
+            mi = np.array([k[0] for k in missing], dtype=float)
+            mj = np.array([k[1] for k in missing], dtype=float)
+            lp = loglike_points(cfg, cfg.gamma_min + 0.5 * mi * dg, cfg.H0_min + 0.5 * mj * dh)
+            cache.update(zip(missing, lp.tolist()))
+        return np.array([cache[k] for k in keys], dtype=float)
+
+    def leaf_logmass(i0: np.ndarray, i1: np.ndarray, j0: np.ndarray, j1: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        log_count = np.log((i1 - i0) * (j1 - j0))
+        mid = evaluate(i0 + i1 - 1, j0 + j1 - 1)
+        corners = np.stack([
+            evaluate(2 * i0, 2 * j0),
+            evaluate(2 * i0, 2 * (j1 - 1)),
+            evaluate(2 * (i1 - 1), 2 * j0),
+            evaluate(2 * (i1 - 1), 2 * (j1 - 1)),
+        ])
+        cmax = np.max(corners, axis=0)
+        trap = cmax + np.log(np.mean(np.exp(corners - cmax), axis=0))
+        return log_count + mid, log_count + trap
+
+    eg, eh = _initial_edges(n_g, coarse[0]), _initial_edges(n_h, coarse[1])
+    I0, J0 = np.meshgrid(eg[:-1], eh[:-1], indexing="ij")
+    I1, J1 = np.meshgrid(eg[1:], eh[1:], indexing="ij")
+    I0, I1, J0, J1 = (a.ravel() for a in (I0, I1, J0, J1))
+    log_mid, log_trap = leaf_logmass(I0, I1, J0, J1)
+
+    levels = 0
+    while True:
+        M = float(max(np.max(log_mid), np.max(log_trap)))
+        mid, trap = np.exp(log_mid - M), np.exp(log_trap - M)
+        est = (2.0 * mid + trap) / 3.0
+        err = np.abs(mid - trap) / 3.0
+        total = float(np.sum(est))
+        if not np.isfinite(total) or total <= 0:
+            raise RuntimeError("Posterior normalization failed")
+
+        # Conjunto (1 - eps) de mayor masa
+        order = np.argsort(-est)
+        in_core = np.zeros(est.shape[0], dtype=bool)
+        n_core = int(np.searchsorted(np.cumsum(est[order]), (1.0 - eps) * total)) + 1
+        in_core[order[:n_core]] = True
+
+        splittable = ((I1 - I0) > 1) | ((J1 - J0) > 1)
+        split_both = splittable & in_core & (err > cell_tol * total)
+
+        # Hojas anchas en gamma que cruzan nodos con cota de CDF > cdf_tol
+        bad = _straddle_profile(I0, I1, est / total, n_g) > cdf_tol
+        n_bad = np.concatenate([[0], np.cumsum(bad)])
+        split_gamma = ((I1 - I0) > 1) & in_core & ~split_both & (n_bad[I1 - 1] - n_bad[I0] > 0)
+
+        refine = split_both | split_gamma
+        if not np.any(refine):
+            break
+        levels += 1
+
+        # Divide cada hoja marcada en (hasta) 2x2 hijas por el índice medio (o 2x1 sólo en gamma)
+        ri0, ri1, rj0, rj1 = I0[refine], I1[refine], J0[refine], J1[refine]
+        im = np.where(ri1 - ri0 > 1, (ri0 + ri1) // 2, ri1)
+        jm = np.where((rj1 - rj0 > 1) & split_both[refine], (rj0 + rj1) // 2, rj1)
+        ci0 = np.concatenate([ri0, ri0, im, im])
+        ci1 = np.concatenate([im, im, ri1, ri1])
+        cj0 = np.concatenate([rj0, jm, rj0, jm])
+        cj1 = np.concatenate([jm, rj1, jm, rj1])
+        ok = (ci1 > ci0) & (cj1 > cj0)
+        ci0, ci1, cj0, cj1 = ci0[ok], ci1[ok], cj0[ok], cj1[ok]
+        c_mid, c_trap = leaf_logmass(ci0, ci1, cj0, cj1)
+
+        keep = ~refine
+        I0, I1 = np.concatenate([I0[keep], ci0]), np.concatenate([I1[keep], ci1])
+        J0, J1 = np.concatenate([J0[keep], cj0]), np.concatenate([J1[keep], cj1])
+        log_mid = np.concatenate([log_mid[keep], c_mid])
+        log_trap = np.concatenate([log_trap[keep], c_trap])
+
+    w = est / total
+    p_gamma = _spread(I0, I1, w, n_g)
+    p_H0 = _spread(J0, J1, w, n_h)
+
+    keys = list(cache.keys())
+    vals = np.array([cache[k] for k in keys])
+    best = int(np.argmax(vals))
+    logL_max = float(vals[best])
+    map_point = (cfg.gamma_min + 0.5 * keys[best][0] * dg, cfg.H0_min + 0.5 * keys[best][1] * dh)
+
+    res = summarize_grid(cfg, gammas, H0s, p_gamma, p_H0, map_point, logL_max, as_arrays=as_arrays)
+    quad_err = float(np.sum(err) / total)
+    unresolved = splittable & ~in_core
+    res["adaptive"] = {
+        "eps": eps,
+        "cell_tol": cell_tol,
+        "levels": levels,
+        "n_leaves": int(I0.shape[0]),
+        "n_evaluations": len(cache),
+        "n_dense_cells": n_g * n_h,
+        "error_bound": {
+            "tail_mass": float(np.sum(w[unresolved])),
+            "quadrature": quad_err,
+            "cdf_gamma": float(np.max(_straddle_profile(I0, I1, w, n_g))) + quad_err,
+            "cdf_H0_local": float(np.max(_straddle_profile(J0, J1, w, n_h))) + quad_err,
+        },
+    }
+    return res
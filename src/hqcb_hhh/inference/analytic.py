@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import math
+from typing import Dict, Tuple
+
+import numpy as np
+
+from .models import HQCBInferenceConfig, grid_axes, loglike_grid, loglike_points, predict_H0_early, summarize_grid
+
+# Filas de gamma con peso relativo por debajo de esto no contribuyen a p_H0_local
+_ROW_CUTOFF = 1e-16
+
+# sigma_H0(gamma) / paso mínimo para que method="auto" elija la vía analítica;
+# con mallas más gruesas en H0 el grid denso ya es barato
+MIN_SIGMA_OVER_STEP = 1.0
+
+# Euler-Maclaurin con _EM_ORDERS términos sólo donde el resto es despreciable (~ (x / 2 pi)^16):
+# sigma / paso >= _EM_MIN_RATIO y en cada extremo x = h * |f'/f| <= _EM_MAX_SLOPE o f despreciable
+_EM_ORDERS = 8
+_EM_MIN_RATIO = 4.0
+_EM_MAX_SLOPE = 1.0
+# B_2k / (2k)!, k = 1.._EM_ORDERS
+_EM_COEFS = tuple(b / math.factorial(2 * k) for k, b in enumerate(
+    (1 / 6, -1 / 30, 1 / 42, -1 / 30, 5 / 66, -691 / 2730, 7 / 6, -3617 / 510), start=1))
+# Nodos con log f por debajo del máximo en la malla en más de esto no cuentan (e^-40 ~ 4e-18)
+_LOG_NEGLIGIBLE = 40.0
+# Tamaño de los bloques (filas x nodos) de las sumas directas
+_DIRECT_CHUNK = 1 << 22
+
+
+def h0_conditional(cfg: HQCBInferenceConfig, gammas: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Per-gamma Gaussian in H0_local: (precision P, mean mu, log-normalization C).
+
+    Con r = rd_ratio(gamma), H0_early_pred = r * H0_local y
+      log L(gamma, H) = C(gamma) - P(gamma) * (H - mu(gamma))^2 / 2
+    con P = 1/s1^2 + r^2/s2^2 y C en la forma sin cancelaciones (He - r Hl)^2 / (s2^2 + r^2 s1^2).
+    """
+    r = np.asarray(predict_H0_early(1.0, cfg.z_rec, gammas, cfg.gamma_ref, cfg.kappa_b,
+                                    cfg.beta_rd_sensitivity), dtype=float)
+    s1, s2 = cfg.H0_local_sigma, cfg.H0_early_sigma
+    if s1 <= 0 or s2 <= 0:
+        raise ValueError("sigma must be > 0")
+    P = 1.0 / s1**2 + r**2 / s2**2
+    mu = (cfg.H0_local_obs / s1**2 + r * cfg.H0_early_obs / s2**2) / P
+    C = (-0.5 * (cfg.H0_early_obs - r * cfg.H0_local_obs) ** 2 / (s2**2 + r**2 * s1**2)
+         - math.log(2.0 * math.pi * s1 * s2))
+    return P, mu, C
+
+
+def analytic_applicable(cfg: HQCBInferenceConfig) -> bool:
+    """True when the H0 grid resolves sigma_H0(gamma), so the analytic path pays off."""
+    if cfg.grid_H0 < 2 or not cfg.H0_max > cfg.H0_min:
+        return False
+    gammas, H0s = grid_axes(cfg)
+    P, _, _ = h0_conditional(cfg, gammas)
+    step = float(H0s[1] - H0s[0])
+    return bool(np.min(1.0 / np.sqrt(P)) / step >= MIN_SIGMA_OVER_STEP)
+
+
+def _log_em_sums(P: np.ndarray, mu: np.ndarray, lo: float, hi: float, step: float) -> np.ndarray:
+    """log of the Euler-Maclaurin estimate of sum_j exp(-P (H_j - mu)^2 / 2) on [lo, hi].
+
+    sum ~ (1/h) integral + (f(lo) + f(hi))/2 + sum_k B_2k/(2k)! h^(2k-1) [f^(2k-1)]_lo^hi,
+    con h^n f^(n)(H) = (-h sqrt(P))^n He_n(sqrt(P) (H - mu)) f(H) (Hermite probabilistas);
+    la integral truncada es sqrt(2 pi / P) * (Phi(b) - Phi(a)).
+    """
+    from scipy.special import log_ndtr
+
+    sq = np.sqrt(P)
+    a, b = (lo - mu) * sq, (hi - mu) * sq
+    # log(Phi(b) - Phi(a)) estable en ambas colas (simetría Phi(x) = 1 - Phi(-x))
+    upper = a > 0
+    la = np.where(upper, log_ndtr(-b), log_ndtr(a))
+    lb = np.where(upper, log_ndtr(-a), log_ndtr(b))
+    with np.errstate(divide="ignore"):
+        log_mass = lb + np.log1p(-np.exp(la - lb))
+    log_int = 0.5 * np.log(2.0 * np.pi / P) - math.log(step) + log_mass
+
+    ea, eb = -0.5 * a * a, -0.5 * b * b
+    m = np.maximum(log_int, np.maximum(ea, eb))
+    fa, fb = np.exp(ea - m), np.exp(eb - m)
+    corr = 0.5 * (fa + fb)
+    hs = -step * sq
+    # He_{n+1}(t) = t He_n(t) - n He_{n-1}(t); se avanza de dos en dos por los órdenes impares
+    he_a = [np.ones_like(a), a]
+    he_b = [np.ones_like(b), b]
+    for k, coef in enumerate(_EM_COEFS, start=1):
+        n = 2 * k - 1
+        while len(he_a) <= n:
+            j = len(he_a) - 1
+            he_a.append(a * he_a[j] - j * he_a[j - 1])
+            he_b.append(b * he_b[j] - j * he_b[j - 1])
+        corr = corr + coef * hs**n * (he_b[n] * fb - he_a[n] * fa)
+    with np.errstate(divide="ignore"):
+        out: np.ndarray = m + np.log(np.maximum(np.exp(log_int - m) + corr, 0.0))
+    return out
+
+
+def _log_row_sums(P: np.ndarray, mu: np.ndarray, H0s: np.ndarray) -> np.ndarray:
+    """log sum_j exp(-P (H_j - mu)^2 / 2) over the H0 nodes.
+
+    Las filas en las que la serie de Euler-Maclaurin no es fiable (pocos nodos
+    por sigma, o mu fuera de la malla con pendiente fuerte en el borde) se suman
+    directamente, pero sólo sobre la ventana de nodos no despreciables en torno
+    al punto de la malla más cercano a mu.
+    """
+    lo, hi = float(H0s[0]), float(H0s[-1])
+    step = float(H0s[1] - H0s[0])
+    n = H0s.shape[0]
+    # Exceso de log f en cada extremo respecto al máximo de f en [lo, hi]
+    gap2 = (np.clip(mu, lo, hi) - mu) ** 2
+    excess_lo = 0.5 * P * ((lo - mu) ** 2 - gap2)
+    excess_hi = 0.5 * P * ((hi - mu) ** 2 - gap2)
+    slope_ok_lo = (step * P * np.abs(lo - mu) <= _EM_MAX_SLOPE) | (excess_lo > _LOG_NEGLIGIBLE)
+    slope_ok_hi = (step * P * np.abs(hi - mu) <= _EM_MAX_SLOPE) | (excess_hi > _LOG_NEGLIGIBLE)
+    em = (1.0 / (np.sqrt(P) * step) >= _EM_MIN_RATIO) & slope_ok_lo & slope_ok_hi
+
+    out = np.empty(P.shape[0])
+    out[em] = _log_em_sums(P[em], mu[em], lo, hi, step)
+
+    direct = np.nonzero(~em)[0]
+    if direct.size:
+        # Ventana: nodos con P (H - mu)^2 / 2 <= gap + _LOG_NEGLIGIBLE
+        half = np.sqrt(2.0 * _LOG_NEGLIGIBLE / P[direct] + gap2[direct])
+        j_lo = np.clip(np.ceil((mu[direct] - half - lo) / step).astype(int), 0, n - 1)
+        j_hi = np.clip(np.floor((mu[direct] + half - lo) / step).astype(int), 0, n - 1)
+        # Asegura al menos el nodo más cercano a mu
+        j_near = np.clip(np.rint((np.clip(mu[direct], lo, hi) - lo) / step).astype(int), 0, n - 1)
+        j_lo, j_hi = np.minimum(j_lo, j_near), np.maximum(j_hi, j_near)
+        width = int(np.max(j_hi - j_lo)) + 1
+        offs = np.arange(width)
+        rows = max(1, _DIRECT_CHUNK // width)
+        for c0 in range(0, direct.size, rows):
+            sl = slice(c0, c0 + rows)
+            idx = j_lo[sl, None] + offs[None, :]
+            valid = idx <= j_hi[sl, None]
+            d = direct[sl]
+            e = -0.5 * P[d, None] * (H0s[np.minimum(idx, n - 1)] - mu[d, None]) ** 2
+            e = np.where(valid, e, -np.inf)
+            m = np.max(e, axis=1)
+            out[d] = m + np.log(np.sum(np.exp(e - m[:, None]), axis=1))
+    return out
+
+
+def analytic_grid_posterior(cfg: HQCBInferenceConfig, *, as_arrays: bool = False) -> Dict[str, object]:
+    """grid_posterior with the H0_local direction summed in closed form.
+
+    p_gamma cuesta O(n_gamma): cada fila es una gaussiana truncada en H0 cuya suma
+    sobre nodos se obtiene con erf y correcciones de Euler-Maclaurin, o sumando sólo
+    la ventana de nodos relevantes cuando la serie no basta. p_H0_local sólo evalúa las filas de gamma con
+    peso no despreciable, y el MAP usa el nodo de H0 más cercano a mu(gamma), así
+    que el resultado coincide con el del grid denso.
+    """
+    gammas, H0s = grid_axes(cfg)
+    if H0s.shape[0] < 2:
+        raise ValueError("analytic marginalization needs grid_H0 >= 2")
+    lo, hi = float(H0s[0]), float(H0s[-1])
+    step = float(H0s[1] - H0s[0])
+    P, mu, C = h0_conditional(cfg, gammas)
+
+    log_rows = C + _log_row_sums(P, mu, H0s)
+    m = float(np.max(log_rows))
+    if not np.isfinite(m):
+        raise RuntimeError("Posterior normalization failed")
+    w = np.exp(log_rows - m)
+    Z = float(np.sum(w))
+    p_gamma = w / Z
+    log_Z = m + math.log(Z)
+
+    # p_H0_local: filas con peso relevante, evaluadas exactamente
+    sig = np.nonzero(p_gamma > _ROW_CUTOFF * float(np.max(p_gamma)))[0]
+    p_H0 = np.exp(loglike_grid(cfg, gammas[sig], H0s) - log_Z).sum(axis=0)
+    p_H0 /= np.sum(p_H0)
+
+    # MAP: por fila, el nodo de H0 más cercano a mu (y sus vecinos, por redondeo)
+    j0 = np.clip(np.rint((np.clip(mu, lo, hi) - lo) / step).astype(int), 0, H0s.shape[0] - 1)
+    cand = np.clip(j0[:, None] + np.array([-1, 0, 1])[None, :], 0, H0s.shape[0] - 1)
+    ll = loglike_points(cfg, np.repeat(gammas, 3), H0s[cand.reshape(-1)]).reshape(-1, 3)
+    k = int(np.argmax(ll))
+    i, j = divmod(k, 3)
+    map_point = (float(gammas[i]), float(H0s[cand[i, j]]))
+    logL_max = float(ll[i, j])
+
+    # Momentos continuos de H0 (mezcla de gaussianas truncadas, filas relevantes)
+    from scipy.special import ndtr
+
+    sd = 1.0 / np.sqrt(P[sig])
+    a, b = (lo - mu[sig]) / sd, (hi - mu[sig]) / sd
+    mass = ndtr(b) - ndtr(a)
+    phi_a = np.exp(-0.5 * a * a) / math.sqrt(2.0 * math.pi)
+    phi_b = np.exp(-0.5 * b * b) / math.sqrt(2.0 * math.pi)
+    t_mean = mu[sig] + sd * (phi_a - phi_b) / mass
+    t_var = sd**2 * (1.0 + (a * phi_a - b * phi_b) / mass - ((phi_a - phi_b) / mass) ** 2)
+    w_sig = p_gamma[sig] / np.sum(p_gamma[sig])
+    H0_mean = float(np.sum(w_sig * t_mean))
+    H0_var = float(np.sum(w_sig * (t_var + (t_mean - H0_mean) ** 2)))
+
+    res = summarize_grid(cfg, gammas, H0s, p_gamma, p_H0, map_point, logL_max, as_arrays=as_arrays)
+    res["analytic"] = {
+        "H0_local_mean": H0_mean,
+        "H0_local_std": math.sqrt(max(H0_var, 0.0)),
+        "min_sigma_over_step": float(np.min(1.0 / np.sqrt(P)) / step),
+        "rows_evaluated": int(sig.shape[0]),
+    }
+    return res
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+from dataclasses import asdict
+import json
+import os
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+from .models import (
+    DEFAULT_BLOCK_MEMORY_MB,
+    HQCBInferenceConfig,
+    block_rows_for_budget,
+    dense_posterior,
+    grid_axes,
+    loglike_grid,
+)
+
+# Campos que fijan la malla; el resto define el modelo y debe coincidir para reutilizar tiles
+_GRID_FIELDS = ("gamma_min", "gamma_max", "H0_min", "H0_max", "grid_gamma", "grid_H0")
+_MANIFEST = "manifest.json"
+
+
+def _model_fields(cfg: HQCBInferenceConfig) -> Dict[str, object]:
+    return {k: v for k, v in asdict(cfg).items() if k not in _GRID_FIELDS}
+
+
+def _match(axis: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """Index in the sorted `axis` of each entry of `values` (-1 if it is not a node)."""
+    # Tolerancia relativa al paso: linspace de mallas extendidas no reproduce los nodos bit a bit
+    n = axis.shape[0]
+    if n == 1:
+        nearest = np.zeros(values.shape, dtype=int)
+        tol = 1e-12 * max(1.0, abs(float(axis[0])))
+    else:
+        k = np.clip(np.searchsorted(axis, values), 1, n - 1)
+        nearest = np.where(values - axis[k - 1] <= axis[k] - values, k - 1, k)
+        tol = 1e-9 * float(np.min(np.diff(axis)))
+    return np.where(np.abs(axis[nearest] - values) <= tol, nearest, -1)
+
+
+def _open_dir(directory: Path, cfg: HQCBInferenceConfig) -> List[Path]:
+    directory.mkdir(parents=True, exist_ok=True)
+    manifest = directory / _MANIFEST
+    model = _model_fields(cfg)
+    if manifest.exists():
+        stored = json.loads(manifest.read_text(encoding="utf-8"))
+        if stored["model"] != model:
+            raise ValueError(f"{directory} holds a scan of a different model configuration")
+    else:
+        manifest.write_text(json.dumps({"model": model}, indent=2), encoding="utf-8")
+    # Restos de una escritura interrumpida: se descartan
+    for tmp in directory.glob("tile_*.tmp.npz"):
+        tmp.unlink()
+    return sorted(directory.glob("tile_*.npz"))
+
+
+def _save_tile(directory: Path, n: int, gammas: np.ndarray, H0s: np.ndarray, logL: np.ndarray) -> Path:
+    # Escritura atómica: un tile a medias nunca aparece con su nombre final
+    path = directory / f"tile_{n:06d}.npz"
+    tmp = directory / f"tile_{n:06d}.tmp.npz"
+    np.savez(tmp, gamma=gammas, H0_local=H0s, logL=logL)
+    os.replace(tmp, path)
+    return path
+
+
+def checkpointed_grid_posterior(
+    cfg: HQCBInferenceConfig,
+    directory: str | Path,
+    *,
+    block_rows: int | None = None,
+    as_arrays: bool = False,
+    keep_logpost: bool = False,
+) -> Dict[str, object]:
+    """grid_posterior whose log-likelihood rows are persisted as tiles in `directory`.
+
+    Cada bloque de filas de gamma evaluado se guarda (npz atómico) antes de pasar
+    al siguiente; al relanzar, las celdas ya presentes en algún tile se leen en
+    lugar de recalcularse. Esto cubre tanto reanudar un scan interrumpido como
+    extender uno terminado (más rango en gamma/H0 o más nodos, siempre que los
+    nodos viejos caigan en la malla nueva): sólo se evalúan las celdas nuevas.
+    La normalización y las marginales se recalculan desde los tiles.
+    """
+    d = Path(directory)
+    tiles = _open_dir(d, cfg)
+    gammas, H0s = grid_axes(cfg)
+    n_g, n_h = gammas.shape[0], H0s.shape[0]
+
+    logL = np.empty((n_g, n_h), dtype=float)
+    have = np.zeros((n_g, n_h), dtype=bool)
+    for path in tiles:
+        with np.load(path) as t:
+            ii = _match(gammas, t["gamma"])
+            jj = _match(H0s, t["H0_local"])
+            ri, rj = np.nonzero(ii >= 0)[0], np.nonzero(jj >= 0)[0]
+            if ri.size and rj.size:
+                sub = np.ix_(ii[ri], jj[rj])
+                logL[sub] = t["logL"][np.ix_(ri, rj)]
+                have[sub] = True
+    n_reused = int(np.count_nonzero(have))
+
+    rows = block_rows if block_rows is not None else block_rows_for_budget(n_h, DEFAULT_BLOCK_MEMORY_MB)
+    if rows < 1:
+        raise ValueError("block_rows must be >= 1")
+    n_next = int(tiles[-1].stem.split("_")[1]) + 1 if tiles else 0
+    new_tiles = 0
+    n_evaluated = 0
+    for i0 in range(0, n_g, rows):
+        missing = ~have[i0:i0 + rows]
+        # Filas con el mismo patrón de huecos forman un rectángulo exacto (en extensiones:
+        # filas nuevas completas y filas viejas con columnas nuevas)
+        patterns, inverse = np.unique(missing, axis=0, return_inverse=True)
+        for k, pattern in enumerate(patterns):
+            cj = np.nonzero(pattern)[0]
+            if cj.size == 0:
+                continue
+            ri = i0 + np.nonzero(inverse.reshape(-1) == k)[0]
+            block = loglike_grid(cfg, gammas[ri], H0s[cj])
+            _save_tile(d, n_next, gammas[ri], H0s[cj], block)
+            n_next += 1
+            new_tiles += 1
+            n_evaluated += block.size
+            logL[np.ix_(ri, cj)] = block
+            have[np.ix_(ri, cj)] = True
+
+    res = dense_posterior(cfg, gammas, H0s, logL, as_arrays=as_arrays, keep_logpost=keep_logpost)
+    res["checkpoint"] = {
+        "dir": str(d),
+        "tiles": len(tiles) + new_tiles,
+        "new_tiles": new_tiles,
+        "cells_reused": n_reused,
+        "cells_evaluated": n_evaluated,
+    }
+    return res
+
@@ -0,0 +1,249 @@
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass, field
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+import numpy as np
+
+from .. import profiling
+from ..cache import cache_key
+from .likelihoods import BAOMockDataset, alpha_from_gamma, hqcb_predict_dv_over_rd_ratio
+from .models import HQCBInferenceConfig, loglike_gaussian, predict_H0_early
+
+DEFAULT_EMULATOR_DIR = ".hqcb_cache/emulator"
+EMULATOR_KINDS = ("cubic", "linear")
+
+# Nodos por defecto: con splines cúbicos el error relativo queda ~1e-9 en la caja de los YAML
+DEFAULT_EMULATOR_NODES = 257
+
+# Tolerancia relativa al ancho de la caja para aceptar gamma en los bordes
+_BOX_TOL = 1e-12
+
+
+@dataclass(frozen=True)
+class EmulatorSpec:
+    """Everything the tabulated predictions depend on; its fingerprint names the table on disk.
+
+    Sólo gamma es un eje de la tabla: kappa_b, beta y p son fijos (tabla 1-D).
+    """
+    z_rec: float
+    gamma_ref: float
+    kappa_b: float
+    beta_rd_sensitivity: float
+    gamma_min: float
+    gamma_max: float
+    n_gamma: int = DEFAULT_EMULATOR_NODES
+    bao_z: Tuple[float, ...] = ()
+    bao_p_sensitivity: float = 0.0
+    kind: str = "cubic"
+
+    def __post_init__(self) -> None:
+        if self.kind not in EMULATOR_KINDS:
+            raise ValueError(f"kind must be one of {EMULATOR_KINDS}")
+        if self.n_gamma < 4:
+            raise ValueError("n_gamma must be >= 4")
+        if not self.gamma_max > self.gamma_min:
+            raise ValueError("gamma_max must be > gamma_min")
+        object.__setattr__(self, "bao_z", tuple(float(z) for z in self.bao_z))
+
+    @classmethod
+    def from_config(
+        cls,
+        cfg: HQCBInferenceConfig,
+        *,
+        bao: BAOMockDataset | None = None,
+        bao_p_sensitivity: float | None = None,
+        n_gamma: int = DEFAULT_EMULATOR_NODES,
+        kind: str = "cubic",
+    ) -> "EmulatorSpec":
+        if bao is not None and bao_p_sensitivity is None:
+            raise ValueError("bao_p_sensitivity is required with a BAO dataset")
+        return cls(
+            z_rec=cfg.z_rec, gamma_ref=cfg.gamma_ref, kappa_b=cfg.kappa_b,
+            beta_rd_sensitivity=cfg.beta_rd_sensitivity, gamma_min=cfg.gamma_min, gamma_max=cfg.gamma_max,
+            n_gamma=n_gamma, bao_z=() if bao is None else tuple(bao.z),
+            bao_p_sensitivity=float(bao_p_sensitivity or 0.0), kind=kind,
+        )
+
+    def fingerprint(self) -> str:
+        # Incluye versión y huella de las fuentes: cambiar el modelo cosmológico invalida las tablas
+        return cache_key("emulator", asdict(self))
+
+    def nodes(self) -> np.ndarray:
+        return np.linspace(self.gamma_min, self.gamma_max, self.n_gamma)
+
+
+def direct_h0_ratio(spec: EmulatorSpec, gamma: np.ndarray) -> np.ndarray:
+    """H0_early / H0_local from the model itself (the expensive path the table replaces)."""
+    return np.asarray(predict_H0_early(1.0, spec.z_rec, np.asarray(gamma, dtype=float), spec.gamma_ref,
+                                       spec.kappa_b, spec.beta_rd_sensitivity), dtype=float)
+
+
+def direct_bao_ratio(spec: EmulatorSpec, gamma: np.ndarray) -> np.ndarray:
+    """DV/rd ratio to the fiducial at every BAO redshift, shape gamma.shape + (n_z,)."""
+    g = np.asarray(gamma, dtype=float)
+    a = alpha_from_gamma(g, spec.gamma_ref, spec.kappa_b)
+    z = np.asarray(spec.bao_z, dtype=float)
+    return hqcb_predict_dv_over_rd_ratio(z, np.asarray(a)[..., None], spec.bao_p_sensitivity)
+
+
+def _linear(nodes: np.ndarray, values: np.ndarray, x: np.ndarray) -> np.ndarray:
+    # Interpolación lineal de todas las columnas a la vez (np.interp es sólo 1-D)
+    i = np.clip(np.searchsorted(nodes, x, side="right") - 1, 0, nodes.shape[0] - 2)
+    w = (x - nodes[i]) / (nodes[i + 1] - nodes[i])
+    w = w.reshape(w.shape + (1,) * (values.ndim - 1))
+    out: np.ndarray = (1.0 - w) * values[i] + w * values[i + 1]
+    return out
+
+
+@dataclass(frozen=True)
+class HQCBEmulator:
+    """Tabulated HQCB predictions on the gamma box, served by vectorized interpolation.
+
+    A 1-D table: kappa_b, beta_rd_sensitivity and bao_p_sensitivity are fixed by the
+    spec. It serves grid_posterior(emulator=...) and infer-toy/infer-data --emulator,
+    but not the free or swept kappa_b/beta paths (sample, profile, sweep), which keep
+    evaluating the model directly.
+    """
+    spec: EmulatorSpec
+    gamma: np.ndarray       # nodos, shape (n_gamma,)
+    h0_ratio: np.ndarray    # shape (n_gamma,)
+    bao_ratio: np.ndarray   # shape (n_gamma, n_z)
+    _splines: Tuple[Any, Any] | None = field(default=None, init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        if self.spec.kind == "cubic":
+            from scipy.interpolate import CubicSpline
+
+            splines = (CubicSpline(self.gamma, self.h0_ratio),
+                       CubicSpline(self.gamma, self.bao_ratio, axis=0) if self.bao_ratio.shape[1] else None)
+            object.__setattr__(self, "_splines", splines)
+
+    @classmethod
+    def build(cls, spec: EmulatorSpec) -> "HQCBEmulator":
+        """Evaluate the model once at every node."""
+        g = spec.nodes()
+        return cls(spec, g, direct_h0_ratio(spec, g), direct_bao_ratio(spec, g))
+
+    def check_config(self, cfg: HQCBInferenceConfig) -> None:
+        """Raise ValueError unless the table matches cfg's closure and covers its gamma box."""
+        s = self.spec
+        closure = (cfg.z_rec, cfg.gamma_ref, cfg.kappa_b, cfg.beta_rd_sensitivity)
+        if closure != (s.z_rec, s.gamma_ref, s.kappa_b, s.beta_rd_sensitivity):
+            raise ValueError("Emulator was built for another closure (kappa_b, beta, ...)")
+        self._check(np.array([cfg.gamma_min, cfg.gamma_max]))
+
+    def _check(self, gamma: np.ndarray | float) -> np.ndarray:
+        g = np.asarray(gamma, dtype=float)
+        tol = _BOX_TOL * (self.spec.gamma_max - self.spec.gamma_min)
+        if np.any(g < self.spec.gamma_min - tol) or np.any(g > self.spec.gamma_max + tol):
+            raise ValueError("gamma outside the emulator box; rebuild with a wider range")
+        return g
+
+    def _eval(self, which: int, table: np.ndarray, gamma: np.ndarray | float) -> np.ndarray:
+        g = self._check(gamma)
+        if self._splines is not None and self._splines[which] is not None:
+            return np.asarray(self._splines[which](g), dtype=float)
+        return _linear(self.gamma, table, g)
+
+    def h0_early_ratio(self, gamma: np.ndarray | float) -> np.ndarray:
+        return self._eval(0, self.h0_ratio, gamma)
+
+    def predict_H0_early(self, H0_local: np.ndarray | float, gamma: np.ndarray | float) -> np.ndarray:
+        # Misma convención de broadcasting que models.predict_H0_early
+        pred: np.ndarray = np.asarray(H0_local, dtype=float) * self.h0_early_ratio(gamma)
+        return pred
+
+    def dv_over_rd_ratio(self, gamma: np.ndarray | float) -> np.ndarray:
+        """BAO ratio, shape gamma.shape + (n_z,)."""
+        if not self.spec.bao_z:
+            raise ValueError("Emulator built without BAO redshifts")
+        return self._eval(1, self.bao_ratio, gamma)
+
+    def accuracy(self, n_check: int = 2001, seed: int = 0) -> Dict[str, Any]:
+        """Interpolation error against direct evaluation.
+
+        Se comprueba en los puntos medios entre nodos (donde el error es máximo) y en
+        n_check puntos aleatorios de la caja.
+        """
+        rng = np.random.default_rng(seed)
+        g = np.concatenate([0.5 * (self.gamma[1:] + self.gamma[:-1]),
+                            rng.uniform(self.spec.gamma_min, self.spec.gamma_max, n_check)])
+        checks = {"h0_early_ratio": (self.h0_early_ratio(g), direct_h0_ratio(self.spec, g))}
+        if self.spec.bao_z:
+            checks["dv_over_rd_ratio"] = (self.dv_over_rd_ratio(g), direct_bao_ratio(self.spec, g))
+        out: Dict[str, Any] = {"kind": self.spec.kind, "n_gamma": self.spec.n_gamma, "n_check": int(g.size)}
+        for name, (emu, ref) in checks.items():
+            err = np.abs(emu - ref)
+            out[name] = {"max_abs_error": float(np.max(err)),
+                         "max_rel_error": float(np.max(err / np.abs(ref)))}
+        return out
+
+    def save(self, path: str | Path) -> Path:
+        p = Path(path)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        tmp = p.with_name(p.stem + ".tmp.npz")
+        np.savez(tmp, gamma=self.gamma, h0_ratio=self.h0_ratio, bao_ratio=self.bao_ratio,
+                 spec=json.dumps(asdict(self.spec)), fingerprint=self.spec.fingerprint())
+        os.replace(tmp, p)
+        return p
+
+    @classmethod
+    def load(cls, path: str | Path) -> "HQCBEmulator":
+        with np.load(path) as z:
+            spec = EmulatorSpec(**json.loads(str(z["spec"])))
+            if str(z["fingerprint"]) != spec.fingerprint():
+                raise ValueError(f"Stale emulator table: {path}")
+            return cls(spec, z["gamma"], z["h0_ratio"], z["bao_ratio"])
+
+
+def emulator_path(spec: EmulatorSpec, directory: str | Path = DEFAULT_EMULATOR_DIR) -> Path:
+    return Path(directory) / f"hqcb_emulator_{spec.fingerprint()[:16]}.npz"
+
+
+@profiling.timed("emulator")
+def load_or_build(
+    spec: EmulatorSpec, directory: str | Path = DEFAULT_EMULATOR_DIR, *, rebuild: bool = False
+) -> Tuple[HQCBEmulator, bool]:
+    """Emulator for `spec` from disk, (re)building it if missing or stale; returns (emulator, built).
+
+    La ruta lleva la huella del spec: cualquier cambio de la configuración del modelo
+    (o de la versión del paquete) apunta a otra tabla y fuerza la reconstrucción.
+    """
+    path = emulator_path(spec, directory)
+    if path.exists() and not rebuild:
+        try:
+            emu = HQCBEmulator.load(path)
+            os.utime(path)  # marca de uso para el LRU de ResultCache
+            return emu, False
+        except (ValueError, KeyError, OSError):
+            pass
+    emu = HQCBEmulator.build(spec)
+    emu.save(path)
+    return emu, True
+
+
+@profiling.timed("loglike_grid")
+def emulated_loglike_grid(
+    emu: HQCBEmulator, cfg: HQCBInferenceConfig, gammas: np.ndarray, H0s: np.ndarray
+) -> np.ndarray:
+    """loglike_grid with H0_early served by the emulator."""
+    profiling.count("loglike_grid.cells", gammas.shape[0] * H0s.shape[0])
+    pred = H0s[None, :] * emu.h0_early_ratio(gammas)[:, None]
+    ll = np.asarray(loglike_gaussian(cfg.H0_early_obs, pred, cfg.H0_early_sigma), dtype=float)
+    ll += np.asarray(loglike_gaussian(cfg.H0_local_obs, H0s, cfg.H0_local_sigma), dtype=float)[None, :]
+    return ll
+
+
+@profiling.timed("bao_loglike")
+def emulated_bao_loglike(emu: HQCBEmulator, dataset: BAOMockDataset, gammas: np.ndarray) -> np.ndarray:
+    """bao_loglike_hqcb_grid (fiducial = dataset) at fixed kappa_b and p, one value per gamma."""
+    if not np.array_equal(np.asarray(emu.spec.bao_z), dataset.z):
+        raise ValueError("Emulator BAO redshifts do not match the dataset")
+    profiling.count("bao_loglike.rows", int(np.size(gammas)))
+    g = np.asarray(gammas, dtype=float)
+    resid = dataset.dv_over_rd * (1.0 - emu.dv_over_rd_ratio(g.ravel()))
+    return np.asarray(dataset.cov_factor.loglike(resid), dtype=float).reshape(g.shape)
@@ -1,11 +1,64 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import InitVar, dataclass, field
 from pathlib import Path
-from typing import Dict, Tuple
+from typing import Callable
 
 import numpy as np
 
+from .. import profiling
+
+# Elementos (filas x N) por bloque en bao_loglike_hqcb_grid: acota la memoria de los residuos
+_BAO_BLOCK_ELEMS = 1 << 22
+
+
+@dataclass(frozen=True)
+class GaussianCovFactor:
+    """Cholesky factor C = L L^T and log|C|, computed once and reused by every chi2."""
+    chol: np.ndarray   # shape (N,N), triangular inferior
+    logdet: float
+
+    @classmethod
+    def from_cov(cls, cov: np.ndarray) -> "GaussianCovFactor":
+        cov = np.asarray(cov, dtype=float)
+        if cov.ndim != 2 or cov.shape[0] != cov.shape[1]:
+            raise ValueError("Covariance must be square")
+        try:
+            L = np.linalg.cholesky(cov)
+        except np.linalg.LinAlgError as e:
+            raise ValueError("Covariance not positive definite (Cholesky failed)") from e
+        return cls(chol=L, logdet=float(2.0 * np.sum(np.log(np.diag(L)))))
+
+    @property
+    def n(self) -> int:
+        return int(self.chol.shape[0])
+
+    def whiten(self, x: np.ndarray) -> np.ndarray:
+        """L^-1 x for x of shape (N,) or (N, K), by forward substitution (no explicit inverse)."""
+        from scipy.linalg import solve_triangular  # scipy sólo cuando hay covarianza
+
+        y: np.ndarray = solve_triangular(self.chol, x, lower=True, check_finite=False)
+        return y
+
+    def chi2(self, residual: np.ndarray) -> np.ndarray | float:
+        """r^T C^-1 r for one residual (N,) or a stack (M, N) -> (M,), via one triangular solve."""
+        r = np.asarray(residual, dtype=float)
+        if r.shape[-1] != self.n:
+            raise ValueError("Residual length does not match covariance dimension")
+        # L y = r^T  =>  chi2 = |y|^2 ; el stack (M,N) se resuelve como N x M columnas
+        y = self.whiten(r.T)
+        chi2 = np.sum(y * y, axis=0)
+        return float(chi2) if r.ndim == 1 else chi2
+
+    def loglike(self, residual: np.ndarray) -> np.ndarray | float:
+        # log L = -1/2 * chi2 - 1/2 * ln|2πC|
+        norm = 0.5 * (self.n * np.log(2.0 * np.pi) + self.logdet)
+        chi2 = self.chi2(residual)
+        if isinstance(chi2, float):
+            return float(-0.5 * chi2 - norm)
+        out: np.ndarray = -0.5 * chi2 - norm
+        return out
+
 
 @dataclass(frozen=True)
 class BAOMockDataset:
@@ -13,66 +66,83 @@ class BAOMockDataset:
     z: np.ndarray            # shape (N,)
     dv_over_rd: np.ndarray   # shape (N,)
     cov: np.ndarray          # shape (N,N)
+    # Factor de Cholesky ya calculado (p.ej. desde TableCache); si no se pasa se factoriza cov
+    factor: InitVar[GaussianCovFactor | None] = None
+    cov_factor: GaussianCovFactor = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self, factor: GaussianCovFactor | None) -> None:
+        object.__setattr__(self, "cov_factor",
+                           GaussianCovFactor.from_cov(self.cov) if factor is None else factor)
+
 
+@profiling.timed("load_bao_mock_csv")
+def load_bao_mock_csv(csv_path: str, cov_path: str, *, cache_dir: str | Path | None = None) -> BAOMockDataset:
+    """BAO table (z, DV/rd) and its covariance (text, or .npy memory-mapped).
+
+    cache_dir: si se da, la tabla parseada, la covarianza y su factor de Cholesky se
+    guardan en binario (TableCache) y las cargas siguientes no parsean ni factorizan.
+    """
+    from .tables import BINARY_MATRIX_SUFFIXES, TableCache, load_matrix, read_csv_columns
 
-def load_bao_mock_csv(csv_path: str, cov_path: str) -> BAOMockDataset:
     csvp = Path(csv_path)
     covp = Path(cov_path)
     if not csvp.exists():
         raise FileNotFoundError(f"BAO CSV not found: {csvp}")
     if not covp.exists():
         raise FileNotFoundError(f"BAO cov not found: {covp}")
+    cache = None if cache_dir is None else TableCache(cache_dir)
 
-    rows = []
-    for line in csvp.read_text(encoding="utf-8").splitlines():
-        line = line.strip()
-        if not line or line.startswith("#"):
-            continue
-        parts = [p.strip() for p in line.split(",")]
-        if parts[0].lower() == "z":
-            continue
-        z = float(parts[0])
-        dvrd = float(parts[1])
-        rows.append((z, dvrd))
-
-    if len(rows) < 2:
-        raise ValueError("BAO mock needs at least 2 points")
+    def cached(source: Path, name: str, build: Callable[[], np.ndarray]) -> np.ndarray:
+        return build() if cache is None else cache.array(source, name, build)
 
-    z = np.array([r[0] for r in rows], dtype=float)
-    dvrd = np.array([r[1] for r in rows], dtype=float)
+    rows = cached(csvp, "columns_0_1", lambda: read_csv_columns(csvp, (0, 1)))
+    if rows.shape[0] < 2:
+        raise ValueError("BAO mock needs at least 2 points")
+    z = np.array(rows[:, 0], dtype=float)
+    dvrd = np.array(rows[:, 1], dtype=float)
 
-    cov = np.loadtxt(str(covp), dtype=float)
+    if covp.suffix.lower() in BINARY_MATRIX_SUFFIXES:
+        cov = load_matrix(covp)
+    else:
+        cov = cached(covp, "matrix", lambda: load_matrix(covp))
     if cov.ndim != 2 or cov.shape[0] != cov.shape[1]:
         raise ValueError("Covariance must be square")
     if cov.shape[0] != z.shape[0]:
         raise ValueError("Covariance dimension does not match data length")
 
-    # Chequeo básico: simétrica y definida positiva (o al menos invertible)
-    if not np.allclose(cov, cov.T, atol=1e-10, rtol=1e-10):
-        raise ValueError("Covariance matrix must be symmetric")
+    # El factor en caché viene de una covarianza ya validada con este mismo contenido
+    chol = None if cache is None else cache.get(covp, "cholesky")
+    if chol is not None:
+        factor = GaussianCovFactor(chol=chol, logdet=float(2.0 * np.sum(np.log(np.diagonal(chol)))))
+    else:
+        # Chequeo básico: simétrica y definida positiva
+        if not np.allclose(cov, cov.T, atol=1e-10, rtol=1e-10):
+            raise ValueError("Covariance matrix must be symmetric")
+        # Definida positiva: una sola Cholesky, que se guarda para la likelihood
+        factor = GaussianCovFactor.from_cov(cov)
+        if cache is not None:
+            cache.put(covp, "cholesky", factor.chol)
+
+    return BAOMockDataset(z=z, dv_over_rd=dvrd, cov=cov, factor=factor)
 
-    # Invertibilidad
-    _ = np.linalg.inv(cov)
 
-    return BAOMockDataset(z=z, dv_over_rd=dvrd, cov=cov)
+def _as_factor(cov: np.ndarray | GaussianCovFactor) -> GaussianCovFactor:
+    if isinstance(cov, GaussianCovFactor):
+        return cov
+    return GaussianCovFactor.from_cov(cov)
 
 
-def chi2_gaussian_cov(residual: np.ndarray, cov: np.ndarray) -> float:
-    inv = np.linalg.inv(cov)
-    return float(residual.T @ inv @ residual)
+def chi2_gaussian_cov(residual: np.ndarray, cov: np.ndarray | GaussianCovFactor) -> np.ndarray | float:
+    # Pasa un GaussianCovFactor para no refactorizar en cada llamada
+    return _as_factor(cov).chi2(residual)
 
 
-def loglike_gaussian_cov(residual: np.ndarray, cov: np.ndarray) -> float:
-    # log L ~ -1/2 * chi2 - 1/2 * ln|2πC|
-    n = residual.shape[0]
-    sign, logdet = np.linalg.slogdet(cov)
-    if sign <= 0:
-        raise ValueError("Covariance not positive definite (slogdet sign <= 0)")
-    chi2 = chi2_gaussian_cov(residual, cov)
-    return float(-0.5 * chi2 - 0.5 * (n * np.log(2.0 * np.pi) + logdet))
+def loglike_gaussian_cov(residual: np.ndarray, cov: np.ndarray | GaussianCovFactor) -> np.ndarray | float:
+    # log L ~ -1/2 * chi2 - 1/2 * ln|2πC| ; residual (N,) o stack (M,N)
+    return _as_factor(cov).loglike(residual)
 
 
-def hqcb_predict_dv_over_rd_ratio(z: np.ndarray, alpha: float, p_sens: float) -> np.ndarray:
+def hqcb_predict_dv_over_rd_ratio(z: np.ndarray, alpha: float | np.ndarray, p_sens: float | np.ndarray) -> np.ndarray:
     """
     Modelo efectivo mínimo (mock) para BAO:
       DV/rd |HQCB  ≈ (DV/rd)|LCDM * [ (1+z)^alpha ]^p_sens
@@ -82,11 +152,14 @@ def hqcb_predict_dv_over_rd_ratio(z: np.ndarray, alpha: float, p_sens: float) ->
     return (1.0 + z) ** (alpha * p_sens)
 
 
-def alpha_from_gamma(gamma: float, gamma_ref: float, kappa_b: float) -> float:
+def alpha_from_gamma(
+    gamma: float | np.ndarray, gamma_ref: float, kappa_b: float | np.ndarray
+) -> float | np.ndarray:
     # cierre bootstrap toy (igual al que ya vienes usando):
     return -kappa_b * (gamma - gamma_ref)
 
 
+@profiling.timed("bao_loglike")
 def bao_loglike_hqcb(
     dataset: BAOMockDataset,
     gamma: float,
@@ -113,4 +186,48 @@ def bao_loglike_hqcb(
         y_pred = dvrd_lcdm_fid * ratio
 
     residual = dataset.dv_over_rd - y_pred
-    return loglike_gaussian_cov(residual, dataset.cov)
\ No newline at end of file
+    return float(dataset.cov_factor.loglike(residual))
+
+
+@profiling.timed("bao_loglike")
+def bao_loglike_hqcb_grid(
+    dataset: BAOMockDataset,
+    gamma: float | np.ndarray,
+    gamma_ref: float,
+    kappa_b: float | np.ndarray,
+    p_sens: float | np.ndarray,
+    dvrd_lcdm_fid: np.ndarray | None = None,
+) -> np.ndarray:
+    """
+    Versión vectorizada de bao_loglike_hqcb: gamma, kappa_b y p_sens se combinan
+    por broadcasting y se devuelve log L con esa forma.
+
+    Los residuos se construyen como arrays (M, N) por bloques y se evalúan con la
+    Cholesky precalculada del dataset (una resolución triangular por bloque).
+    """
+    g, kb, ps = np.broadcast_arrays(
+        np.asarray(gamma, dtype=float),
+        np.asarray(kappa_b, dtype=float),
+        np.asarray(p_sens, dtype=float),
+    )
+    shape = g.shape
+    a = np.ravel(alpha_from_gamma(g, gamma_ref, kb))
+    ps = np.ravel(ps)
+
+    if dvrd_lcdm_fid is None:
+        fid = dataset.dv_over_rd
+    else:
+        if dvrd_lcdm_fid.shape != dataset.dv_over_rd.shape:
+            raise ValueError("dvrd_lcdm_fid shape mismatch")
+        fid = dvrd_lcdm_fid
+
+    n = dataset.z.shape[0]
+    profiling.count("bao_loglike.rows", a.shape[0])
+    out = np.empty(a.shape[0], dtype=float)
+    rows = max(1, _BAO_BLOCK_ELEMS // n)
+    for i0 in range(0, a.shape[0], rows):
+        i1 = i0 + rows
+        ratio = hqcb_predict_dv_over_rd_ratio(dataset.z[None, :], a[i0:i1, None], ps[i0:i1, None])
+        residual = dataset.dv_over_rd - fid * ratio
+        out[i0:i1] = dataset.cov_factor.loglike(residual)
+    return out.reshape(shape)
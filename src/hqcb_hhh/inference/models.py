@@ -2,10 +2,18 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 import math
-from typing import Dict, Tuple
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Sequence, Tuple, Union
 
 import numpy as np
 
+from .. import profiling
+
+if TYPE_CHECKING:
+    from .emulator import HQCBEmulator
+
+ArrayLike = Union[float, np.ndarray]
+
 
 @dataclass(frozen=True)
 class HQCBInferenceConfig:
@@ -39,20 +47,28 @@ class HQCBInferenceConfig:
     grid_H0: int
 
 
-def alpha_from_gamma(gamma: float, gamma_ref: float, kappa_b: float) -> float:
+def alpha_from_gamma(gamma: ArrayLike, gamma_ref: float, kappa_b: ArrayLike) -> ArrayLike:
     return -kappa_b * (gamma - gamma_ref)
 
 
-def v_ratio_at_rec(z_rec: float, alpha: float) -> float:
+def v_ratio_at_rec(z_rec: float, alpha: ArrayLike) -> ArrayLike:
     return (1.0 + z_rec) ** alpha
 
 
-def rd_ratio_from_vratio(v_ratio: float, beta_rd_sensitivity: float) -> float:
+def rd_ratio_from_vratio(v_ratio: ArrayLike, beta_rd_sensitivity: ArrayLike) -> ArrayLike:
     # rd_true/rd0 = v_ratio^beta
     return v_ratio ** beta_rd_sensitivity
 
 
-def predict_H0_early(H0_local: float, z_rec: float, gamma: float, gamma_ref: float, kappa_b: float, beta: float) -> float:
+def predict_H0_early(
+    H0_local: ArrayLike,
+    z_rec: float,
+    gamma: ArrayLike,
+    gamma_ref: float,
+    kappa_b: ArrayLike,
+    beta: ArrayLike,
+) -> ArrayLike:
+    # Acepta escalares o arrays (broadcasting numpy), p.ej. H0_local[None, :] y gamma[:, None]
     a = alpha_from_gamma(gamma, gamma_ref, kappa_b)
     vratio = v_ratio_at_rec(z_rec, a)
     rd_ratio = rd_ratio_from_vratio(vratio, beta)
@@ -60,105 +76,363 @@ def predict_H0_early(H0_local: float, z_rec: float, gamma: float, gamma_ref: flo
     return H0_local * rd_ratio
 
 
-def loglike_gaussian(x: float, mu: float, sigma: float) -> float:
-    # log N(x | mu, sigma)
+def loglike_gaussian(x: ArrayLike, mu: ArrayLike, sigma: float) -> ArrayLike:
+    # log N(x | mu, sigma); x y mu pueden ser arrays (broadcasting)
     if sigma <= 0:
         raise ValueError("sigma must be > 0")
     z = (x - mu) / sigma
     return -0.5 * (z * z) - math.log(sigma * math.sqrt(2.0 * math.pi))
 
 
-def grid_posterior(cfg: HQCBInferenceConfig) -> Dict[str, object]:
-    gammas = np.linspace(cfg.gamma_min, cfg.gamma_max, cfg.grid_gamma, dtype=float)
-    H0s    = np.linspace(cfg.H0_min, cfg.H0_max, cfg.grid_H0, dtype=float)
-
-    logpost = np.empty((cfg.grid_gamma, cfg.grid_H0), dtype=float)
-
+@profiling.timed("loglike_grid")
+def loglike_grid(cfg: HQCBInferenceConfig, gammas: np.ndarray, H0s: np.ndarray) -> np.ndarray:
+    """Log-likelihood on the (gammas, H0s) grid, shape (len(gammas), len(H0s))."""
+    profiling.count("loglike_grid.cells", gammas.shape[0] * H0s.shape[0])
     # Likelihood:
     #   L = N(H0_local_obs | H0_local, sigma_local) * N(H0_early_obs | H0_early_pred(gamma,H0_local), sigma_early)
-    for i, g in enumerate(gammas):
-        for j, h0 in enumerate(H0s):
-            h0_early_pred = predict_H0_early(
-                H0_local=h0,
-                z_rec=cfg.z_rec,
-                gamma=g,
-                gamma_ref=cfg.gamma_ref,
-                kappa_b=cfg.kappa_b,
-                beta=cfg.beta_rd_sensitivity,
-            )
-            ll = 0.0
-            ll += loglike_gaussian(cfg.H0_local_obs, h0, cfg.H0_local_sigma)
-            ll += loglike_gaussian(cfg.H0_early_obs, h0_early_pred, cfg.H0_early_sigma)
-            # Priors uniformes dentro de rangos (0 fuera)
-            logpost[i, j] = ll
+    h0_early_pred = predict_H0_early(
+        H0_local=H0s[None, :],
+        z_rec=cfg.z_rec,
+        gamma=gammas[:, None],
+        gamma_ref=cfg.gamma_ref,
+        kappa_b=cfg.kappa_b,
+        beta=cfg.beta_rd_sensitivity,
+    )
+    ll_local = np.asarray(loglike_gaussian(cfg.H0_local_obs, H0s, cfg.H0_local_sigma), dtype=float)
+    ll = np.asarray(loglike_gaussian(cfg.H0_early_obs, h0_early_pred, cfg.H0_early_sigma), dtype=float)
+    ll += ll_local[None, :]
+    # Priors uniformes dentro de rangos (0 fuera)
+    return ll
+
+
+@profiling.timed("loglike_points")
+def loglike_points(
+    cfg: HQCBInferenceConfig,
+    gammas: np.ndarray,
+    H0s: np.ndarray,
+    kappa_b: ArrayLike | None = None,
+    beta: ArrayLike | None = None,
+) -> np.ndarray:
+    """Log-likelihood at paired points (gammas[k], H0s[k]); same terms as loglike_grid.
+
+    kappa_b/beta: por defecto los de cfg; arrays por punto cuando también son libres (muestreo).
+    """
+    h0_early_pred = predict_H0_early(
+        H0_local=H0s,
+        z_rec=cfg.z_rec,
+        gamma=gammas,
+        gamma_ref=cfg.gamma_ref,
+        kappa_b=cfg.kappa_b if kappa_b is None else kappa_b,
+        beta=cfg.beta_rd_sensitivity if beta is None else beta,
+    )
+    ll = loglike_gaussian(cfg.H0_early_obs, h0_early_pred, cfg.H0_early_sigma)
+    ll = ll + loglike_gaussian(cfg.H0_local_obs, H0s, cfg.H0_local_sigma)
+    return np.asarray(ll, dtype=float)
+
+
+# Bytes por celda en modo streaming: log-likelihood + temporales de numpy (pred, z, exp)
+_BYTES_PER_CELL = 4 * np.dtype(float).itemsize
+
+# Presupuesto por bloque cuando se pide paralelismo sin memory_budget_mb explícito
+DEFAULT_BLOCK_MEMORY_MB = 64.0
+
+_BACKENDS = ("thread", "process")
+
+_METHODS = ("auto", "grid", "analytic")
+
+
+@dataclass(frozen=True)
+class GridBlockStats:
+    """Sufficient statistics of one block of gamma rows of the log-posterior."""
+    row_start: int
+    log_max: float             # max del log-posterior en el bloque
+    row_logsumexp: np.ndarray  # shape (n_rows,): log sum_j exp(logpost[i, j])
+    col_weight: np.ndarray     # shape (n_H0,): sum_i exp(logpost[i, j] - log_max)
+    argmax: Tuple[int, int]    # índice global (i, j) del máximo del bloque
+
 
+def grid_axes(cfg: HQCBInferenceConfig) -> Tuple[np.ndarray, np.ndarray]:
+    gammas = np.linspace(cfg.gamma_min, cfg.gamma_max, cfg.grid_gamma, dtype=float)
+    H0s    = np.linspace(cfg.H0_min, cfg.H0_max, cfg.grid_H0, dtype=float)
+    return gammas, H0s
+
+
+def block_rows_for_budget(n_H0: int, memory_budget_mb: float) -> int:
+    """Number of gamma rows per block so that one block stays within the memory budget."""
+    if memory_budget_mb <= 0:
+        raise ValueError("memory_budget_mb must be > 0")
+    budget = memory_budget_mb * 1024.0 * 1024.0
+    return max(1, int(budget // (n_H0 * _BYTES_PER_CELL)))
+
+
+def _grid_loglike(
+    cfg: HQCBInferenceConfig, gammas: np.ndarray, H0s: np.ndarray, emulator: HQCBEmulator | None
+) -> np.ndarray:
+    # Modelo directo o tabla del emulador (mismos términos y misma forma)
+    if emulator is None:
+        return loglike_grid(cfg, gammas, H0s)
+    from .emulator import emulated_loglike_grid
+
+    return emulated_loglike_grid(emulator, cfg, gammas, H0s)
+
+
+def scan_block(
+    cfg: HQCBInferenceConfig,
+    gammas: np.ndarray,
+    H0s: np.ndarray,
+    row_start: int,
+    emulator: HQCBEmulator | None = None,
+) -> GridBlockStats:
+    lp = _grid_loglike(cfg, gammas, H0s, emulator)
+    flat = int(np.argmax(lp))
+    i, j = divmod(flat, lp.shape[1])
+    m = float(lp[i, j])
+    lp -= m
+    np.exp(lp, out=lp)
+    with np.errstate(divide="ignore"):
+        # filas con peso nulo (underflow) -> -inf, que exp() devuelve a 0 al combinar
+        row_logsumexp = m + np.log(np.sum(lp, axis=1))
+    return GridBlockStats(
+        row_start=row_start,
+        log_max=m,
+        row_logsumexp=row_logsumexp,
+        col_weight=np.sum(lp, axis=0),
+        argmax=(row_start + i, j),
+    )
+
+
+def merge_block_stats(blocks: Sequence[GridBlockStats]) -> Tuple[np.ndarray, np.ndarray, Tuple[int, int], float]:
+    """Combine ordered block statistics into (p_gamma, p_H0, argmax, logL_max).
+
+    Log-sum-exp online: cada bloque se reescala al máximo global, así nunca se
+    materializa el posterior 2D completo.
+    """
+    blocks = sorted(blocks, key=lambda b: b.row_start)
+    best = blocks[0]
+    for b in blocks[1:]:
+        if b.log_max > best.log_max:
+            best = b
+    m = best.log_max
+
+    col = np.zeros_like(blocks[0].col_weight)
+    for b in blocks:
+        col += b.col_weight * math.exp(b.log_max - m)
+    row_logsumexp = np.concatenate([b.row_logsumexp for b in blocks])
+
+    Z_rows = np.exp(row_logsumexp - m)
+    Z = np.sum(Z_rows)
+    if not np.isfinite(Z) or Z <= 0:
+        raise RuntimeError("Posterior normalization failed")
+    return Z_rows / Z, col / Z, best.argmax, m
+
+
+def credible_interval_1d(x: np.ndarray, p: np.ndarray, level: float) -> Tuple[float, float]:
+    # HPD aproximado por cuantiles (suficiente en toy unimodal)
+    cdf = np.cumsum(p)
+    cdf = cdf / cdf[-1]
+    lo_q = (1.0 - level) / 2.0
+    hi_q = 1.0 - lo_q
+    lo = float(np.interp(lo_q, cdf, x))
+    hi = float(np.interp(hi_q, cdf, x))
+    return lo, hi
+
+
+def scan_blocks(
+    cfg: HQCBInferenceConfig,
+    gammas: np.ndarray,
+    H0s: np.ndarray,
+    rows: int,
+    workers: int = 1,
+    backend: str = "thread",
+    emulator: HQCBEmulator | None = None,
+) -> List[GridBlockStats]:
+    """Evaluate the grid in blocks of `rows` gamma rows, optionally on a worker pool.
+
+    La partición en bloques no depende de `workers` y los bloques se devuelven en
+    orden, así que el resultado combinado es idéntico al de la ejecución serie.
+    """
+    if workers < 1:
+        raise ValueError("workers must be >= 1")
+    if backend not in _BACKENDS:
+        raise ValueError(f"backend must be one of {_BACKENDS}, got {backend!r}")
+
+    starts = list(range(0, gammas.shape[0], rows))
+    if workers == 1 or len(starts) == 1:
+        return [scan_block(cfg, gammas[i0:i0 + rows], H0s, i0, emulator) for i0 in starts]
+
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+    pool_cls = ThreadPoolExecutor if backend == "thread" else ProcessPoolExecutor
+    with pool_cls(max_workers=workers) as pool:
+        return list(pool.map(
+            scan_block,
+            [cfg] * len(starts),
+            [gammas[i0:i0 + rows] for i0 in starts],
+            [H0s] * len(starts),
+            starts,
+            [emulator] * len(starts),
+        ))
+
+
+@profiling.timed("grid_posterior")
+def grid_posterior(
+    cfg: HQCBInferenceConfig,
+    *,
+    memory_budget_mb: float | None = None,
+    workers: int = 1,
+    backend: str = "thread",
+    adaptive_eps: float | None = None,
+    as_arrays: bool = False,
+    keep_logpost: bool = False,
+    checkpoint_dir: str | Path | None = None,
+    method: str = "grid",
+    emulator: HQCBEmulator | None = None,
+) -> Dict[str, object]:
+    """Posterior on the (gamma, H0_local) grid.
+
+    memory_budget_mb: si se da, el grid se evalúa por bloques de filas de gamma
+    (streaming) y nunca se guarda el posterior 2D; el resultado coincide con el
+    modo en memoria salvo redondeo. El presupuesto es por bloque en vuelo.
+    workers/backend: reparte los bloques de gamma en un pool de hilos o procesos
+    (concurrent.futures); con workers > 1 y sin presupuesto se usan bloques de
+    DEFAULT_BLOCK_MEMORY_MB. Resultado idéntico al de workers=1 con el mismo presupuesto.
+    adaptive_eps: si se da, refinamiento grueso-a-fino (ver adaptive.adaptive_grid_posterior)
+    que sólo evalúa las celdas con (1 - eps) de la masa; añade cotas de error al resultado.
+    as_arrays: deja mallas y marginales como np.ndarray en lugar de listas (salida binaria).
+    keep_logpost: añade posterior["logpost"], el log-posterior 2D normalizado
+    (sólo modo en memoria o checkpoint y con as_arrays=True).
+    checkpoint_dir: guarda cada bloque de filas evaluado en ese directorio y reutiliza
+    los ya guardados (reanudar o extender un scan; ver checkpoint.checkpointed_grid_posterior).
+    memory_budget_mb fija entonces el tamaño de bloque.
+    method: "grid" (por defecto) evalúa la malla 2D; "analytic" suma la dirección
+    H0_local en forma cerrada (O(n_gamma), ver analytic.analytic_grid_posterior);
+    "auto" usa la analítica salvo que se pida un modo de malla (presupuesto, workers,
+    adaptive, checkpoint, keep_logpost) o que el paso en H0 no resuelva la gaussiana
+    condicional. La vía analítica es siempre opcional.
+    emulator: HQCBEmulator (ver emulator.load_or_build) construido para la clausura
+    de cfg; H0_early sale de su tabla en gamma en lugar del modelo. Sólo con la malla
+    densa o por bloques (con o sin workers).
+    """
+    if method not in _METHODS:
+        raise ValueError(f"method must be one of {_METHODS}")
+    if workers < 1:
+        raise ValueError("workers must be >= 1")
+    grid_mode = (memory_budget_mb is not None or workers > 1 or adaptive_eps is not None
+                 or checkpoint_dir is not None or keep_logpost or emulator is not None)
+    if method == "analytic" and grid_mode:
+        raise ValueError("method='analytic' cannot be combined with grid-scan options")
+    if emulator is not None:
+        if adaptive_eps is not None or checkpoint_dir is not None:
+            raise ValueError("emulator cannot be combined with adaptive_eps or checkpoint_dir")
+        emulator.check_config(cfg)
+    if method != "grid" and not grid_mode:
+        from .analytic import analytic_applicable, analytic_grid_posterior
+
+        if method == "analytic" or analytic_applicable(cfg):
+            return analytic_grid_posterior(cfg, as_arrays=as_arrays)
+    if keep_logpost and not as_arrays:
+        raise ValueError("keep_logpost requires as_arrays=True")
+    if checkpoint_dir is not None:
+        if adaptive_eps is not None or workers > 1:
+            raise ValueError("checkpoint_dir cannot be combined with adaptive_eps or workers > 1")
+        from .checkpoint import checkpointed_grid_posterior
+
+        rows = (block_rows_for_budget(int(cfg.grid_H0), memory_budget_mb)
+                if memory_budget_mb is not None else None)
+        return checkpointed_grid_posterior(cfg, checkpoint_dir, block_rows=rows,
+                                           as_arrays=as_arrays, keep_logpost=keep_logpost)
+    if keep_logpost and (adaptive_eps is not None or memory_budget_mb is not None or workers > 1):
+        raise ValueError("keep_logpost needs the in-memory grid (no budget, adaptive or workers)")
+    if adaptive_eps is not None:
+        from .adaptive import adaptive_grid_posterior
+
+        return adaptive_grid_posterior(cfg, eps=adaptive_eps, as_arrays=as_arrays)
+    gammas, H0s = grid_axes(cfg)
+
+    if workers > 1 and memory_budget_mb is None:
+        memory_budget_mb = DEFAULT_BLOCK_MEMORY_MB
+
+    if memory_budget_mb is None:
+        logpost = _grid_loglike(cfg, gammas, H0s, emulator)
+        return dense_posterior(cfg, gammas, H0s, logpost, as_arrays=as_arrays,
+                               keep_logpost=keep_logpost)
+
+    rows = block_rows_for_budget(H0s.shape[0], memory_budget_mb)
+    blocks = scan_blocks(cfg, gammas, H0s, rows, workers=workers, backend=backend,
+                         emulator=emulator)
+    p_gamma, p_H0, idx, logL_max = merge_block_stats(blocks)
+
+    map_point = (float(gammas[idx[0]]), float(H0s[idx[1]]))
+    return summarize_grid(cfg, gammas, H0s, p_gamma, p_H0, map_point, logL_max, as_arrays=as_arrays)
+
+
+def dense_posterior(
+    cfg: HQCBInferenceConfig,
+    gammas: np.ndarray,
+    H0s: np.ndarray,
+    logpost: np.ndarray,
+    *,
+    as_arrays: bool = False,
+    keep_logpost: bool = False,
+) -> Dict[str, object]:
+    """Normalize a full (n_gamma, n_H0) log-likelihood table and summarize it.
+
+    logpost se normaliza en sitio cuando keep_logpost=True.
+    """
     # Normalización numérica estable
-    m = np.max(logpost)
-    w = np.exp(logpost - m)
-    Z = np.sum(w)
+    m = float(np.max(logpost))
+    post = np.exp(logpost - m)
+    Z = np.sum(post)
     if not np.isfinite(Z) or Z <= 0:
         raise RuntimeError("Posterior normalization failed")
 
-    post = w / Z
+    post /= Z
 
     # Marginales
     p_gamma = np.sum(post, axis=1)
     p_H0    = np.sum(post, axis=0)
 
+    i, j = np.unravel_index(np.argmax(logpost), logpost.shape)
+    map_point = (float(gammas[int(i)]), float(H0s[int(j)]))
+    res = summarize_grid(cfg, gammas, H0s, p_gamma, p_H0, map_point, m, as_arrays=as_arrays)
+    if keep_logpost:
+        logpost -= m + math.log(Z)
+        res["posterior"]["logpost"] = logpost  # type: ignore[index]
+    return res
+
+
+def summarize_grid(
+    cfg: HQCBInferenceConfig,
+    gammas: np.ndarray,
+    H0s: np.ndarray,
+    p_gamma: np.ndarray,
+    p_H0: np.ndarray,
+    map_point: Tuple[float, float],
+    logL_max: float,
+    as_arrays: bool = False,
+) -> Dict[str, object]:
     # Estadísticos
     gamma_mean = float(np.sum(gammas * p_gamma))
     H0_mean    = float(np.sum(H0s * p_H0))
 
-    def credible_interval_1d(x: np.ndarray, p: np.ndarray, level: float) -> Tuple[float, float]:
-        # HPD aproximado por cuantiles (suficiente en toy unimodal)
-        cdf = np.cumsum(p)
-        cdf = cdf / cdf[-1]
-        lo_q = (1.0 - level) / 2.0
-        hi_q = 1.0 - lo_q
-        lo = float(np.interp(lo_q, cdf, x))
-        hi = float(np.interp(hi_q, cdf, x))
-        return lo, hi
-
     gamma_68 = credible_interval_1d(gammas, p_gamma, 0.68)
     gamma_95 = credible_interval_1d(gammas, p_gamma, 0.95)
 
-    # Best-fit (MAP en grid)
-    idx = np.unravel_index(np.argmax(post), post.shape)
-    gamma_map = float(gammas[idx[0]])
-    H0_map    = float(H0s[idx[1]])
+    # Best-fit (MAP): nodo del grid o punto evaluado en modo adaptativo
+    gamma_map, H0_map = map_point
     H0_early_map = float(predict_H0_early(H0_map, cfg.z_rec, gamma_map, cfg.gamma_ref, cfg.kappa_b, cfg.beta_rd_sensitivity))
 
-    # Métricas de comparación de modelo (AIC/BIC) con máxima verosimilitud en grid
-    # k = número de parámetros del modelo; n = número de observaciones efectivas (aquí 2: H0_local y H0_early)
-    # logLmax aproximada: usando logpost (priors uniformes no aportan constante dentro del rango).
-    logL_max = float(np.max(logpost))
-    n = 2
-    k = 2
-    AIC = float(2*k - 2*logL_max)
-    BIC = float(k*math.log(n) - 2*logL_max)
-
-    # Modelo competidor LCDM-toy: fija gamma = gamma_ref, solo H0_local libre
-    # => H0_early_pred = H0_local (porque alpha=0 => rd_ratio=1)
-    # k=1
-    logL_lcdm = []
-    for h0 in H0s:
-        ll = 0.0
-        ll += loglike_gaussian(cfg.H0_local_obs, float(h0), cfg.H0_local_sigma)
-        ll += loglike_gaussian(cfg.H0_early_obs, float(h0), cfg.H0_early_sigma)
-        logL_lcdm.append(ll)
-    logL_lcdm_max = float(np.max(np.array(logL_lcdm)))
-    k_lcdm = 1
-    AIC_lcdm = float(2*k_lcdm - 2*logL_lcdm_max)
-    BIC_lcdm = float(k_lcdm*math.log(n) - 2*logL_lcdm_max)
+    def out(a: np.ndarray) -> object:
+        return a if as_arrays else a.tolist()
 
     return {
         "grid": {
-            "gamma": gammas.tolist(),
-            "H0_local": H0s.tolist(),
+            "gamma": out(gammas),
+            "H0_local": out(H0s),
         },
         "posterior": {
-            "p_gamma": p_gamma.tolist(),
-            "p_H0_local": p_H0.tolist(),
+            "p_gamma": out(p_gamma),
+            "p_H0_local": out(p_H0),
         },
         "summary": {
             "gamma_mean": gamma_mean,
@@ -169,21 +443,58 @@ def grid_posterior(cfg: HQCBInferenceConfig) -> Dict[str, object]:
             "H0_local_map": H0_map,
             "H0_early_pred_map": H0_early_map,
         },
-        "model_comparison": {
-            "HQCB": {"k": k, "n": n, "logL_max": logL_max, "AIC": AIC, "BIC": BIC},
-            "LCDM_toy": {"k": k_lcdm, "n": n, "logL_max": logL_lcdm_max, "AIC": AIC_lcdm, "BIC": BIC_lcdm},
-            "delta_AIC": AIC_lcdm - AIC,
-            "delta_BIC": BIC_lcdm - BIC,
-        },
-        "config_echo": {
-            "z_rec": cfg.z_rec,
-            "rd0_mpc": cfg.rd0_mpc,
-            "H0_local_obs": cfg.H0_local_obs,
-            "H0_local_sigma": cfg.H0_local_sigma,
-            "H0_early_obs": cfg.H0_early_obs,
-            "H0_early_sigma": cfg.H0_early_sigma,
-            "gamma_ref": cfg.gamma_ref,
-            "kappa_b": cfg.kappa_b,
-            "beta_rd_sensitivity": cfg.beta_rd_sensitivity,
-        }
+        "model_comparison": model_comparison(cfg, logL_max, H0s),
+        "config_echo": config_echo(cfg),
+    }
+
+
+def model_comparison(
+    cfg: HQCBInferenceConfig,
+    logL_max: float,
+    H0s: np.ndarray,
+    k: int = 2,
+    n: int = 2,
+    logL_lcdm_extra: float = 0.0,
+) -> Dict[str, Any]:
+    """AIC/BIC of HQCB (k free parameters) vs the LCDM toy (H0_local only) on n observations.
+
+    logL_lcdm_extra: log-likelihood de otros datos en gamma = gamma_ref (p. ej. BAO).
+    """
+    # Métricas de comparación de modelo (AIC/BIC) con máxima verosimilitud en grid
+    # k = número de parámetros del modelo; n = número de observaciones efectivas (aquí 2: H0_local y H0_early)
+    # logLmax aproximada: usando logpost (priors uniformes no aportan constante dentro del rango).
+    logL_max = float(logL_max)
+    AIC = float(2*k - 2*logL_max)
+    BIC = float(k*math.log(n) - 2*logL_max)
+
+    # Modelo competidor LCDM-toy: fija gamma = gamma_ref, solo H0_local libre
+    # => H0_early_pred = H0_local (porque alpha=0 => rd_ratio=1)
+    # k=1
+    logL_lcdm = loglike_gaussian(cfg.H0_local_obs, H0s, cfg.H0_local_sigma) + loglike_gaussian(
+        cfg.H0_early_obs, H0s, cfg.H0_early_sigma
+    )
+    logL_lcdm_max = float(np.max(logL_lcdm)) + float(logL_lcdm_extra)
+    k_lcdm = 1
+    AIC_lcdm = float(2*k_lcdm - 2*logL_lcdm_max)
+    BIC_lcdm = float(k_lcdm*math.log(n) - 2*logL_lcdm_max)
+
+    return {
+        "HQCB": {"k": k, "n": n, "logL_max": logL_max, "AIC": AIC, "BIC": BIC},
+        "LCDM_toy": {"k": k_lcdm, "n": n, "logL_max": logL_lcdm_max, "AIC": AIC_lcdm, "BIC": BIC_lcdm},
+        "delta_AIC": AIC_lcdm - AIC,
+        "delta_BIC": BIC_lcdm - BIC,
+    }
+
+
+def config_echo(cfg: HQCBInferenceConfig) -> Dict[str, float]:
+    return {
+        "z_rec": cfg.z_rec,
+        "rd0_mpc": cfg.rd0_mpc,
+        "H0_local_obs": cfg.H0_local_obs,
+        "H0_local_sigma": cfg.H0_local_sigma,
+        "H0_early_obs": cfg.H0_early_obs,
+        "H0_early_sigma": cfg.H0_early_sigma,
+        "gamma_ref": cfg.gamma_ref,
+        "kappa_b": cfg.kappa_b,
+        "beta_rd_sensitivity": cfg.beta_rd_sensitivity,
     }
\ No newline at end of file
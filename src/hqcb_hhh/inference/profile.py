@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from .. import profiling
+
+from ..likelihood import find_intervals_adaptive, wilks_delta
+from .likelihoods import BAOMockDataset, bao_loglike_hqcb_grid
+from .models import HQCBInferenceConfig, config_echo, model_comparison
+from .sampling import FreeParameter, LogPosterior, default_free_parameters, make_log_posterior
+
+# Niveles de confianza de los intervalos de Wilks (claves "68", "95" como en summary)
+CONFIDENCE_LEVELS = (0.68, 0.95)
+
+# Tolerancias de L-BFGS-B: los cortes DeltaNLL necesitan la NLL a ~1e-9
+_OPTIONS = {"ftol": 1e-13, "gtol": 1e-8, "maxiter": 500}
+
+# Puntos de arranque aleatorios (evaluados en bloque) para el máximo global
+_N_STARTS = 64
+
+# f(x) -> (valor, gradiente)
+Objective = Callable[[np.ndarray], Tuple[float, np.ndarray]]
+
+
+def _nll(cfg: HQCBInferenceConfig, free: Sequence[FreeParameter],
+         bao: BAOMockDataset | None, bao_p_sensitivity: float | None) -> Tuple[Objective, LogPosterior]:
+    """-log L with a central-difference gradient from one vectorized call (2 d + 1 points)."""
+    logp = make_log_posterior(cfg, free, bao, bao_p_sensitivity)
+    lows = np.array([p.low for p in free])
+    highs = np.array([p.high for p in free])
+    eps = 1e-6 * (highs - lows)
+    d = len(free)
+    steps = np.concatenate([np.zeros((1, d)), np.diag(eps), -np.diag(eps)])
+
+    def f(x: np.ndarray) -> Tuple[float, np.ndarray]:
+        # En el borde de la caja el paso hacia fuera se refleja (diferencia lateral)
+        pts = x[None, :] + steps
+        lp = logp(np.clip(pts, lows, highs))
+        h = np.clip(x + eps, lows, highs) - np.clip(x - eps, lows, highs)
+        return -float(lp[0]), -(lp[1:d + 1] - lp[d + 1:]) / h
+
+    return f, logp
+
+
+def _minimize(f: Objective, x0: np.ndarray, bounds: List[Tuple[float, float]]) -> Tuple[np.ndarray, float, int]:
+    from scipy.optimize import minimize
+
+    r = minimize(f, x0, jac=True, method="L-BFGS-B", bounds=bounds, options=_OPTIONS)
+    return np.asarray(r.x, dtype=float), float(r.fun), int(r.nfev)
+
+
+def maximize_likelihood(
+    cfg: HQCBInferenceConfig,
+    *,
+    free: Sequence[FreeParameter] | None = None,
+    bao: BAOMockDataset | None = None,
+    bao_p_sensitivity: float | None = None,
+    seed: int | None = 0,
+) -> Dict[str, Any]:
+    """Global maximum of the likelihood inside the prior box of `free`.
+
+    Se evalúan _N_STARTS puntos aleatorios de la caja en una sola llamada
+    vectorizada y se pule con L-BFGS-B desde el mejor y desde el centro.
+    """
+    free = tuple(free) if free is not None else default_free_parameters(cfg)
+    f, logp = _nll(cfg, free, bao, bao_p_sensitivity)
+    lows = np.array([p.low for p in free])
+    highs = np.array([p.high for p in free])
+    bounds = list(zip(lows.tolist(), highs.tolist()))
+
+    rng = np.random.default_rng(seed)
+    starts = lows + (highs - lows) * rng.random((_N_STARTS, len(free)))
+    best = starts[int(np.argmax(logp(starts)))]
+    nfev = _N_STARTS
+    x_hat, f_hat = best, np.inf
+    for x0 in (best, 0.5 * (lows + highs)):
+        x, fx, n = _minimize(f, x0, bounds)
+        nfev += n
+        if fx < f_hat:
+            x_hat, f_hat = x, fx
+    return {
+        "theta": {p.name: float(v) for p, v in zip(free, x_hat)},
+        "logL_max": -float(f_hat),
+        "n_evaluations": nfev,
+    }
+
+
+def profile_likelihood(
+    cfg: HQCBInferenceConfig,
+    parameter: str,
+    *,
+    values: np.ndarray | None = None,
+    n_points: int = 41,
+    free: Sequence[FreeParameter] | None = None,
+    bao: BAOMockDataset | None = None,
+    bao_p_sensitivity: float | None = None,
+    mle: Dict[str, Any] | None = None,
+    as_arrays: bool = False,
+) -> Dict[str, object]:
+    """Profile of -log L in `parameter`, minimizing over the other free parameters.
+
+    Los puntos se recorren desde el MLE hacia cada extremo y cada minimización
+    arranca en la solución del punto anterior (warm start), así que cada paso
+    cuesta unas pocas evaluaciones. Los intervalos de Wilks resuelven
+    DeltaNLL(v) = wilks_delta(cl) con Brent sobre el perfil exacto.
+    """
+    free = tuple(free) if free is not None else default_free_parameters(cfg)
+    names = [p.name for p in free]
+    if parameter not in names:
+        raise ValueError(f"{parameter!r} is not a free parameter ({names})")
+    f, _ = _nll(cfg, free, bao, bao_p_sensitivity)
+    i_par = names.index(parameter)
+    rest = [i for i in range(len(free)) if i != i_par]
+    bounds = [(free[i].low, free[i].high) for i in rest]
+    b_lo, b_hi = np.array(bounds).T
+    lo, hi = free[i_par].low, free[i_par].high
+
+    if mle is None:
+        mle = maximize_likelihood(cfg, free=free, bao=bao, bao_p_sensitivity=bao_p_sensitivity)
+    theta_hat = np.array([mle["theta"][n] for n in names], dtype=float)
+    if values is None:
+        values = np.linspace(lo, hi, n_points)
+    values = np.sort(np.asarray(values, dtype=float))
+    if values.size == 0 or values[0] < lo or values[-1] > hi:
+        raise ValueError(f"profile values must lie in [{lo}, {hi}]")
+
+    def solve(v: float, x0: np.ndarray) -> Tuple[np.ndarray, float, int]:
+        def g(x: np.ndarray) -> Tuple[float, np.ndarray]:
+            full = np.empty(len(free))
+            full[i_par] = v
+            full[rest] = x
+            fv, grad = f(full)
+            return fv, grad[rest]
+
+        return _minimize(g, np.clip(x0, b_lo, b_hi), bounds)
+
+    nuis = np.empty((values.size, len(rest)))
+    prof = np.empty(values.size)
+    nfev = 0
+    start = int(np.argmin(np.abs(values - theta_hat[i_par])))
+    for order in (range(start, values.size), range(start - 1, -1, -1)):
+        prev: List[Tuple[float, np.ndarray]] = [(float(theta_hat[i_par]), theta_hat[rest])]
+        for k in order:
+            v = float(values[k])
+            x0 = prev[-1][1]
+            if len(prev) > 1 and prev[-1][0] != prev[-2][0]:
+                # Extrapolación lineal de la trayectoria de los nuisances
+                (v1, x1), (v2, x2) = prev[-2], prev[-1]
+                x0 = x2 + (x2 - x1) * (v - v2) / (v2 - v1)
+            nuis[k], prof[k], n = solve(v, x0)
+            prev = [prev[-1], (v, nuis[k])]
+            nfev += n
+
+    # Perfil continuo para Brent: arranque en el punto escaneado más cercano
+    def profile_at(v: float) -> float:
+        nonlocal nfev
+        if v == theta_hat[i_par]:
+            return -float(mle["logL_max"])
+        k = int(np.argmin(np.abs(values - v)))
+        _, fv, n = solve(v, nuis[k])
+        nfev += n
+        return fv
+
+    # Nodos monótonos: el MLE y los extremos locales del perfil escaneado
+    inner = np.nonzero(((prof[1:-1] <= prof[:-2]) & (prof[1:-1] <= prof[2:]))
+                       | ((prof[1:-1] >= prof[:-2]) & (prof[1:-1] >= prof[2:])))[0] + 1
+    breakpoints = [float(theta_hat[i_par]), *values[inner].tolist()]
+    intervals = {
+        f"{round(100 * cl)}": [list(iv) for iv in find_intervals_adaptive(
+            profile_at, wilks_delta(cl), lo, hi, breakpoints=breakpoints, xtol=1e-9)]
+        for cl in CONFIDENCE_LEVELS
+    }
+
+    nll_min = min(float(np.min(prof)), -float(mle["logL_max"]))
+
+    def out(a: np.ndarray) -> object:
+        return a if as_arrays else a.tolist()
+
+    return {
+        "parameter": parameter,
+        "values": out(values),
+        "nll": out(prof),
+        "delta_nll": out(prof - nll_min),
+        "nuisance": {names[i]: out(nuis[:, j]) for j, i in enumerate(rest)},
+        "mle": float(theta_hat[i_par]),
+        "intervals": intervals,
+        "n_evaluations": nfev,
+    }
+
+
+def exact_model_comparison(
+    cfg: HQCBInferenceConfig,
+    mle: Dict[str, Any],
+    *,
+    k: int = 2,
+    bao: BAOMockDataset | None = None,
+) -> Dict[str, object]:
+    """model_comparison with both maxima exact instead of taken on the grid.
+
+    En LCDM-toy (gamma = gamma_ref, rd_ratio = 1) el máximo en H0_local es la media
+    ponderada por precisión de ambas medidas, recortada al prior [H0_min, H0_max].
+    """
+    w1, w2 = cfg.H0_local_sigma ** -2, cfg.H0_early_sigma ** -2
+    H0_lcdm = float(np.clip((w1 * cfg.H0_local_obs + w2 * cfg.H0_early_obs) / (w1 + w2),
+                            cfg.H0_min, cfg.H0_max))
+    n_obs = 2
+    lcdm_extra = 0.0
+    if bao is not None:
+        n_obs += int(bao.z.shape[0])
+        lcdm_extra = float(bao_loglike_hqcb_grid(bao, cfg.gamma_ref, cfg.gamma_ref, cfg.kappa_b, 1.0))
+    return model_comparison(cfg, float(mle["logL_max"]), np.array([H0_lcdm]),
+                            k=k, n=n_obs, logL_lcdm_extra=lcdm_extra)
+
+
+@profiling.timed("profile")
+def profile_all(
+    cfg: HQCBInferenceConfig,
+    *,
+    parameters: Sequence[str] | None = None,
+    n_points: int = 41,
+    free: Sequence[FreeParameter] | None = None,
+    bao: BAOMockDataset | None = None,
+    bao_p_sensitivity: float | None = None,
+    as_arrays: bool = False,
+) -> Dict[str, object]:
+    """MLE, profiles of `parameters` (default: every free one) and exact AIC/BIC."""
+    free = tuple(free) if free is not None else default_free_parameters(cfg)
+    mle = maximize_likelihood(cfg, free=free, bao=bao, bao_p_sensitivity=bao_p_sensitivity)
+    names = list(parameters) if parameters is not None else [p.name for p in free]
+    profiles = {
+        n: profile_likelihood(cfg, n, n_points=n_points, free=free, bao=bao,
+                              bao_p_sensitivity=bao_p_sensitivity, mle=mle, as_arrays=as_arrays)
+        for n in names
+    }
+    return {
+        "mle": mle,
+        "profiles": profiles,
+        "model_comparison": exact_model_comparison(cfg, mle, k=len(free), bao=bao),
+        "config_echo": config_echo(cfg),
+    }
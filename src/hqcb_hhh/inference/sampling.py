@@ -0,0 +1,263 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Callable, Dict, Sequence, Tuple
+
+import numpy as np
+
+from .. import profiling
+
+from .likelihoods import BAOMockDataset, bao_loglike_hqcb_grid
+from .models import (
+    HQCBInferenceConfig,
+    config_echo,
+    grid_axes,
+    loglike_points,
+    model_comparison,
+    predict_H0_early,
+)
+
+# Parámetros que el muestreador puede dejar libres; gamma y H0_local lo están siempre
+PARAMETERS = ("gamma", "H0_local", "kappa_b", "beta_rd_sensitivity", "bao_p_sensitivity")
+
+LogPosterior = Callable[[np.ndarray], np.ndarray]
+
+
+@dataclass(frozen=True)
+class FreeParameter:
+    """A sampled parameter with a uniform prior on [low, high]."""
+    name: str
+    low: float
+    high: float
+
+
+def default_free_parameters(cfg: HQCBInferenceConfig) -> Tuple[FreeParameter, ...]:
+    return (
+        FreeParameter("gamma", cfg.gamma_min, cfg.gamma_max),
+        FreeParameter("H0_local", cfg.H0_min, cfg.H0_max),
+    )
+
+
+def make_log_posterior(
+    cfg: HQCBInferenceConfig,
+    free: Sequence[FreeParameter],
+    bao: BAOMockDataset | None = None,
+    bao_p_sensitivity: float | None = None,
+) -> LogPosterior:
+    """Vectorized log-posterior theta (M, d) -> (M,) with uniform priors on `free`.
+
+    Usa los mismos términos que grid_posterior (loglike_points) y, si hay dataset,
+    bao_loglike_hqcb_grid; los parámetros no libres se toman de cfg / bao_p_sensitivity.
+    """
+    names = [p.name for p in free]
+    unknown = set(names) - set(PARAMETERS)
+    if unknown:
+        raise ValueError(f"Unknown parameters: {sorted(unknown)}")
+    if len(set(names)) != len(names):
+        raise ValueError("Duplicate free parameters")
+    if "gamma" not in names or "H0_local" not in names:
+        raise ValueError("gamma and H0_local must be free parameters")
+    if any(not p.high > p.low for p in free):
+        raise ValueError("Each free parameter needs high > low")
+    if bao is None and "bao_p_sensitivity" in names:
+        raise ValueError("bao_p_sensitivity can only be free with a BAO dataset")
+    if bao is not None and "bao_p_sensitivity" not in names and bao_p_sensitivity is None:
+        raise ValueError("bao_p_sensitivity is required with a BAO dataset")
+
+    lows = np.array([p.low for p in free], dtype=float)
+    highs = np.array([p.high for p in free], dtype=float)
+    idx = {n: i for i, n in enumerate(names)}
+
+    def logp(theta: np.ndarray) -> np.ndarray:
+        theta = np.atleast_2d(np.asarray(theta, dtype=float))
+        out = np.full(theta.shape[0], -np.inf)
+        inside = np.all((theta >= lows) & (theta <= highs), axis=1)
+        if not inside.any():
+            return out
+        t = theta[inside]
+
+        def col(name: str, default: float | None) -> np.ndarray | float:
+            return t[:, idx[name]] if name in idx else float(default)  # type: ignore[arg-type]
+
+        g, h0 = t[:, idx["gamma"]], t[:, idx["H0_local"]]
+        kb = col("kappa_b", cfg.kappa_b)
+        ll = loglike_points(cfg, g, h0, kappa_b=kb, beta=col("beta_rd_sensitivity", cfg.beta_rd_sensitivity))
+        if bao is not None:
+            ll = ll + bao_loglike_hqcb_grid(bao, g, cfg.gamma_ref, kb, col("bao_p_sensitivity", bao_p_sensitivity))
+        out[inside] = ll
+        return out
+
+    return logp
+
+
+def ensemble_sample(
+    logp: LogPosterior,
+    p0: np.ndarray,
+    n_steps: int,
+    *,
+    a: float = 2.0,
+    rng: np.random.Generator | None = None,
+) -> Tuple[np.ndarray, np.ndarray, float]:
+    """Affine-invariant ensemble sampler (Goodman & Weare stretch move).
+
+    Los walkers se actualizan en dos mitades; cada mitad se propone frente a la
+    otra y se evalúa con una sola llamada vectorizada a logp.
+    Devuelve (chain (n_steps, W, d), log_prob (n_steps, W), fracción de aceptación).
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    x = np.array(p0, dtype=float)
+    n_walkers, d = x.shape
+    if n_walkers < 2 * d or n_walkers % 2:
+        raise ValueError("n_walkers must be even and >= 2 * n_dim")
+    if n_steps < 1:
+        raise ValueError("n_steps must be >= 1")
+    lp = logp(x)
+    if not np.all(np.isfinite(lp)):
+        raise ValueError("Initial walkers must have finite log-posterior")
+
+    chain = np.empty((n_steps, n_walkers, d))
+    log_prob = np.empty((n_steps, n_walkers))
+    half = n_walkers // 2
+    halves = (np.arange(half), np.arange(half, n_walkers))
+    accepted = 0
+    for step in range(n_steps):
+        for s, c in (halves, halves[::-1]):
+            # z ~ g(z) ∝ 1/sqrt(z) en [1/a, a]
+            z = ((a - 1.0) * rng.random(half) + 1.0) ** 2 / a
+            partners = x[c[rng.integers(0, half, size=half)]]
+            prop = partners + z[:, None] * (x[s] - partners)
+            lp_prop = logp(prop)
+            log_accept = (d - 1) * np.log(z) + lp_prop - lp[s]
+            ok = np.log(rng.random(half)) < log_accept
+            x[s[ok]] = prop[ok]
+            lp[s[ok]] = lp_prop[ok]
+            accepted += int(np.count_nonzero(ok))
+        chain[step] = x
+        log_prob[step] = lp
+    return chain, log_prob, accepted / (n_steps * n_walkers)
+
+
+def integrated_autocorr_time(x: np.ndarray, c: float = 5.0) -> float:
+    """Integrated autocorrelation time of a (n_steps, n_walkers) chain of one parameter.
+
+    Autocorrelación por FFT promediada sobre walkers y ventana automática de
+    Sokal (la menor M con M >= c * tau(M)).
+    """
+    x = np.asarray(x, dtype=float)
+    n = x.shape[0]
+    if n < 2:
+        raise ValueError("Need at least 2 steps")
+    y = x - x.mean(axis=0)
+    nfft = 1 << (2 * n - 1).bit_length()
+    f = np.fft.rfft(y, n=nfft, axis=0)
+    acf = np.fft.irfft(f * np.conjugate(f), n=nfft, axis=0)[:n]
+    var = acf[0]
+    ok = var > 0
+    if not ok.any():
+        return float("nan")
+    rho = np.mean(acf[:, ok] / var[ok], axis=1)
+    taus = 2.0 * np.cumsum(rho) - 1.0
+    m = np.arange(n) < c * taus
+    window = int(np.argmin(m)) if not m.all() else n - 1
+    return float(taus[window])
+
+
+@profiling.timed("sample")
+def sample_posterior(
+    cfg: HQCBInferenceConfig,
+    *,
+    free: Sequence[FreeParameter] | None = None,
+    bao: BAOMockDataset | None = None,
+    bao_p_sensitivity: float | None = None,
+    n_walkers: int = 32,
+    n_steps: int = 2000,
+    burn: int | None = None,
+    seed: int | None = 0,
+    as_arrays: bool = False,
+) -> Dict[str, object]:
+    """Ensemble-sampler alternative to grid_posterior for more than two free parameters.
+
+    Devuelve summary/model_comparison/config_echo con la misma estructura que
+    grid_posterior (intervalos por cuantiles de las muestras, MAP = muestra de
+    máxima log-posterior), más "samples" y "diagnostics" (aceptación, tiempo de
+    autocorrelación y tamaño efectivo de muestra por parámetro).
+    """
+    free = tuple(free) if free is not None else default_free_parameters(cfg)
+    logp = make_log_posterior(cfg, free, bao, bao_p_sensitivity)
+    burn = n_steps // 4 if burn is None else burn
+    if not 0 <= burn < n_steps:
+        raise ValueError("burn must be in [0, n_steps)")
+
+    rng = np.random.default_rng(seed)
+    lows = np.array([p.low for p in free])
+    highs = np.array([p.high for p in free])
+    p0 = lows + (highs - lows) * rng.random((n_walkers, len(free)))
+    chain, log_prob, acc = ensemble_sample(logp, p0, n_steps, rng=rng)
+
+    kept, kept_lp = chain[burn:], log_prob[burn:]
+    flat = kept.reshape(-1, len(free))
+    flat_lp = kept_lp.reshape(-1)
+    names = [p.name for p in free]
+    i_map = int(np.argmax(log_prob))
+    theta_map = chain.reshape(-1, len(free))[i_map]
+    logL_max = float(log_prob.reshape(-1)[i_map])
+
+    tau = {n: integrated_autocorr_time(kept[:, :, i]) for i, n in enumerate(names)}
+    n_samples = int(flat.shape[0])
+    ess = {n: float(n_samples / t) if t > 0 else float("nan") for n, t in tau.items()}
+
+    params: Dict[str, Dict[str, object]] = {}
+    for i, n in enumerate(names):
+        q = np.quantile(flat[:, i], [0.025, 0.16, 0.84, 0.975])
+        params[n] = {
+            "mean": float(np.mean(flat[:, i])),
+            "std": float(np.std(flat[:, i])),
+            "map": float(theta_map[i]),
+            "q68": [float(q[1]), float(q[2])],
+            "q95": [float(q[0]), float(q[3])],
+        }
+
+    at_map = dict(zip(names, theta_map.tolist()))
+    H0_early_map = float(predict_H0_early(
+        at_map["H0_local"], cfg.z_rec, at_map["gamma"], cfg.gamma_ref,
+        at_map.get("kappa_b", cfg.kappa_b), at_map.get("beta_rd_sensitivity", cfg.beta_rd_sensitivity),
+    ))
+
+    n_obs = 2
+    lcdm_extra = 0.0
+    if bao is not None:
+        # En gamma = gamma_ref alpha = 0 y la predicción BAO no depende de p_sens
+        n_obs += int(bao.z.shape[0])
+        lcdm_extra = float(bao_loglike_hqcb_grid(bao, cfg.gamma_ref, cfg.gamma_ref, cfg.kappa_b, 1.0))
+
+    def out(a: np.ndarray) -> object:
+        return a if as_arrays else a.tolist()
+
+    return {
+        "summary": {
+            "gamma_mean": params["gamma"]["mean"],
+            "gamma_map": params["gamma"]["map"],
+            "gamma_68": params["gamma"]["q68"],
+            "gamma_95": params["gamma"]["q95"],
+            "H0_local_mean": params["H0_local"]["mean"],
+            "H0_local_map": params["H0_local"]["map"],
+            "H0_early_pred_map": H0_early_map,
+        },
+        "parameters": params,
+        "model_comparison": model_comparison(
+            cfg, logL_max, grid_axes(cfg)[1], k=len(free), n=n_obs, logL_lcdm_extra=lcdm_extra
+        ),
+        "samples": {**{n: out(flat[:, i]) for i, n in enumerate(names)}, "log_posterior": out(flat_lp)},
+        "diagnostics": {
+            "acceptance_fraction": acc,
+            "n_walkers": n_walkers,
+            "n_steps": n_steps,
+            "burn": burn,
+            "n_samples": n_samples,
+            "autocorr_time": tau,
+            "ess": ess,
+            # Criterio habitual: cadena > 50 tiempos de autocorrelación
+            "converged": bool(all(np.isfinite(t) and n_steps - burn > 50 * t for t in tau.values())),
+        },
+        "config_echo": config_echo(cfg),
+    }
@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import itertools
+from dataclasses import dataclass
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from .. import profiling
+from .likelihoods import BAOMockDataset, bao_loglike_hqcb_grid
+from .models import (
+    _BACKENDS,
+    DEFAULT_BLOCK_MEMORY_MB,
+    HQCBInferenceConfig,
+    block_rows_for_budget,
+    credible_interval_1d,
+    grid_axes,
+    loglike_gaussian,
+    model_comparison,
+    predict_H0_early,
+)
+
+SWEEP_COLUMNS = [
+    "kappa_b", "beta_rd_sensitivity", "bao_p_sensitivity",
+    "gamma_mean", "gamma_map", "gamma_68_lo", "gamma_68_hi", "gamma_95_lo", "gamma_95_hi",
+    "H0_local_map", "logL_max", "delta_AIC", "delta_BIC",
+]
+
+# Columnas añadidas cuando hay dataset BAO (posterior reponderado como en infer-data)
+SWEEP_JOINT_COLUMNS = [
+    "gamma_mean_joint", "gamma_map_joint", "gamma_68_lo_joint", "gamma_68_hi_joint",
+    "gamma_95_lo_joint", "gamma_95_hi_joint", "logL_max_joint", "delta_AIC_joint", "delta_BIC_joint",
+]
+
+
+@dataclass(frozen=True)
+class H0Block:
+    """Dense-grid sufficient statistics for a block of closure products kappa_b * beta."""
+    row_logsumexp: np.ndarray   # shape (n_c, n_gamma): log sum_j exp(logL[c, i, j])
+    row_max: np.ndarray         # shape (n_c, n_gamma): max_j logL[c, i, j]
+    argmax: np.ndarray          # shape (n_c, 2): índice (i, j) del máximo de cada malla
+
+
+def h0_block(cfg: HQCBInferenceConfig, products: np.ndarray) -> H0Block:
+    """loglike_grid for every product c = kappa_b * beta of the block at once.
+
+    H0_early depende de (kappa_b, beta) sólo a través de su producto, y el término
+    de H0_local es común a todas las mallas: se evalúa una vez y se suma por broadcasting.
+    """
+    gammas, H0s = grid_axes(cfg)
+    c = np.asarray(products, dtype=float)
+    r = np.asarray(predict_H0_early(1.0, cfg.z_rec, gammas[None, :], cfg.gamma_ref, c[:, None], 1.0))
+    ll_local = np.asarray(loglike_gaussian(cfg.H0_local_obs, H0s, cfg.H0_local_sigma), dtype=float)
+    ll = np.asarray(loglike_gaussian(cfg.H0_early_obs, r[:, :, None] * H0s[None, None, :],
+                                     cfg.H0_early_sigma), dtype=float)
+    ll += ll_local[None, None, :]
+    profiling.count("loglike_grid.cells", ll.size)
+
+    flat = np.argmax(ll.reshape(c.shape[0], -1), axis=1)
+    row_max = np.max(ll, axis=2)
+    m = np.max(row_max, axis=1)
+    ll -= m[:, None, None]
+    np.exp(ll, out=ll)
+    with np.errstate(divide="ignore"):
+        row_logsumexp = m[:, None] + np.log(np.sum(ll, axis=2))
+    return H0Block(row_logsumexp=row_logsumexp, row_max=row_max,
+                   argmax=np.stack(np.divmod(flat, H0s.shape[0]), axis=1))
+
+
+def _h0_blocks(
+    cfg: HQCBInferenceConfig, products: np.ndarray, rows: int, workers: int, backend: str
+) -> H0Block:
+    starts = list(range(0, products.shape[0], rows))
+    chunks = [products[i0:i0 + rows] for i0 in starts]
+    if workers == 1 or len(chunks) == 1:
+        blocks = [h0_block(cfg, ch) for ch in chunks]
+    else:
+        from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+        pool_cls = ThreadPoolExecutor if backend == "thread" else ProcessPoolExecutor
+        with pool_cls(max_workers=workers) as pool:
+            blocks = list(pool.map(h0_block, [cfg] * len(chunks), chunks))
+    return H0Block(
+        row_logsumexp=np.concatenate([b.row_logsumexp for b in blocks]),
+        row_max=np.concatenate([b.row_max for b in blocks]),
+        argmax=np.concatenate([b.argmax for b in blocks]),
+    )
+
+
+def _normalize(logw: np.ndarray) -> np.ndarray:
+    # Filas de log-pesos -> probabilidades (estable)
+    w = np.exp(logw - np.max(logw, axis=1, keepdims=True))
+    Z = np.sum(w, axis=1, keepdims=True)
+    if not np.all(np.isfinite(Z)) or np.any(Z <= 0):
+        raise RuntimeError("Posterior normalization failed")
+    p: np.ndarray = w / Z
+    return p
+
+
+def _interval_columns(gammas: np.ndarray, p: np.ndarray, suffix: str = "") -> Dict[str, float]:
+    lo68, hi68 = credible_interval_1d(gammas, p, 0.68)
+    lo95, hi95 = credible_interval_1d(gammas, p, 0.95)
+    return {f"gamma_68_lo{suffix}": lo68, f"gamma_68_hi{suffix}": hi68,
+            f"gamma_95_lo{suffix}": lo95, f"gamma_95_hi{suffix}": hi95}
+
+
+def _delta_ic(
+    cfg: HQCBInferenceConfig, logL_max: np.ndarray, H0s: np.ndarray, **kwargs: Any
+) -> Tuple[np.ndarray, np.ndarray]:
+    # delta_AIC/BIC de model_comparison para muchos logL_max: el lado LCDM es común y
+    # ambas diferencias son lineales en logL_max (+2 logL_max)
+    base = model_comparison(cfg, 0.0, H0s, **kwargs)
+    two_ll = 2.0 * np.asarray(logL_max, dtype=float)
+    return float(base["delta_AIC"]) + two_ll, float(base["delta_BIC"]) + two_ll
+
+
+def closure_combinations(
+    kappa_b: Sequence[float], beta: Sequence[float], p_sens: Sequence[float] = (0.0,)
+) -> List[Tuple[float, float, float]]:
+    """Cartesian product kappa_b x beta x p_sens, in that nesting order."""
+    combos = [(float(k), float(b), float(p)) for k, b, p in itertools.product(kappa_b, beta, p_sens)]
+    if not combos:
+        raise ValueError("empty sweep: every parameter needs at least one value")
+    return combos
+
+
+@profiling.timed("sweep")
+def sweep_closure(
+    cfg: HQCBInferenceConfig,
+    kappa_b: Sequence[float],
+    beta: Sequence[float],
+    p_sens: Sequence[float] | None = None,
+    *,
+    bao: BAOMockDataset | None = None,
+    memory_budget_mb: float | None = None,
+    workers: int = 1,
+    backend: str = "thread",
+) -> Dict[str, Any]:
+    """Dense-grid posterior summaries (and BAO-reweighted ones) for every closure combination.
+
+    Equivale a grid_posterior(method="grid") más la reponderación BAO de infer-data
+    para cada (kappa_b, beta, p_sens) del producto cartesiano, pero el posterior
+    H0 sólo se evalúa una vez por producto kappa_b * beta distinto y la likelihood
+    BAO una vez por producto kappa_b * p_sens distinto, en bloques de mallas
+    apiladas dentro de memory_budget_mb (repartidos en un pool con workers > 1).
+    """
+    if workers < 1:
+        raise ValueError("workers must be >= 1")
+    if backend not in _BACKENDS:
+        raise ValueError(f"backend must be one of {_BACKENDS}, got {backend!r}")
+    if (p_sens is None) != (bao is None):
+        raise ValueError("p_sens values go with a BAO dataset (pass both or neither)")
+    combos = closure_combinations(kappa_b, beta, (0.0,) if p_sens is None else p_sens)
+    profiling.count("sweep.combinations", len(combos))
+    kb = np.array([c[0] for c in combos])
+    h0_products, h0_index = np.unique(kb * np.array([c[1] for c in combos]), return_inverse=True)
+
+    gammas, H0s = grid_axes(cfg)
+    # Bloques de mallas completas (n_gamma x n_H0) dentro del presupuesto
+    rows = block_rows_for_budget(gammas.shape[0] * H0s.shape[0],
+                                 DEFAULT_BLOCK_MEMORY_MB if memory_budget_mb is None else memory_budget_mb)
+    if workers > 1:
+        rows = min(rows, -(-h0_products.shape[0] // workers))
+    h0 = _h0_blocks(cfg, h0_products, rows, workers, backend)
+    p_gamma = _normalize(h0.row_logsumexp)
+    logL_max = np.max(h0.row_max, axis=1)
+
+    # Resúmenes H0-only: uno por malla distinta, luego se reparten a las combinaciones
+    h0_rows = [{
+        "gamma_mean": float(gammas @ p_gamma[u]), "gamma_map": float(gammas[h0.argmax[u, 0]]),
+        **_interval_columns(gammas, p_gamma[u]),
+        "H0_local_map": float(H0s[h0.argmax[u, 1]]), "logL_max": float(logL_max[u]),
+    } for u in range(h0_products.shape[0])]
+    d_aic, d_bic = _delta_ic(cfg, logL_max, H0s)
+
+    table: List[Dict[str, Any]] = []
+    for n, (k, b, p) in enumerate(combos):
+        u = int(h0_index[n])
+        table.append({"kappa_b": k, "beta_rd_sensitivity": b, "bao_p_sensitivity": p if bao is not None else None,
+                      **h0_rows[u], "delta_AIC": float(d_aic[u]), "delta_BIC": float(d_bic[u])})
+
+    n_bao = 0
+    if bao is not None:
+        # alpha * p_sens = -(kappa_b * p_sens) (gamma - gamma_ref): un log L BAO por producto
+        bao_products, bao_index = np.unique(kb * np.array([c[2] for c in combos]), return_inverse=True)
+        bao_ll = bao_loglike_hqcb_grid(bao, gammas[None, :], cfg.gamma_ref, bao_products[:, None], 1.0)
+        n_bao = int(bao_products.shape[0])
+        logw = bao_ll[bao_index]
+        # Reponderación de p(gamma) como en infer-data; el máximo conjunto es max_gamma(max_H0 + BAO)
+        with np.errstate(divide="ignore"):
+            p_joint = _normalize(np.log(p_gamma[h0_index]) + logw)
+        logL_joint = np.max(h0.row_max[h0_index] + logw, axis=1)
+        # En gamma = gamma_ref alpha = 0 y la predicción BAO no depende de p_sens
+        lcdm_extra = float(bao_loglike_hqcb_grid(bao, cfg.gamma_ref, cfg.gamma_ref, cfg.kappa_b, 1.0))
+        dj_aic, dj_bic = _delta_ic(cfg, logL_joint, H0s, n=2 + int(bao.z.shape[0]), logL_lcdm_extra=lcdm_extra)
+        means = p_joint @ gammas
+        maps = gammas[np.argmax(p_joint, axis=1)]
+        for n, row in enumerate(table):
+            row.update({
+                "gamma_mean_joint": float(means[n]), "gamma_map_joint": float(maps[n]),
+                **_interval_columns(gammas, p_joint[n], "_joint"),
+                "logL_max_joint": float(logL_joint[n]),
+                "delta_AIC_joint": float(dj_aic[n]), "delta_BIC_joint": float(dj_bic[n]),
+            })
+
+    return {
+        "columns": SWEEP_COLUMNS + (SWEEP_JOINT_COLUMNS if bao is not None else []),
+        "rows": table,
+        "n_combinations": len(combos),
+        "n_h0_grids": int(h0_products.shape[0]),
+        "n_bao_curves": n_bao,
+    }
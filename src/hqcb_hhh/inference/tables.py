@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Callable, Sequence
+
+import numpy as np
+
+from ..cache import cache_key, file_digest
+
+DEFAULT_TABLE_CACHE_DIR = ".hqcb_cache/tables"
+
+# Formatos binarios de matriz (se cargan sin parseo; .npy con memory-map)
+BINARY_MATRIX_SUFFIXES = (".npy",)
+
+
+def _data_start(path: Path) -> int:
+    """Number of raw lines before the first numeric row (comments, blanks and a header)."""
+    with open(path, "r", encoding="utf-8") as fh:
+        for i, line in enumerate(fh):
+            s = line.strip()
+            if not s or s.startswith("#"):
+                continue
+            try:
+                float(s.split(",")[0])
+            except ValueError:
+                continue   # cabecera (p. ej. "z,dv_over_rd")
+            return i
+    return 0
+
+
+def read_csv_columns(path: str | Path, usecols: Sequence[int]) -> np.ndarray:
+    """Numeric CSV columns in one vectorized pass, shape (n_rows, len(usecols)).
+
+    Las líneas vacías, los comentarios '#' y la cabecera se saltan; el resto lo
+    parsea np.loadtxt en C (sin split por línea en Python).
+    """
+    p = Path(path)
+    data = np.loadtxt(p, delimiter=",", comments="#", skiprows=_data_start(p),
+                      usecols=tuple(usecols), ndmin=2, dtype=float)
+    return np.ascontiguousarray(data)
+
+
+def load_matrix(path: str | Path) -> np.ndarray:
+    """Square matrix from text (whitespace-separated) or .npy (memory-mapped, read-only)."""
+    p = Path(path)
+    m: np.ndarray
+    if p.suffix.lower() in BINARY_MATRIX_SUFFIXES:
+        m = np.load(p, mmap_mode="r")
+    else:
+        m = np.loadtxt(p, dtype=float, ndmin=2)
+    if m.ndim != 2 or m.shape[0] != m.shape[1]:
+        raise ValueError("Covariance must be square")
+    return m
+
+
+class TableCache:
+    """Parsed binary copies of data files, keyed by the source contents.
+
+    Cada fuente tiene una entrada de índice con (size, mtime_ns, sha256): si tamaño
+    y mtime coinciden se reutiliza el hash sin releer el fichero; si no, se recalcula
+    (un fichero tocado pero idéntico sigue acertando). Los arrays derivados se guardan
+    como .npy bajo cache_key(sha256, nombre) -que incluye versión y huella de las
+    fuentes- y se cargan con memory-map.
+    """
+
+    def __init__(self, root: str | Path = DEFAULT_TABLE_CACHE_DIR) -> None:
+        self.root = Path(root)
+
+    def _index_path(self, source: Path) -> Path:
+        tag = hashlib.sha256(str(source.resolve()).encode("utf-8")).hexdigest()[:32]
+        return self.root / "index" / f"{tag}.json"
+
+    def digest(self, source: str | Path) -> str:
+        src = Path(source)
+        st = src.stat()
+        idx = self._index_path(src)
+        try:
+            doc = json.loads(idx.read_text(encoding="utf-8"))
+            if doc["size"] == st.st_size and doc["mtime_ns"] == st.st_mtime_ns:
+                return str(doc["sha256"])
+        except (OSError, ValueError, KeyError):
+            pass
+        digest = file_digest(src)
+        idx.parent.mkdir(parents=True, exist_ok=True)
+        tmp = idx.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps({"path": str(src.resolve()), "size": st.st_size,
+                                   "mtime_ns": st.st_mtime_ns, "sha256": digest}), encoding="utf-8")
+        os.replace(tmp, idx)
+        return digest
+
+    def path(self, source: str | Path, name: str) -> Path:
+        key = cache_key("table", {"sha256": self.digest(source), "name": name})
+        return self.root / f"{key}.npy"
+
+    def get(self, source: str | Path, name: str) -> np.ndarray | None:
+        p = self.path(source, name)
+        if not p.exists():
+            return None
+        try:
+            m: np.ndarray = np.load(p, mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+        os.utime(p)  # marca de uso para el LRU de ResultCache
+        return m
+
+    def put(self, source: str | Path, name: str, array: np.ndarray) -> Path:
+        p = self.path(source, name)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        tmp = p.with_name(p.stem + ".tmp.npy")
+        np.save(tmp, np.asarray(array))
+        os.replace(tmp, p)
+        return p
+
+    def array(self, source: str | Path, name: str, build: Callable[[], np.ndarray]) -> np.ndarray:
+        """Cached array `name` derived from `source`, built (and stored) on a miss."""
+        hit = self.get(source, name)
+        if hit is not None:
+            return hit
+        value = build()
+        self.put(source, name, value)
+        return value
@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import partial
+from typing import Dict, Mapping
+
+import numpy as np
+
+from .. import profiling
+from ..likelihood import wilks_delta
+from ..toys import DEFAULT_BATCH_SIZE, coverage_summary, pull_summary, run_batches
+from .likelihoods import BAOMockDataset, alpha_from_gamma, hqcb_predict_dv_over_rd_ratio
+from .models import HQCBInferenceConfig, predict_H0_early
+
+# Iteraciones de sección áurea tras el barrido grueso: el corchete se reduce en 0.618^n
+_GOLDEN_ITERS = 48
+_INV_PHI = (np.sqrt(5.0) - 1.0) / 2.0
+
+
+@dataclass(frozen=True)
+class HQCBToyModel:
+    """Likelihood of the inference toys: H0_local, H0_early and optionally the BAO vector.
+
+    Con bao, las observaciones de toy sustituyen a dv_over_rd y la predicción usa
+    el dv_over_rd del dataset como fiducial fijo (igual que bao_loglike_hqcb).
+    """
+    cfg: HQCBInferenceConfig
+    bao: BAOMockDataset | None = None
+    bao_p_sensitivity: float = 0.0
+
+    def expected(self, gamma: float, H0_local: float) -> Dict[str, np.ndarray | float]:
+        cfg = self.cfg
+        out: Dict[str, np.ndarray | float] = {
+            "H0_local": float(H0_local),
+            "H0_early": float(predict_H0_early(H0_local, cfg.z_rec, gamma, cfg.gamma_ref, cfg.kappa_b,
+                                               cfg.beta_rd_sensitivity)),
+        }
+        if self.bao is not None:
+            out["bao"] = self._bao_pred(np.array([gamma]))[0]
+        return out
+
+    def _bao_pred(self, gamma: np.ndarray) -> np.ndarray:
+        assert self.bao is not None
+        a = alpha_from_gamma(gamma, self.cfg.gamma_ref, self.cfg.kappa_b)
+        ratio = hqcb_predict_dv_over_rd_ratio(self.bao.z[None, :], np.asarray(a)[:, None],
+                                              self.bao_p_sensitivity)
+        pred: np.ndarray = self.bao.dv_over_rd[None, :] * ratio
+        return pred
+
+    def nll(self, gamma: np.ndarray, H0: np.ndarray, obs: Mapping[str, np.ndarray]) -> np.ndarray:
+        """-log L (sin constantes) de cada toy en su propio (gamma, H0)."""
+        cfg = self.cfg
+        r = predict_H0_early(1.0, cfg.z_rec, gamma, cfg.gamma_ref, cfg.kappa_b, cfg.beta_rd_sensitivity)
+        out = (0.5 * ((obs["H0_local"] - H0) / cfg.H0_local_sigma) ** 2
+               + 0.5 * ((obs["H0_early"] - r * H0) / cfg.H0_early_sigma) ** 2)
+        if self.bao is not None:
+            out = out + 0.5 * self.bao.cov_factor.chi2(obs["bao"] - self._bao_pred(gamma))
+        return np.asarray(out, dtype=float)
+
+    def profile_H0(self, gamma: np.ndarray, obs: Mapping[str, np.ndarray]) -> np.ndarray:
+        """Exact argmin over H0_local in [H0_min, H0_max] at fixed gamma (the NLL is quadratic in H0)."""
+        cfg = self.cfg
+        r = predict_H0_early(1.0, cfg.z_rec, gamma, cfg.gamma_ref, cfg.kappa_b, cfg.beta_rd_sensitivity)
+        w1, w2 = cfg.H0_local_sigma ** -2, cfg.H0_early_sigma ** -2
+        mu = (obs["H0_local"] * w1 + r * obs["H0_early"] * w2) / (w1 + r * r * w2)
+        return np.asarray(np.clip(mu, cfg.H0_min, cfg.H0_max), dtype=float)
+
+    def profile(self, gamma: np.ndarray, obs: Mapping[str, np.ndarray]) -> np.ndarray:
+        return self.nll(gamma, self.profile_H0(gamma, obs), obs)
+
+    def draw(self, rng: np.random.Generator, n: int, gamma: float, H0_local: float) -> Dict[str, np.ndarray]:
+        mean = self.expected(gamma, H0_local)
+        obs = {
+            "H0_local": mean["H0_local"] + self.cfg.H0_local_sigma * rng.standard_normal(n),
+            "H0_early": mean["H0_early"] + self.cfg.H0_early_sigma * rng.standard_normal(n),
+        }
+        if self.bao is not None:
+            # y = mu + L z con la Cholesky del dataset
+            z = rng.standard_normal((n, self.bao.cov_factor.n))
+            obs["bao"] = np.asarray(mean["bao"])[None, :] + z @ self.bao.cov_factor.chol.T
+        return obs
+
+
+def fit_toys(model: HQCBToyModel, obs: Mapping[str, np.ndarray], n_scan: int = 101,
+             H0_fixed: float | None = None) -> Dict[str, np.ndarray]:
+    """Batched MLE of every toy: (gamma_hat, H0_local_hat, nll_min).
+
+    H0_local se perfila en forma cerrada (o se fija en H0_fixed); en gamma se barre
+    una malla común de n_scan nodos (una evaluación vectorizada sobre todos los
+    toys por nodo) y se refina con sección áurea en el corchete de cada toy.
+    """
+    cfg = model.cfg
+    n = obs["H0_local"].shape[0]
+    if H0_fixed is None:
+        def objective(g: np.ndarray) -> np.ndarray:
+            return model.profile(g, obs)
+    else:
+        H0 = np.full(n, float(H0_fixed))
+
+        def objective(g: np.ndarray) -> np.ndarray:
+            return model.nll(g, H0, obs)
+
+    nodes = np.linspace(cfg.gamma_min, cfg.gamma_max, n_scan)
+    prof = np.empty((n_scan, n))
+    for j, g in enumerate(nodes):
+        prof[j] = objective(np.full(n, g))
+    j = np.argmin(prof, axis=0)
+    a = nodes[np.maximum(j - 1, 0)]
+    b = nodes[np.minimum(j + 1, n_scan - 1)]
+
+    c = b - _INV_PHI * (b - a)
+    d = a + _INV_PHI * (b - a)
+    fc, fd = objective(c), objective(d)
+    for _ in range(_GOLDEN_ITERS):
+        # Un solo punto nuevo por toy e iteración: c a la izquierda o d a la derecha
+        left = fc < fd
+        b = np.where(left, d, b)
+        a = np.where(left, a, c)
+        x = np.where(left, b - _INV_PHI * (b - a), a + _INV_PHI * (b - a))
+        fx = objective(x)
+        c, d = np.where(left, x, d), np.where(left, c, x)
+        fc, fd = np.where(left, fx, fd), np.where(left, fc, fx)
+    g_hat = 0.5 * (a + b)
+    f_hat = objective(g_hat)
+    # El nodo del barrido puede quedar por debajo (extremo del rango)
+    f_node = prof[j, np.arange(n)]
+    better = f_node < f_hat
+    g_hat = np.where(better, nodes[j], g_hat)
+    f_hat = np.where(better, f_node, f_hat)
+    H0_hat = model.profile_H0(g_hat, obs) if H0_fixed is None else H0
+    return {"gamma_hat": g_hat, "H0_local_hat": H0_hat, "nll_min": f_hat}
+
+
+def _hqcb_batch(model: HQCBToyModel, gamma_true: float, H0_true: float, n_scan: int,
+                rng: np.random.Generator, n: int) -> Dict[str, np.ndarray]:
+    obs = model.draw(rng, n, gamma_true, H0_true)
+    fit = fit_toys(model, obs, n_scan)
+    at_H0 = fit_toys(model, obs, n_scan, H0_fixed=H0_true)
+    g = np.full(n, gamma_true)
+    d_g = model.profile(g, obs) - fit["nll_min"]
+    d_h = at_H0["nll_min"] - fit["nll_min"]
+    d_joint = model.nll(g, np.full(n, H0_true), obs) - fit["nll_min"]
+    return {
+        "gamma_hat": fit["gamma_hat"],
+        "H0_local_hat": fit["H0_local_hat"],
+        "delta_nll_gamma": np.maximum(d_g, 0.0),
+        "delta_nll_H0_local": np.maximum(d_h, 0.0),
+        "delta_nll_joint": np.maximum(d_joint, 0.0),
+    }
+
+
+@profiling.timed("toys")
+def hqcb_toys(
+    cfg: HQCBInferenceConfig,
+    *,
+    n_toys: int = 100_000,
+    gamma_true: float | None = None,
+    H0_local_true: float | None = None,
+    bao: BAOMockDataset | None = None,
+    bao_p_sensitivity: float | None = None,
+    n_scan: int = 101,
+    seed: int | None = 0,
+    workers: int = 1,
+    batch_size: int = DEFAULT_BATCH_SIZE // 4,
+    keep_toys: bool = False,
+) -> Dict[str, object]:
+    """Coverage of the Wilks gamma intervals and (gamma, H0_local) regions, and pulls.
+
+    Verdad por defecto: gamma_ref y H0_local_obs. Cobertura de cada parámetro con
+    su perfil (1 gdl) y conjunta con la NLL en la verdad (2 gdl); los pulls son las
+    raíces con signo de los perfiles, sign(hat - true) * sqrt(2 DeltaNLL(true)).
+    """
+    if bao is not None and bao_p_sensitivity is None:
+        raise ValueError("bao_p_sensitivity is required with a BAO dataset")
+    g_true = cfg.gamma_ref if gamma_true is None else float(gamma_true)
+    h_true = cfg.H0_local_obs if H0_local_true is None else float(H0_local_true)
+    if not (cfg.gamma_min <= g_true <= cfg.gamma_max and cfg.H0_min <= h_true <= cfg.H0_max):
+        raise ValueError("truth must lie inside the prior box")
+    model = HQCBToyModel(cfg, bao, float(bao_p_sensitivity or 0.0))
+    t = run_batches(partial(_hqcb_batch, model, g_true, h_true, n_scan), n_toys,
+                    seed=seed, workers=workers, batch_size=batch_size)
+
+    levels = {"68": wilks_delta(0.68), "95": wilks_delta(0.95)}
+    joint = {k: -float(np.log1p(-cl)) for k, cl in (("68", 0.68), ("95", 0.95))}
+    pull_g = np.sign(t["gamma_hat"] - g_true) * np.sqrt(2.0 * t["delta_nll_gamma"])
+    pull_h = np.sign(t["H0_local_hat"] - h_true) * np.sqrt(2.0 * t["delta_nll_H0_local"])
+    res: Dict[str, object] = {
+        "n_toys": n_toys,
+        "seed": seed,
+        "truth": {"gamma": g_true, "H0_local": h_true},
+        "coverage": {
+            "gamma": coverage_summary(t["delta_nll_gamma"], levels),
+            "H0_local": coverage_summary(t["delta_nll_H0_local"], levels),
+            "joint": coverage_summary(t["delta_nll_joint"], joint, dof=2),
+        },
+        "pulls": {"gamma": pull_summary(pull_g), "H0_local": pull_summary(pull_h)},
+    }
+    if keep_toys:
+        res["toys"] = {**t, "pull_gamma": pull_g, "pull_H0_local": pull_h}
+    return res
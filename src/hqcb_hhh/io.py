@@ -2,10 +2,12 @@
 # SPDX-License-Identifier: AGPL-3.0-or-later
 from __future__ import annotations
 
+import json
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, List, Tuple
-import yaml
+from typing import Any, Callable, Dict, List, Literal, Tuple
+
+from .profiling import timed
 
 @dataclass(frozen=True)
 class Config:
@@ -16,12 +18,17 @@ class Config:
     n_grid: int
     cl68_delta_nll: float
     cl95_delta_nll: float
+    lumi_abinv: float = 3.0
 
+@timed("load_config")
 def load_config(path: str | Path) -> Config:
+    import yaml  # deferred: keeps `import hqcb_hhh.io` cheap
+
     p = Path(path)
     data: Dict[str, Any] = yaml.safe_load(p.read_text(encoding="utf-8"))
 
     rel_unc = float(data["assumptions"]["rel_uncert_rate"])
+    lumi = float(data["assumptions"].get("lumi_abinv", 3.0))
     pts = [(float(r["kappa_lambda"]), float(r["sigma_fb"])) for r in data["sigma_points_fb"]]
 
     scan = data["scan"]
@@ -35,4 +42,101 @@ def load_config(path: str | Path) -> Config:
         n_grid=int(scan["n_grid"]),
         cl68_delta_nll=float(intervals["cl68_delta_nll"]),
         cl95_delta_nll=float(intervals["cl95_delta_nll"]),
+        lumi_abinv=lumi,
     )
+
+# --- pipeline results: JSON, or JSON sidecar + binary arrays ---
+
+RESULT_FORMATS = ("json", "npy", "npz")
+_ARRAY_TAG = "__array__"
+
+def _jsonable(o: Any) -> Any:
+    # json.dumps(default=...): arrays (y escalares numpy) a tipos nativos
+    if hasattr(o, "tolist"):
+        return o.tolist()
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+def _split_ndarrays(obj: Any, path: str, arrays: Dict[str, Any]) -> Any:
+    import numpy as np
+    if isinstance(obj, dict):
+        return {k: _split_ndarrays(v, f"{path}.{k}" if path else k, arrays) for k, v in obj.items()}
+    if isinstance(obj, np.ndarray):
+        arrays[path] = obj
+        return {_ARRAY_TAG: path}
+    return obj
+
+def _join_ndarrays(obj: Any, get: Callable[[str], Any]) -> Any:
+    if isinstance(obj, dict):
+        if set(obj) == {_ARRAY_TAG}:
+            return get(obj[_ARRAY_TAG])
+        return {k: _join_ndarrays(v, get) for k, v in obj.items()}
+    return obj
+
+@timed("write_result")
+def write_result(res: Dict[str, Any], out: str | Path, fmt: str = "json") -> Path:
+    """Write a pipeline result and return the JSON file written.
+
+    json: everything in one indented JSON (arrays as lists).
+    npy:  directory ``out`` without suffix holding one ``<key.path>.npy`` per
+          array (loadable with ``np.load(mmap_mode="r")``) and a ``result.json`` sidecar;
+          ``.npy`` files left there by an earlier result are removed.
+    npz:  ``<out>.npz`` with all arrays plus a ``<out>.json`` sidecar.
+    """
+    if fmt not in RESULT_FORMATS:
+        raise ValueError(f"fmt must be one of {RESULT_FORMATS}")
+    out_p = Path(out)
+    if fmt == "json":
+        out_p.parent.mkdir(parents=True, exist_ok=True)
+        out_p.write_text(json.dumps(res, indent=2, default=_jsonable), encoding="utf-8")
+        return out_p
+
+    import numpy as np
+    arrays: Dict[str, Any] = {}
+    doc = _split_ndarrays(res, "", arrays)
+    if fmt == "npy":
+        d = out_p.with_suffix("")
+        d.mkdir(parents=True, exist_ok=True)
+        for name, a in arrays.items():
+            np.save(d / f"{name}.npy", a)
+        # Arrays de un resultado anterior que el nuevo sidecar ya no referencia
+        keep = {f"{name}.npy" for name in arrays}
+        for stale in d.glob("*.npy"):
+            if stale.name not in keep:
+                stale.unlink()
+        doc["_arrays"] = {"format": "npy"}
+        sidecar = d / "result.json"
+    else:
+        out_p.parent.mkdir(parents=True, exist_ok=True)
+        npz = out_p.with_suffix(".npz")
+        np.savez(npz, **arrays)
+        doc["_arrays"] = {"format": "npz", "file": npz.name}
+        sidecar = out_p.with_suffix(".json")
+    sidecar.write_text(json.dumps(doc, indent=2, default=_jsonable), encoding="utf-8")
+    return sidecar
+
+def load_result(
+    path: str | Path, mmap_mode: Literal["r", "r+", "w+", "c"] | None = "r"
+) -> Dict[str, Any]:
+    """Read a result written by write_result (JSON file, sidecar or npy directory).
+
+    Arrays come back as np.ndarray; .npy ones are memory-mapped unless mmap_mode=None
+    (.npz members cannot be mapped and are read into memory).
+    """
+    p = Path(path)
+    if p.is_dir():
+        p = p / "result.json"
+    doc: Dict[str, Any] = json.loads(p.read_text(encoding="utf-8"))
+    meta = doc.pop("_arrays", None)
+    if meta is None:
+        return doc
+
+    import numpy as np
+    if meta["format"] == "npy":
+        def get(name: str) -> Any:
+            return np.load(p.parent / f"{name}.npy", mmap_mode=mmap_mode)
+        out: Dict[str, Any] = _join_ndarrays(doc, get)
+        return out
+    with np.load(p.parent / meta["file"]) as z:
+        arrays = {k: z[k] for k in z.files}
+    out = _join_ndarrays(doc, arrays.__getitem__)
+    return out
@@ -2,10 +2,22 @@
 # SPDX-License-Identifier: AGPL-3.0-or-later
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import Callable, List, Sequence, Tuple
 import numpy as np
+from .inference.likelihoods import GaussianCovFactor
 from .theory import QuadraticSigmaModel
 
+BIN_STATISTICS = ("gaussian", "poisson")
+
+# Métodos de RateGaussianLikelihood.intervals
+INTERVAL_METHODS = ("adaptive", "analytic")
+
+# Newton sobre los nuisances (bins Poisson): iteraciones máximas y tolerancia en |paso|
+_NEWTON_MAX_ITER = 50
+_NEWTON_TOL = 1e-10
+
+
 @dataclass(frozen=True)
 class RateGaussianLikelihood:
     """"Asimov Gaussian likelihood on the inclusive HH rate.""" ""
@@ -17,6 +29,323 @@ class RateGaussianLikelihood:
         s = self.model.sigma(kappa_lambda)
         return 0.5 * ((s - self.sigma_asimov) / self.sigma_err) ** 2
 
+    def stationary_points(self) -> List[float]:
+        """Closed-form stationary points of the NLL: vertex of sigma(k) and roots of sigma(k) = sigma_asimov."""
+        a, b, c = self.model.a, self.model.b, self.model.c
+        if a == 0.0:
+            return [] if b == 0.0 else [(self.sigma_asimov - c) / b]
+        pts = [-b / (2.0 * a)]
+        roots = np.roots([a, b, c - self.sigma_asimov])
+        pts += [float(r.real) for r in roots if abs(r.imag) <= 1e-12 * max(1.0, abs(r.real))]
+        return sorted(pts)
+
+    def mle(self, kappa_min: float, kappa_max: float) -> Tuple[float, float]:
+        """(kappa_hat, NLL_min) on [kappa_min, kappa_max]: best of the stationary points and the bounds."""
+        if not kappa_max > kappa_min:
+            raise ValueError("kappa_max must be > kappa_min")
+        cands = [kappa_min, kappa_max, *(k for k in self.stationary_points() if kappa_min < k < kappa_max)]
+        vals = [float(self.nll(k)) for k in cands]
+        i = int(np.argmin(vals))
+        return float(cands[i]), vals[i]
+
+    def intervals(
+        self, delta: float, kappa_min: float, kappa_max: float, xtol: float = 1e-10,
+        method: str = "adaptive",
+    ) -> List[Tuple[float, float]]:
+        """Disjoint kappa_lambda intervals with NLL - NLL_min <= delta (no grid).
+
+        method="adaptive" (por defecto): Brent entre puntos estacionarios, con xtol;
+        "analytic": raíces exactas de sigma(k) = sigma_asimov +- R (quadratic_rate_intervals).
+        """
+        if method not in INTERVAL_METHODS:
+            raise ValueError(f"method must be one of {INTERVAL_METHODS}")
+        if method == "analytic":
+            m = self.model
+            lo, hi = quadratic_rate_intervals(m.a, m.b, m.c, self.sigma_asimov, self.sigma_err,
+                                              delta, kappa_min, kappa_max)
+            return [(float(x), float(y)) for x, y in zip(lo, hi) if not np.isnan(x)]
+        return find_intervals_adaptive(
+            lambda k: float(self.nll(k)),
+            delta,
+            kappa_min,
+            kappa_max,
+            breakpoints=self.stationary_points(),
+            xtol=xtol,
+        )
+
+
+@dataclass(frozen=True)
+class BinnedLikelihood:
+    """Multi-bin kappa_lambda likelihood with correlated systematics.
+
+    Yield esperado por bin:
+        nu_i = scale * sigma_i(k) * (1 + sum_j theta_j modifiers[j, i]) + background_i,
+    con nuisances theta_j ~ N(0, 1). Bins "gaussian": residuo con covarianza `cov`
+    (estadística + sistemáticos ya correlacionados); bins "poisson": cuentas observadas.
+    La NLL se devuelve respecto al modelo saturado (0 en Asimov con theta = 0).
+    """
+    models: Tuple[QuadraticSigmaModel, ...]
+    observed: np.ndarray
+    stat: str = "gaussian"
+    cov: np.ndarray | None = None
+    modifiers: np.ndarray | None = None
+    scale: float = 1.0
+    background: np.ndarray | None = None
+    # Factor de Cholesky de cov (sólo bins gaussianos), calculado una vez
+    _cov_factor: GaussianCovFactor | None = field(
+        default=None, init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        n_bins = len(self.models)
+        obs = np.asarray(self.observed, dtype=float)
+        if obs.shape != (n_bins,):
+            raise ValueError("observed must have one entry per bin")
+        if self.stat not in BIN_STATISTICS:
+            raise ValueError(f"stat must be one of {BIN_STATISTICS}")
+        object.__setattr__(self, "observed", obs)
+        mods = np.zeros((0, n_bins)) if self.modifiers is None else np.atleast_2d(
+            np.asarray(self.modifiers, dtype=float))
+        if mods.shape[1] != n_bins:
+            raise ValueError("modifiers must have shape (n_nuisance, n_bins)")
+        object.__setattr__(self, "modifiers", mods)
+        bkg = np.zeros(n_bins) if self.background is None else np.asarray(self.background, dtype=float)
+        if bkg.shape != (n_bins,):
+            raise ValueError("background must have one entry per bin")
+        object.__setattr__(self, "background", bkg)
+        if self.stat == "gaussian":
+            if self.cov is None:
+                raise ValueError("Gaussian bins need a covariance")
+            cov = np.asarray(self.cov, dtype=float)
+            if cov.shape != (n_bins, n_bins):
+                raise ValueError("cov must be (n_bins, n_bins)")
+            object.__setattr__(self, "cov", cov)
+            object.__setattr__(self, "_cov_factor", GaussianCovFactor.from_cov(cov))
+        elif self.cov is not None:
+            raise ValueError("Poisson bins take systematics through modifiers, not cov")
+        elif np.any(obs < 0):
+            raise ValueError("Poisson counts must be >= 0")
+
+    @classmethod
+    def asimov(cls, models: Sequence[QuadraticSigmaModel], kappa_lambda: float = 1.0,
+               **kwargs: object) -> "BinnedLikelihood":
+        """Likelihood whose observation is the expected yield at kappa_lambda with theta = 0."""
+        n_bins = len(models)
+        proto = cls(tuple(models), np.zeros(n_bins), **kwargs)  # type: ignore[arg-type]
+        return cls(tuple(models), proto.expected(kappa_lambda)[0], **kwargs)  # type: ignore[arg-type]
+
+    @property
+    def n_nuisance(self) -> int:
+        return int(self.modifiers.shape[0])  # type: ignore[union-attr]
+
+    def _signal(self, kappa_lambda: np.ndarray | float) -> np.ndarray:
+        k = np.atleast_1d(np.asarray(kappa_lambda, dtype=float))
+        return self.scale * np.stack([m.sigma(k) for m in self.models], axis=-1)
+
+    def expected(self, kappa_lambda: np.ndarray | float, theta: np.ndarray | None = None) -> np.ndarray:
+        """Expected yields, shape (n_kappa, n_bins); theta (n_kappa, n_nuisance) or None (= 0)."""
+        s = self._signal(kappa_lambda)
+        nu: np.ndarray
+        if theta is None or self.n_nuisance == 0:
+            nu = s + self.background
+        else:
+            t = np.asarray(theta, dtype=float).reshape(-1, self.n_nuisance)
+            nu = s * (1.0 + t @ self.modifiers) + self.background
+        return nu
+
+    def _data_nll(self, nu: np.ndarray) -> np.ndarray:
+        n = self.observed
+        if self._cov_factor is not None:
+            # r^T C^-1 r por sustitución hacia delante con el factor de Cholesky
+            return 0.5 * np.asarray(self._cov_factor.chi2(np.atleast_2d(n - nu)), dtype=float)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            log_term = np.where(n > 0, n * np.log(n / nu), 0.0)
+        out: np.ndarray = np.sum(nu - n + log_term, axis=-1)
+        return out
+
+    def nll(self, kappa_lambda: np.ndarray | float, theta: np.ndarray | None = None) -> np.ndarray:
+        """NLL at given nuisance values (theta = 0 when None), one entry per kappa_lambda."""
+        out = self._data_nll(self.expected(kappa_lambda, theta))
+        if theta is not None and self.n_nuisance:
+            t = np.asarray(theta, dtype=float).reshape(-1, self.n_nuisance)
+            out = out + 0.5 * np.sum(t * t, axis=-1)
+        return out
+
+    def profile(self, kappa_lambda: np.ndarray | float) -> Tuple[np.ndarray, np.ndarray]:
+        """Profiled NLL and theta_hat for every kappa_lambda at once.
+
+        nu es lineal en theta: con bins gaussianos el mínimo es exacto (un sistema
+        J x J por punto, resuelto en bloque); con bins Poisson la NLL es convexa en
+        theta y se minimiza con Newton vectorizado (hessiano exacto, paso con
+        retroceso para mantener nu > 0 y bajar la NLL), todos los puntos a la vez.
+        """
+        s = self._signal(kappa_lambda)
+        m, J = s.shape[0], self.n_nuisance
+        if J == 0:
+            return self._data_nll(s + self.background), np.zeros((m, 0))
+        A = s[:, :, None] * self.modifiers.T[None, :, :]  # type: ignore[union-attr]  # d nu / d theta
+        nu0 = s + self.background
+        eye = np.eye(J)
+        if self._cov_factor is not None:
+            # Blanqueo con L (C = L L^T): A^T C^-1 A = Aw^T Aw sin invertir L
+            b = s.shape[1]
+            Aw = self._cov_factor.whiten(A.transpose(1, 0, 2).reshape(b, m * J))
+            Aw = Aw.reshape(b, m, J).transpose(1, 0, 2)
+            rw = self._cov_factor.whiten((self.observed - nu0).T).T
+            H = eye + np.swapaxes(Aw, 1, 2) @ Aw
+            g = np.einsum("mcj,mc->mj", Aw, rw)
+            theta = np.linalg.solve(H, g[..., None])[..., 0]
+            return self.nll(kappa_lambda, theta), theta
+
+        n = self.observed
+        At = np.swapaxes(A, 1, 2)
+        theta = np.zeros((m, J))
+        f = self.nll(kappa_lambda, theta)
+        active = np.ones(m, dtype=bool)
+        for _ in range(_NEWTON_MAX_ITER):
+            idx = np.nonzero(active)[0]
+            if idx.size == 0:
+                break
+            ti = theta[idx]
+            nu = nu0[idx] + (A[idx] @ ti[:, :, None])[..., 0]
+            grad = (At[idx] @ (1.0 - n / nu)[:, :, None])[..., 0] + ti
+            H = eye + At[idx] @ (A[idx] * (n / nu**2)[:, :, None])
+            step = np.linalg.solve(H, grad[..., None])[..., 0]
+            # Decremento de Newton: estimación de f - f_min; por debajo de la tolerancia
+            # se acepta el paso completo sin búsqueda (el redondeo impediría bajar la NLL)
+            done = 0.5 * np.sum(grad * step, axis=1) < _NEWTON_TOL
+            t = np.ones(idx.size)
+            todo = np.nonzero(~done)[0]
+            f_new = f[idx].copy()
+            for _ in range(60):
+                if todo.size == 0:
+                    break
+                cand = ti[todo] - t[todo, None] * step[todo]
+                nu_c = nu0[idx[todo]] + (A[idx[todo]] @ cand[:, :, None])[..., 0]
+                ok = np.all(nu_c > 0, axis=1)
+                f_c = np.full(todo.size, np.inf)
+                f_c[ok] = self._data_nll(nu_c[ok]) + 0.5 * np.sum(cand[ok] ** 2, axis=1)
+                acc = f_c <= f[idx[todo]]
+                f_new[todo[acc]] = f_c[acc]
+                t[todo[~acc]] *= 0.5
+                todo = todo[~acc]
+            moved = ~done
+            moved[todo] = False
+            theta[idx[moved]] = ti[moved] - t[moved, None] * step[moved]
+            f[idx[moved]] = f_new[moved]
+            theta[idx[done]] = ti[done] - step[done]
+            active[idx] = moved
+        return self.nll(kappa_lambda, theta), theta
+
+    def intervals(
+        self, delta: float, kappa_min: float, kappa_max: float, n_scan: int = 201, xtol: float = 1e-10
+    ) -> List[Tuple[float, float]]:
+        """Disjoint kappa_lambda intervals with profiled NLL - NLL_min <= delta.
+
+        Un barrido vectorizado del perfil localiza sus extremos locales, que se
+        usan como nodos monótonos para find_intervals_adaptive (Brent).
+        """
+        def f(k: float) -> float:
+            return float(self.profile(k)[0][0])
+
+        xs = np.linspace(kappa_min, kappa_max, n_scan)
+        nodes = _refine_extrema(f, xs, self.profile(xs)[0], xtol)
+        return find_intervals_adaptive(f, delta, kappa_min, kappa_max, breakpoints=nodes, xtol=xtol)
+
+
+def wilks_delta(cl: float) -> float:
+    """DeltaNLL threshold of a one-parameter Wilks interval at confidence level cl (0.95 -> 1.92)."""
+    from scipy.special import ndtri
+
+    if not 0.0 < cl < 1.0:
+        raise ValueError("cl must be in (0, 1)")
+    return 0.5 * float(ndtri(0.5 * (1.0 + cl))) ** 2
+
+
+def _quadratic_roots(a: np.ndarray, b: np.ndarray, c: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # Raíces reales de a k^2 + b k + c = 0 (NaN si no hay); forma sin cancelaciones
+    # q = -(b + sign(b) sqrt(disc)) / 2, k = q / a y c / q. Con a = 0, la raíz lineal.
+    with np.errstate(divide="ignore", invalid="ignore"):
+        disc = b * b - 4.0 * a * c
+        q = -0.5 * (b + np.copysign(np.sqrt(disc), b))
+        r1 = np.where(a != 0.0, q / a, -c / b)
+        r2 = np.where(a != 0.0, np.where(q != 0.0, c / q, r1), np.nan)
+        real = (disc >= 0.0) | (a == 0.0)
+    return np.where(real, r1, np.nan), np.where(real, r2, np.nan)
+
+
+def quadratic_rate_intervals(
+    a: np.ndarray | float,
+    b: np.ndarray | float,
+    c: np.ndarray | float,
+    sigma_asimov: np.ndarray | float,
+    sigma_err: np.ndarray | float,
+    delta: np.ndarray | float,
+    kappa_min: np.ndarray | float,
+    kappa_max: np.ndarray | float,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Exact RateGaussianLikelihood intervals for sigma(k) = a k^2 + b k + c, vectorized.
+
+    NLL - NLL_min <= delta en [kappa_min, kappa_max] equivale a |sigma(k) - sigma_asimov| <= R,
+    R = sqrt(2 delta sigma_err^2 + d^2), con d la distancia mínima de sigma(k) a sigma_asimov
+    en el rango (0 si sigma_asimov es alcanzable). Las raíces de sigma(k) = sigma_asimov +- R
+    parten el rango en tramos monótonos; la parábola da como mucho dos intervalos disjuntos.
+    Todos los argumentos se combinan por broadcasting; devuelve (lo, hi) con forma
+    broadcast + (2,), intervalos ordenados y NaN en las ramas que no existen.
+    """
+    args = np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in (
+        a, b, c, sigma_asimov, sigma_err, delta, kappa_min, kappa_max)))
+    shape = args[0].shape
+    a, b, c, s0, err, dl, kmin, kmax = (x.ravel() for x in args)
+    if np.any(err <= 0.0):
+        raise ValueError("sigma_err must be > 0")
+    if np.any(dl < 0.0):
+        raise ValueError("delta must be >= 0")
+    if not np.all(kmax > kmin):
+        raise ValueError("kappa_max must be > kappa_min")
+
+    def sigma(k: np.ndarray) -> np.ndarray:
+        out: np.ndarray = (a * k + b) * k + c
+        return out
+
+    # Rango de sigma en [kmin, kmax]: extremos y vértice si cae dentro
+    with np.errstate(divide="ignore", invalid="ignore"):
+        vertex = np.where(a != 0.0, -b / (2.0 * a), np.nan)
+    inside = (vertex > kmin) & (vertex < kmax)
+    s_ends = np.stack([sigma(kmin), sigma(kmax), np.where(inside, sigma(vertex), np.nan)], axis=1)
+    d = np.maximum.reduce([np.zeros_like(s0), np.nanmin(s_ends, axis=1) - s0, s0 - np.nanmax(s_ends, axis=1)])
+    R = np.sqrt(d * d + 2.0 * dl * err * err)
+    lo_s, hi_s = s0 - R, s0 + R
+
+    # Nodos: extremos del rango y raíces interiores de sigma = s0 +- R, ordenados
+    roots = np.stack([*_quadratic_roots(a, b, c - lo_s), *_quadratic_roots(a, b, c - hi_s)], axis=1)
+    roots = np.where((roots > kmin[:, None]) & (roots < kmax[:, None]), roots, kmax[:, None])
+    nodes = np.sort(np.concatenate([kmin[:, None], roots, kmax[:, None]], axis=1), axis=1)
+
+    # Cada tramo entre nodos consecutivos está entero dentro o fuera; los de longitud
+    # nula (raíces dobles o repetidas) heredan el estado del anterior (el primero
+    # nunca es nulo: las raíces son > kappa_min)
+    mid = 0.5 * (nodes[:, 1:] + nodes[:, :-1])
+    s_mid = (a[:, None] * mid + b[:, None]) * mid + c[:, None]
+    inn = (s_mid >= lo_s[:, None]) & (s_mid <= hi_s[:, None])
+    empty = nodes[:, 1:] == nodes[:, :-1]
+    for j in range(1, inn.shape[1]):
+        inn[:, j] = np.where(empty[:, j], inn[:, j - 1], inn[:, j])
+
+    prev = np.concatenate([np.zeros((inn.shape[0], 1), dtype=bool), inn[:, :-1]], axis=1)
+    nxt = np.concatenate([inn[:, 1:], np.zeros((inn.shape[0], 1), dtype=bool)], axis=1)
+    starts, ends = inn & ~prev, inn & ~nxt
+    slot = np.cumsum(starts, axis=1) - 1
+    rows = np.arange(inn.shape[0])
+    lo = np.full((inn.shape[0], 2), np.nan)
+    hi = np.full((inn.shape[0], 2), np.nan)
+    for j in range(inn.shape[1]):
+        sel = starts[:, j]
+        lo[rows[sel], slot[sel, j]] = nodes[sel, j]
+        sel = ends[:, j]
+        hi[rows[sel], slot[sel, j]] = nodes[sel, j + 1]
+    return lo.reshape(shape + (2,)), hi.reshape(shape + (2,))
+
+
 def find_interval_1d(grid_k: np.ndarray, nll: np.ndarray, delta: float) -> tuple[float, float]:
     idx_min = int(np.argmin(nll))
     nll0 = float(nll[idx_min])
@@ -25,3 +354,74 @@ def find_interval_1d(grid_k: np.ndarray, nll: np.ndarray, delta: float) -> tuple
         raise RuntimeError("No points satisfy the interval condition. Check scan range.")
     k_in = grid_k[mask]
     return float(k_in.min()), float(k_in.max())
+
+
+def _refine_extrema(
+    f: Callable[[float], float], xs: np.ndarray, vs: np.ndarray, xtol: float
+) -> List[float]:
+    # Extremos locales del barrido grueso (xs, vs = f(xs)), refinados con un minimizador acotado
+    from scipy.optimize import minimize_scalar
+
+    out: List[float] = []
+    for i in range(1, len(xs) - 1):
+        is_min = vs[i] <= vs[i - 1] and vs[i] <= vs[i + 1]
+        is_max = vs[i] >= vs[i - 1] and vs[i] >= vs[i + 1]
+        if not (is_min or is_max):
+            continue
+        sign = 1.0 if is_min else -1.0
+        r = minimize_scalar(
+            lambda x, s=sign: s * f(float(x)),
+            bounds=(float(xs[i - 1]), float(xs[i + 1])),
+            method="bounded",
+            options={"xatol": xtol},
+        )
+        out.append(float(r.x))
+    return out
+
+
+def find_intervals_adaptive(
+    nll: Callable[[float], float],
+    delta: float,
+    kappa_min: float,
+    kappa_max: float,
+    *,
+    breakpoints: Sequence[float] | None = None,
+    n_coarse: int = 33,
+    xtol: float = 1e-10,
+) -> List[Tuple[float, float]]:
+    """Solve NLL(k) - NLL_min = delta with Brent's method; returns disjoint intervals.
+
+    breakpoints: stationary points of the NLL if known in closed form (the NLL is
+    then monotone between consecutive nodes). Otherwise they are located on an
+    n_coarse-point sweep and refined with a bounded minimizer.
+    """
+    from scipy.optimize import brentq
+
+    if not kappa_max > kappa_min:
+        raise ValueError("kappa_max must be > kappa_min")
+    if breakpoints is None:
+        xs = np.linspace(kappa_min, kappa_max, n_coarse)
+        breakpoints = _refine_extrema(nll, xs, np.array([nll(float(x)) for x in xs]), xtol)
+
+    nodes = sorted({kappa_min, kappa_max, *(float(k) for k in breakpoints if kappa_min < k < kappa_max)})
+    vals = [nll(k) for k in nodes]
+    nll0 = min(vals)
+
+    def g(k: float) -> float:
+        return nll(k) - nll0 - delta
+
+    gs = [v - nll0 - delta for v in vals]
+    out: List[Tuple[float, float]] = []
+    start = nodes[0] if gs[0] <= 0 else None
+    for a, b, ga, gb in zip(nodes[:-1], nodes[1:], gs[:-1], gs[1:]):
+        if (ga <= 0) == (gb <= 0):
+            continue
+        root = float(brentq(g, a, b, xtol=xtol))
+        if start is None:
+            start = root
+        else:
+            out.append((start, root))
+            start = None
+    if start is not None:
+        out.append((start, nodes[-1]))
+    return out
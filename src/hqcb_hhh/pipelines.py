@@ -0,0 +1,741 @@
+# Copyright (c) 2026 Oscar Fuentes Fernández
+# SPDX-License-Identifier: AGPL-3.0-or-later
+"""In-process pipelines behind the demo-b, infer-toy and infer-data commands.
+
+The CLI, the scripts/ wrappers and make_paper_figures all call these functions
+directly, so a full paper build shares one interpreter and one set of imports.
+"""
+from __future__ import annotations
+
+import math
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, Sequence, Tuple
+
+import numpy as np
+
+from . import profiling
+from .cache import ResultCache, cache_key, file_digest
+from .io import write_result
+from .inference import (
+    BAOMockDataset,
+    HQCBInferenceConfig,
+    bao_loglike_hqcb_grid,
+    grid_posterior,
+    load_bao_mock_csv,
+)
+
+if TYPE_CHECKING:
+    from .inference.emulator import HQCBEmulator
+
+
+def _pyplot() -> Any:
+    # Backend no interactivo para CI; sólo se importa cuando hay figuras que guardar
+    with profiling.stage("import_matplotlib"):
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    return plt
+
+
+def _savefig(plt: Any, path: Path) -> None:
+    with profiling.stage("savefig"):
+        plt.savefig(path, dpi=160)
+
+
+# --- HQCB-B toy (demo-b) ---
+
+@dataclass(frozen=True)
+class ToyConfig:
+    v0_gev: float
+    z_rec: float
+    rd0_mpc: float
+    p_sensitivity: float
+    H0_local: float
+    H0_early_target: float
+    z_max: float
+    n_z: int
+    figures_dir: str
+    basename: str
+
+
+def load_toy_config(path: str | Path) -> ToyConfig:
+    import yaml
+
+    p = Path(path)
+    if not p.exists():
+        raise FileNotFoundError(f"Config not found: {path}")
+
+    raw = yaml.safe_load(p.read_text(encoding="utf-8"))
+    m = raw["model"]
+    t = raw["targets"]
+    s = raw["scan"]
+    o = raw["output"]
+
+    return ToyConfig(
+        v0_gev=float(m["v0_gev"]),
+        z_rec=float(m["z_rec"]),
+        rd0_mpc=float(m["rd0_mpc"]),
+        p_sensitivity=float(m["p_sensitivity"]),
+        H0_local=float(t["H0_local"]),
+        H0_early_target=float(t["H0_early_target"]),
+        z_max=float(s["z_max"]),
+        n_z=int(s["n_z"]),
+        figures_dir=str(o["figures_dir"]),
+        basename=str(o["basename"]),
+    )
+
+
+def v_eff(z: np.ndarray, v0: float, alpha: float) -> np.ndarray:
+    # Toy law: slow cosmological running
+    return v0 * (1.0 + z) ** alpha
+
+
+def rd_true(v_ratio_at_rec: float, rd0: float, p: float) -> float:
+    # Toy mapping: standard ruler depends on effective Higgs vacuum
+    return rd0 * float(v_ratio_at_rec ** p)
+
+
+def alpha_for_target_ratio(z_rec: float, p: float, target_ratio: float) -> float:
+    """
+    We want: H0_early / H0_local ~= rd_true/rd0 = [(v_eff(z_rec)/v0)^p]
+    with v_eff(z)=v0*(1+z)^alpha -> ratio = (1+z_rec)^(alpha*p)
+    => alpha = ln(target_ratio) / (p * ln(1+z_rec))
+    """
+    if p == 0:
+        raise ValueError("p_sensitivity cannot be 0 for solving alpha.")
+    return math.log(target_ratio) / (p * math.log(1.0 + z_rec))
+
+
+def run_demo_b(
+    config: str | Path, figdir: str | Path | None = None, figures: bool = True
+) -> int:
+    cfg = load_toy_config(config)
+
+    # Desired ratio from targets (early inferred vs local)
+    target_ratio = cfg.H0_early_target / cfg.H0_local
+
+    # Solve alpha so that rd_true/rd0 matches target_ratio
+    alpha = alpha_for_target_ratio(cfg.z_rec, cfg.p_sensitivity, target_ratio)
+
+    # Build curves
+    z = np.linspace(0.0, cfg.z_max, cfg.n_z)
+    v = v_eff(z, cfg.v0_gev, alpha)
+    v_ratio_rec = (1.0 + cfg.z_rec) ** alpha  # v_eff(z_rec)/v0
+    rd = rd_true(v_ratio_rec, cfg.rd0_mpc, cfg.p_sensitivity)
+
+    H0_early_inferred = cfg.H0_local * (rd / cfg.rd0_mpc)
+
+    # Print results (human-readable)
+    print("=== HQCB-B toy: calibration-driven H0 tension ===")
+    print("Author: Oscar Fuentes Fernandez")
+    print(f"Config: {config}")
+    print(f"Targets: H0_local={cfg.H0_local:.3f}, H0_early_target={cfg.H0_early_target:.3f}")
+    print(f"Solved alpha={alpha:.6e}  (v_eff ~ (1+z)^alpha)")
+    print(f"p_sensitivity={cfg.p_sensitivity:.4f}")
+    print(f"v_ratio(z_rec)=(1+z_rec)^alpha = {v_ratio_rec:.6f}")
+    print(f"rd_true(z_rec) = {rd:.4f} Mpc  (rd0={cfg.rd0_mpc:.4f})")
+    print(f"H0_early_inferred ~ H0_local*(rd_true/rd0) = {H0_early_inferred:.3f} km/s/Mpc")
+
+    if figures:
+        # Figures
+        plt = _pyplot()
+        figdir = Path(figdir if figdir is not None else cfg.figures_dir)
+        figdir.mkdir(parents=True, exist_ok=True)
+
+        # 1) v_eff(z)/v0
+        plt.figure(figsize=(8, 5))
+        plt.plot(z, v / cfg.v0_gev)
+        plt.xlabel("Redshift z")
+        plt.ylabel("v_eff(z) / v0")
+        plt.title("HQCB-B toy: slow running of v_eff(z)")
+        plt.grid(True)
+        out1 = figdir / f"{cfg.basename}_v_ratio.png"
+        plt.tight_layout()
+        _savefig(plt, out1)
+        plt.close()
+
+        # 2) implied bias ratio H0_early/H0_local (constant in this toy once fixed at recombination)
+        plt.figure(figsize=(8, 5))
+        plt.plot(z, np.full_like(z, H0_early_inferred / cfg.H0_local))
+        plt.xlabel("Redshift z")
+        plt.ylabel("H0_early_inferred / H0_local")
+        plt.title("HQCB-B toy: calibration bias (constant once set by z_rec)")
+        plt.grid(True)
+        out2 = figdir / f"{cfg.basename}_H0_ratio.png"
+        plt.tight_layout()
+        _savefig(plt, out2)
+        plt.close()
+
+        print(f"Saved figures:\n- {out1.as_posix()}\n- {out2.as_posix()}")
+    return 0
+
+
+# --- HQCB inference (infer-toy / infer-data) ---
+
+@profiling.timed("load_config")
+def load_inference_yaml(path: str | Path) -> Dict[str, Any]:
+    import yaml
+
+    cfg_path = Path(path)
+    if not cfg_path.exists():
+        raise SystemExit(f"Config not found: {cfg_path}")
+    data: Dict[str, Any] = yaml.safe_load(cfg_path.read_text(encoding="utf-8"))
+    return data
+
+
+def resolve_data_path(path: str | Path, config: str | Path) -> Path:
+    """Resolve a data path from a YAML: as given (cwd), else relative to the config's parent dirs.
+
+    Las rutas de los YAML son relativas a la raíz del repo; así el pipeline funciona
+    también lanzado desde fuera de ella.
+    """
+    p = Path(path)
+    if p.is_absolute() or p.exists():
+        return p
+    for parent in Path(config).resolve().parents:
+        if (parent / p).exists():
+            return parent / p
+    return p
+
+
+def load_yaml_bao(
+    y: Dict[str, Any], config: str | Path, cache_dir: str | Path | None = None
+) -> BAOMockDataset | None:
+    """BAO dataset named by an inference YAML (bao_csv/bao_cov), or None if it has none."""
+    if "bao_csv" not in y:
+        return None
+    return load_bao_mock_csv(
+        csv_path=str(resolve_data_path(y["bao_csv"], config)),
+        cov_path=str(resolve_data_path(y["bao_cov"], config)),
+        cache_dir=cache_dir,
+    )
+
+
+def inference_config_from_yaml(y: Dict[str, Any]) -> HQCBInferenceConfig:
+    return HQCBInferenceConfig(
+        z_rec=float(y["z_rec"]),
+        rd0_mpc=float(y["rd0_mpc"]),
+        H0_local_obs=float(y["H0_local_obs"]),
+        H0_local_sigma=float(y["H0_local_sigma"]),
+        H0_early_obs=float(y["H0_early_obs"]),
+        H0_early_sigma=float(y["H0_early_sigma"]),
+        gamma_ref=float(y["gamma_ref"]),
+        kappa_b=float(y["kappa_b"]),
+        beta_rd_sensitivity=float(y["beta_rd_sensitivity"]),
+        gamma_min=float(y["gamma_min"]),
+        gamma_max=float(y["gamma_max"]),
+        H0_min=float(y["H0_min"]),
+        H0_max=float(y["H0_max"]),
+        grid_gamma=int(y["grid_gamma"]),
+        grid_H0=int(y["grid_H0"]),
+    )
+
+
+def grid_posterior_payload(
+    cfg: HQCBInferenceConfig,
+    grid: Dict[str, Any] | None,
+    keep_logpost: bool = False,
+    emulator: Dict[str, Any] | None = None,
+) -> Dict[str, Any]:
+    """Cache payload of a grid posterior: the config plus the options that change the result.
+
+    workers/backend/memory_budget_mb sólo cambian cómo se recorre la malla, no el resultado.
+    La tabla del emulador queda fijada por cfg y sus opciones (nodos, interpolación).
+    """
+    return {
+        "config": asdict(cfg),
+        "adaptive_eps": (grid or {}).get("adaptive_eps"),
+        "method": (grid or {}).get("method", "grid"),
+        "logpost": keep_logpost,
+        "emulator": emulator,
+    }
+
+
+def load_emulator(
+    cfg: HQCBInferenceConfig,
+    options: Dict[str, Any] | None,
+    cache: ResultCache | None = None,
+    bao: BAOMockDataset | None = None,
+    p_sens: float | None = None,
+) -> HQCBEmulator | None:
+    """Emulator table for `options` (EmulatorSpec n_gamma/kind), or None without options.
+
+    Con caché de resultados la tabla vive en <cache>/emulator (cuenta para su límite).
+    """
+    if options is None:
+        return None
+    from .inference.emulator import DEFAULT_EMULATOR_DIR, EmulatorSpec, load_or_build
+
+    spec = EmulatorSpec.from_config(cfg, bao=bao, bao_p_sensitivity=p_sens, **options)
+    directory = DEFAULT_EMULATOR_DIR if cache is None else cache.root / "emulator"
+    return load_or_build(spec, directory)[0]
+
+
+def _cached(
+    cache: ResultCache | None, kind: str, payload: Dict[str, Any],
+    compute: Callable[[], Dict[str, Any]],
+) -> Dict[str, Any]:
+    if cache is None:
+        return compute()
+    key = cache_key(kind, payload)
+    res = cache.get(key)
+    if res is None:
+        res = compute()
+        cache.put(key, res)
+    return res
+
+
+def run_infer_toy(
+    config: str | Path,
+    out: str | Path = "data/results/hqcb_infer_results.json",
+    figdir: str | Path = "docs/figures",
+    grid: Dict[str, Any] | None = None,
+    figures: bool = True,
+    cache: ResultCache | None = None,
+    fmt: str = "json",
+    keep_logpost: bool = False,
+    emulator: Dict[str, Any] | None = None,
+) -> int:
+    """infer-toy: posterior de gamma; fmt/keep_logpost como en io.write_result / grid_posterior.
+
+    emulator: opciones de EmulatorSpec (n_gamma, kind); H0_early sale de la tabla.
+    """
+    cfg = inference_config_from_yaml(load_inference_yaml(config))
+    emu = load_emulator(cfg, emulator, cache)
+    res = _cached(cache, "grid_posterior",
+                  grid_posterior_payload(cfg, grid, keep_logpost, emulator),
+                  lambda: grid_posterior(cfg, **(grid or {}), as_arrays=True,
+                                         keep_logpost=keep_logpost, emulator=emu))
+
+    out_path = write_result(res, out, fmt)
+
+    # Arrays tal cual (sin copia) para las figuras
+    gammas = np.asarray(res["grid"]["gamma"], dtype=float)
+    p_gamma = np.asarray(res["posterior"]["p_gamma"], dtype=float)
+    gamma_ref = float(res["config_echo"]["gamma_ref"])
+    gmean = float(res["summary"]["gamma_mean"])
+    gmap = float(res["summary"]["gamma_map"])
+    H0_local_map = float(res["summary"]["H0_local_map"])
+    H0_early_pred_map = float(res["summary"]["H0_early_pred_map"])
+    ratio_map = H0_early_pred_map / H0_local_map if H0_local_map != 0 else float("nan")
+    ratio_obs = float(res["config_echo"]["H0_early_obs"]) / float(res["config_echo"]["H0_local_obs"])
+
+    if figures:
+        # Figuras
+        plt = _pyplot()
+        figdir = Path(figdir)
+        figdir.mkdir(parents=True, exist_ok=True)
+
+        # 1) Posterior de gamma
+        plt.figure(figsize=(10, 4))
+        plt.plot(gammas, p_gamma)
+        plt.axvline(gamma_ref, linestyle="--")
+        plt.axvline(gmean, linestyle=":")
+        plt.axvline(gmap, linestyle="-")
+        plt.xlabel("gamma (exponente en rho_Lambda ~ (v^2/Mpl^2)^gamma)")
+        plt.ylabel("Posterior p(gamma)")
+        plt.title("HQCB toy: posterior of gamma")
+        plt.grid(True)
+        f1 = figdir / "hqcb_infer_gamma_posterior.png"
+        plt.tight_layout()
+        _savefig(plt, f1)
+        plt.close()
+
+        # 2) Ratio H0_early_pred/H0_local en MAP vs dato
+        plt.figure(figsize=(10, 4))
+        plt.bar([0, 1], [ratio_obs, ratio_map])
+        plt.xticks([0, 1], ["observed H0_early/H0_local", "HQCB MAP pred"])
+        plt.ylabel("ratio")
+        plt.title("HQCB toy: H0 ratio check")
+        plt.grid(True, axis="y")
+        f2 = figdir / "hqcb_infer_H0_ratio.png"
+        plt.tight_layout()
+        _savefig(plt, f2)
+        plt.close()
+
+    # Salida ASCII-safe (evita Unicode en runners Windows)
+    mc = res["model_comparison"]
+    print("=== HQCB inference (toy) ===")
+    print(f"Config: {str(config)}")
+    print(f"gamma_ref: {gamma_ref:.6f}")
+    print(f"gamma_map: {gmap:.6f} ; gamma_mean: {gmean:.6f}")
+    print(f"H0_local_map: {H0_local_map:.3f} ; H0_early_pred_map: {H0_early_pred_map:.3f}")
+    print(f"delta_AIC (LCDM - HQCB): {mc['delta_AIC']:.3f}")
+    print(f"delta_BIC (LCDM - HQCB): {mc['delta_BIC']:.3f}")
+    print(f"wrote: {str(out_path)}")
+    if figures:
+        print(f"figures: {str(f1)} ; {str(f2)}")
+    if cache is not None:
+        print(f"cache: {cache.stats}")
+
+    return 0
+
+
+def _joint_with_bao(
+    cfg: HQCBInferenceConfig, res: Dict[str, Any], csv_path: Path, cov_path: Path, p_sens: float,
+    table_cache: Path | None = None, emulator: HQCBEmulator | None = None,
+    bao: BAOMockDataset | None = None,
+) -> Dict[str, Any]:
+    # BAO dataset mock (cov)
+    if bao is None:
+        bao = load_bao_mock_csv(csv_path=str(csv_path), cov_path=str(cov_path),
+                                cache_dir=table_cache)
+
+    gammas = np.asarray(res["grid"]["gamma"], dtype=float)
+    p_gamma = np.asarray(res["posterior"]["p_gamma"], dtype=float)
+
+    with profiling.stage("bao_reweight"):
+        # Repondera p(gamma) por likelihood BAO (marginal: BAO depende de gamma, no de H0_local en este mock)
+        if emulator is None:
+            logw_bao = bao_loglike_hqcb_grid(bao, gammas, cfg.gamma_ref, cfg.kappa_b, p_sens)
+        else:
+            from .inference.emulator import emulated_bao_loglike
+
+            logw_bao = emulated_bao_loglike(emulator, bao, gammas)
+
+        # Estabiliza y combina
+        m = np.max(logw_bao)
+        w = np.exp(logw_bao - m)
+        p_gamma_joint = p_gamma * w
+        Z = np.sum(p_gamma_joint)
+        if not np.isfinite(Z) or Z <= 0:
+            raise RuntimeError("Joint normalization failed")
+        p_gamma_joint /= Z
+
+    return {
+        "base_H0_results": res,
+        "bao_mock": {
+            "N": int(bao.z.shape[0]),
+            "z": bao.z.tolist(),
+            "dv_over_rd": bao.dv_over_rd.tolist(),
+            "bao_p_sensitivity": p_sens,
+        },
+        "joint": {
+            "p_gamma_joint": p_gamma_joint,
+            "gamma_mean_joint": float(np.sum(gammas * p_gamma_joint)),
+            "gamma_map_joint": float(gammas[int(np.argmax(p_gamma_joint))]),
+        }
+    }
+
+
+def run_infer_data(
+    config: str | Path,
+    out: str | Path = "data/results/hqcb_infer_data_results.json",
+    figdir: str | Path = "docs/figures",
+    grid: Dict[str, Any] | None = None,
+    figures: bool = True,
+    cache: ResultCache | None = None,
+    fmt: str = "json",
+    keep_logpost: bool = False,
+    emulator: Dict[str, Any] | None = None,
+) -> int:
+    """infer-data: posterior H0-only reponderado con la likelihood BAO mock.
+
+    emulator: opciones de EmulatorSpec (n_gamma, kind); H0_early y DV/rd salen de la tabla.
+    """
+    y = load_inference_yaml(config)
+
+    # Reusa tu bloque H0-toy (mismo config base)
+    cfg = inference_config_from_yaml(y)
+    csv_path = resolve_data_path(y["bao_csv"], config)
+    cov_path = resolve_data_path(y["bao_cov"], config)
+    p_sens = float(y["bao_p_sensitivity"])
+
+    # La clave conjunta incluye la del posterior H0-only: si sólo cambia BAO
+    # (p. ej. bao_p_sensitivity) el posterior H0-only sale de caché y sólo se repondera.
+    h0_payload = grid_posterior_payload(cfg, grid, keep_logpost, emulator)
+    # Con caché de resultados, la tabla BAO parseada y su Cholesky también se guardan
+    tables = None if cache is None else cache.root / "tables"
+    bao = emu = None
+    if emulator is not None:
+        # La tabla del emulador necesita los redshifts BAO: el dataset se carga una vez
+        bao = load_bao_mock_csv(csv_path=str(csv_path), cov_path=str(cov_path), cache_dir=tables)
+        emu = load_emulator(cfg, emulator, cache, bao, p_sens)
+
+    def compute() -> Dict[str, Any]:
+        res = _cached(cache, "grid_posterior", h0_payload,
+                      lambda: grid_posterior(cfg, **(grid or {}), as_arrays=True,
+                                             keep_logpost=keep_logpost, emulator=emu))
+        return _joint_with_bao(cfg, res, csv_path, cov_path, p_sens, tables, emu, bao)
+
+    joint_payload: Dict[str, Any] = {}
+    if cache is not None:
+        joint_payload = {
+            "grid_posterior": h0_payload,
+            "bao_csv": file_digest(csv_path),
+            "bao_cov": file_digest(cov_path),
+            "bao_p_sensitivity": p_sens,
+        }
+    out_d = _cached(cache, "infer_data", joint_payload, compute)
+
+    gammas = np.asarray(out_d["base_H0_results"]["grid"]["gamma"], dtype=float)
+    p_gamma = np.asarray(out_d["base_H0_results"]["posterior"]["p_gamma"], dtype=float)
+    p_gamma_joint = np.asarray(out_d["joint"]["p_gamma_joint"], dtype=float)
+    gamma_mean_joint = float(out_d["joint"]["gamma_mean_joint"])
+    gamma_map_joint = float(out_d["joint"]["gamma_map_joint"])
+
+    if figures:
+        # Fig: posterior gamma (H0-only) vs joint(H0+BAO)
+        plt = _pyplot()
+        figdir = Path(figdir)
+        figdir.mkdir(parents=True, exist_ok=True)
+
+        plt.figure(figsize=(10, 4))
+        plt.plot(gammas, p_gamma, label="H0-only")
+        plt.plot(gammas, p_gamma_joint, label="H0 + BAO(cov)")
+        plt.axvline(cfg.gamma_ref, linestyle="--", label="gamma_ref")
+        plt.xlabel("gamma")
+        plt.ylabel("posterior")
+        plt.title("HQCB: gamma posterior update with BAO mock")
+        plt.grid(True)
+        plt.legend()
+        f1 = figdir / "hqcb_infer_joint_gamma.png"
+        plt.tight_layout()
+        _savefig(plt, f1)
+        plt.close()
+
+    out_path = write_result(out_d, out, fmt)
+
+    # ASCII-safe prints
+    print("=== HQCB infer-data (H0 toy + BAO mock cov) ===")
+    print(f"Config: {str(config)}")
+    print(f"gamma_ref: {cfg.gamma_ref:.6f}")
+    print(f"gamma_mean_joint: {gamma_mean_joint:.6f}")
+    print(f"gamma_map_joint: {gamma_map_joint:.6f}")
+    print(f"wrote: {str(out_path)}")
+    if figures:
+        print(f"figure: {str(f1)}")
+    if cache is not None:
+        print(f"cache: {cache.stats}")
+
+    return 0
+
+
+# --- HQCB sampling (sample) ---
+
+def run_sample(
+    config: str | Path,
+    out: str | Path = "data/results/hqcb_sample_results.json",
+    free: Dict[str, Tuple[float, float]] | None = None,
+    n_walkers: int = 32,
+    n_steps: int = 2000,
+    burn: int | None = None,
+    seed: int | None = 0,
+    fmt: str = "json",
+) -> int:
+    """sample: ensemble sampler on (gamma, H0_local) plus the extra free parameters in `free`.
+
+    Si el YAML trae bao_csv/bao_cov se añade la likelihood BAO (como en infer-data).
+    """
+    from .inference.sampling import FreeParameter, default_free_parameters, sample_posterior
+
+    y = load_inference_yaml(config)
+    cfg = inference_config_from_yaml(y)
+    params = default_free_parameters(cfg) + tuple(
+        FreeParameter(name, float(lo), float(hi)) for name, (lo, hi) in (free or {}).items()
+    )
+    bao = load_yaml_bao(y, config)
+    res = sample_posterior(
+        cfg, free=params, bao=bao, bao_p_sensitivity=y.get("bao_p_sensitivity"),
+        n_walkers=n_walkers, n_steps=n_steps, burn=burn, seed=seed, as_arrays=True,
+    )
+    out_path = write_result(res, out, fmt)
+
+    diag: Dict[str, Any] = res["diagnostics"]  # type: ignore[assignment]
+    print("=== HQCB sample (ensemble sampler) ===")
+    print(f"Config: {str(config)}")
+    print(f"free: {', '.join(p.name for p in params)} ; bao: {'yes' if bao is not None else 'no'}")
+    print(f"walkers x steps: {n_walkers} x {n_steps} (burn {diag['burn']}) ; "
+          f"acceptance: {diag['acceptance_fraction']:.3f}")
+    for name, p in res["parameters"].items():  # type: ignore[attr-defined]
+        print(f"{name}: mean {p['mean']:.6f} ; 68% [{p['q68'][0]:.6f}, {p['q68'][1]:.6f}] ; "
+              f"tau {diag['autocorr_time'][name]:.1f} ; ESS {diag['ess'][name]:.0f}")
+    if not diag["converged"]:
+        print("warning: chain shorter than 50 autocorrelation times; increase --n-steps")
+    print(f"wrote: {str(out_path)}")
+    return 0
+
+
+# --- HQCB profile likelihood (profile) ---
+
+def run_profile(
+    config: str | Path,
+    out: str | Path = "data/results/hqcb_profile_results.json",
+    parameters: Sequence[str] | None = None,
+    free: Dict[str, Tuple[float, float]] | None = None,
+    n_points: int = 41,
+    fmt: str = "json",
+) -> int:
+    """profile: MLE, profile likelihoods with Wilks intervals and exact AIC/BIC.
+
+    Mismos parámetros libres y misma likelihood que `sample` (BAO si el YAML la trae).
+    """
+    from .inference.profile import profile_all
+    from .inference.sampling import FreeParameter, default_free_parameters
+
+    y = load_inference_yaml(config)
+    cfg = inference_config_from_yaml(y)
+    params = default_free_parameters(cfg) + tuple(
+        FreeParameter(name, float(lo), float(hi)) for name, (lo, hi) in (free or {}).items()
+    )
+    bao = load_yaml_bao(y, config)
+    res = profile_all(cfg, parameters=parameters, n_points=n_points, free=params, bao=bao,
+                      bao_p_sensitivity=y.get("bao_p_sensitivity"), as_arrays=True)
+    out_path = write_result(res, out, fmt)
+
+    mle: Dict[str, Any] = res["mle"]  # type: ignore[assignment]
+    mc: Dict[str, Any] = res["model_comparison"]  # type: ignore[assignment]
+    print("=== HQCB profile likelihood ===")
+    print(f"Config: {str(config)}")
+    print(f"free: {', '.join(p.name for p in params)} ; bao: {'yes' if bao is not None else 'no'}")
+    print(f"logL_max: {mle['logL_max']:.6f} ; delta_AIC: {mc['delta_AIC']:.6f} ; "
+          f"delta_BIC: {mc['delta_BIC']:.6f}")
+    for name, p in res["profiles"].items():  # type: ignore[attr-defined]
+        iv = " U ".join(f"[{a:.6f}, {b:.6f}]" for a, b in p["intervals"]["68"])
+        print(f"{name}: MLE {p['mle']:.6f} ; 68% {iv} ; {p['n_evaluations']} evaluations")
+    print(f"wrote: {str(out_path)}")
+    return 0
+
+
+# --- Emulator tables (emulator) ---
+
+def run_emulator(
+    config: str | Path,
+    out: str | Path = "data/results/hqcb_emulator_report.json",
+    directory: str | Path = ".hqcb_cache/emulator",
+    n_gamma: int = 257,
+    kind: str = "cubic",
+    rebuild: bool = False,
+) -> int:
+    """emulator: build (or reuse) the HQCB prediction table of a config and report its accuracy."""
+    from .inference.emulator import EmulatorSpec, emulator_path, load_or_build
+
+    y = load_inference_yaml(config)
+    cfg = inference_config_from_yaml(y)
+    bao = load_yaml_bao(y, config)
+    spec = EmulatorSpec.from_config(cfg, bao=bao, bao_p_sensitivity=y.get("bao_p_sensitivity"),
+                                    n_gamma=n_gamma, kind=kind)
+    emu, built = load_or_build(spec, directory, rebuild=rebuild)
+    report: Dict[str, Any] = {
+        "table": str(emulator_path(spec, directory)), "fingerprint": spec.fingerprint(),
+        "built": built, "spec": asdict(spec), "accuracy": emu.accuracy(),
+    }
+    out_path = write_result(report, out)
+
+    print("=== HQCB emulator ===")
+    print(f"Config: {str(config)}")
+    print(f"table: {report['table']} ({'built' if built else 'reused'}) ; {kind}, {n_gamma} nodes")
+    for name, acc in report["accuracy"].items():
+        if isinstance(acc, dict):
+            print(f"{name}: max abs error {acc['max_abs_error']:.3e} ; max rel error {acc['max_rel_error']:.3e}")
+    print(f"wrote: {str(out_path)}")
+    return 0
+
+
+# --- Closure-parameter sweeps (sweep) ---
+
+def run_sweep(
+    config: str | Path,
+    out: str | Path = "data/results/hqcb_sweep.csv",
+    kappa_b: Sequence[float] | None = None,
+    beta: Sequence[float] | None = None,
+    p_sens: Sequence[float] | None = None,
+    use_bao: bool = True,
+    memory_budget_mb: float | None = None,
+    workers: int = 1,
+    backend: str = "thread",
+) -> int:
+    """sweep: gamma posterior summaries and delta AIC/BIC over kappa_b x beta x bao_p_sensitivity.
+
+    Los valores no dados se toman del YAML; con bao_csv/bao_cov (y use_bao) se añaden
+    las columnas del posterior reponderado con BAO, como en infer-data.
+    """
+    from .forecast import write_table
+    from .inference.sweep import sweep_closure
+
+    y = load_inference_yaml(config)
+    cfg = inference_config_from_yaml(y)
+    bao = load_yaml_bao(y, config) if use_bao else None
+    if bao is None and p_sens:
+        raise ValueError("bao_p_sensitivity values need a config with bao_csv/bao_cov")
+    res = sweep_closure(
+        cfg,
+        kappa_b=[cfg.kappa_b] if kappa_b is None else kappa_b,
+        beta=[cfg.beta_rd_sensitivity] if beta is None else beta,
+        p_sens=None if bao is None else (p_sens or [float(y["bao_p_sensitivity"])]),
+        bao=bao, memory_budget_mb=memory_budget_mb, workers=workers, backend=backend,
+    )
+    out_path = write_table(res["rows"], out, columns=res["columns"])
+
+    d_aic = [r["delta_AIC_joint" if bao is not None else "delta_AIC"] for r in res["rows"]]
+    print("=== HQCB closure sweep ===")
+    print(f"Config: {str(config)}")
+    print(f"combinations: {res['n_combinations']} ; H0 grids: {res['n_h0_grids']} ; "
+          f"BAO curves: {res['n_bao_curves']} ; bao: {'yes' if bao is not None else 'no'}")
+    print(f"delta_AIC{' (joint)' if bao is not None else ''}: min {min(d_aic):.3f} ; max {max(d_aic):.3f}")
+    print(f"wrote: {str(out_path)}")
+    return 0
+
+
+# --- Pseudo-experiments (toys) ---
+
+TOY_MODELS = ("kappa-lambda", "hqcb")
+
+
+def run_toys(
+    model: str,
+    config: str | Path,
+    out: str | Path = "data/results/toys_results.json",
+    n_toys: int = 100_000,
+    seed: int | None = 0,
+    workers: int = 1,
+    truth: Dict[str, float] | None = None,
+    keep_toys: bool = False,
+    fmt: str = "json",
+) -> int:
+    """toys: coverage and pulls from pseudo-experiments of the kappa_lambda or HQCB likelihood.
+
+    kappa-lambda: `config` es un YAML de proyección (como `asimov`); truth: kappa_lambda.
+    hqcb: YAML de inferencia (BAO si lo trae); truth: gamma, H0_local.
+    """
+    truth = dict(truth or {})
+    if model == "kappa-lambda":
+        from .io import load_config
+        from .toys import rate_toys
+
+        unknown = set(truth) - {"kappa_lambda"}
+        if unknown:
+            raise ValueError(f"Unknown truth parameters for {model}: {sorted(unknown)}")
+        res = rate_toys(load_config(config), n_toys=n_toys, kappa_true=truth.get("kappa_lambda", 1.0),
+                        seed=seed, workers=workers, keep_toys=keep_toys)
+    elif model == "hqcb":
+        from .inference.toys import hqcb_toys
+
+        unknown = set(truth) - {"gamma", "H0_local"}
+        if unknown:
+            raise ValueError(f"Unknown truth parameters for {model}: {sorted(unknown)}")
+        y = load_inference_yaml(config)
+        bao = load_yaml_bao(y, config)
+        res = hqcb_toys(inference_config_from_yaml(y), n_toys=n_toys, gamma_true=truth.get("gamma"),
+                        H0_local_true=truth.get("H0_local"), bao=bao,
+                        bao_p_sensitivity=y.get("bao_p_sensitivity"), seed=seed, workers=workers,
+                        keep_toys=keep_toys)
+    else:
+        raise ValueError(f"model must be one of {TOY_MODELS}")
+    out_path = write_result(res, out, fmt)
+
+    print(f"=== Toys ({model}) ===")
+    print(f"Config: {str(config)}")
+    print(f"toys: {n_toys} ; seed: {seed} ; truth: {res['truth']}")
+    cov: Dict[str, Any] = res["coverage"]  # type: ignore[assignment]
+    groups = cov if model == "hqcb" else {"kappa_lambda": cov}
+    for name, levels in groups.items():
+        print(f"{name}: " + " ; ".join(
+            f"{k}% coverage {c['coverage']:.4f} +- {c['error']:.4f} (expected {c['expected']:.4f})"
+            for k, c in levels.items()))
+    for name, p in res["pulls"].items():  # type: ignore[attr-defined]
+        print(f"pull {name}: mean {p['mean']:+.4f} +- {p['mean_error']:.4f} ; "
+              f"std {p['std']:.4f} +- {p['std_error']:.4f}")
+    print(f"wrote: {str(out_path)}")
+    return 0
@@ -0,0 +1,243 @@
+# Copyright (c) 2026 Oscar Fuentes Fernández
+# SPDX-License-Identifier: AGPL-3.0-or-later
+"""Opt-in timing instrumentation for pipeline stages and likelihood calls.
+
+Code marks its hot paths with ``with profiling.stage("name"):``,
+``@profiling.timed("name")`` and ``profiling.count("name", n)``. All are no-ops (one global lookup) unless a
+:class:`Profiler` is active, which the CLI does for ``--profile`` or when the
+``HQCB_PROFILE`` environment variable is set (``HQCB_PROFILE=pstats`` also
+records a cProfile dump of the hottest top-level stage).
+
+Stdlib only, so importing this module keeps ``import hqcb_hhh.cli`` light.
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from pathlib import Path
+from functools import wraps
+from typing import Any, Callable, ContextManager, Dict, Iterator, List, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+ENV_VAR = "HQCB_PROFILE"
+
+_NULL = nullcontext()
+
+
+@dataclass
+class StageStats:
+    calls: int = 0
+    wall_s: float = 0.0
+    cpu_s: float = 0.0
+    peak_mb: float | None = None   # None: sólo se ejecutó en hilos de trabajo
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"calls": self.calls, "wall_s": self.wall_s, "cpu_s": self.cpu_s, "peak_mb": self.peak_mb}
+
+
+@dataclass
+class _Frame:
+    start_bytes: int
+    peak_seen: int = 0
+
+
+@dataclass
+class Profiler:
+    """Per-stage wall time, CPU time and peak traced memory, plus named counters.
+
+    Los stages con el mismo nombre se acumulan. El pico de memoria de un stage es
+    el máximo de memoria trazada (tracemalloc) por encima de la que había al entrar,
+    incluidos sus stages anidados.
+
+    Stages run from worker threads (``--backend thread``) keep their own nesting
+    stack and count wall time and that thread's CPU time, but no peak: tracemalloc's
+    peak is process-wide, so only the thread that started the profiler measures it.
+    """
+    cprofile: bool = False
+    trace_memory: bool = True
+    stages: Dict[str, StageStats] = field(default_factory=dict)
+    counters: Dict[str, int] = field(default_factory=dict)
+    _local: threading.local = field(default_factory=threading.local)   # pila de _Frame por hilo
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+    _owner: int = 0   # hilo que llamó a start(): el único que mide picos de memoria
+    _profiles: Dict[str, Any] = field(default_factory=dict)   # nombre -> pstats.Stats
+    _root: _Frame = field(default_factory=lambda: _Frame(0))
+    _t0: float = 0.0
+    _c0: float = 0.0
+    _wall: float = 0.0
+    _cpu: float = 0.0
+    _started_tracing: bool = False
+
+    def start(self) -> None:
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self._owner = threading.get_ident()
+        self._t0, self._c0 = time.perf_counter(), time.process_time()
+        self._root = _Frame(self._traced()[0])
+
+    def stop(self) -> None:
+        self._wall = time.perf_counter() - self._t0
+        self._cpu = time.process_time() - self._c0
+        self._root.peak_seen = max(self._root.peak_seen, self._traced()[1])
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def _traced(self) -> tuple[int, int]:
+        return tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+
+    def _frames(self) -> List[_Frame]:
+        stack: List[_Frame] | None = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        stack = self._frames()
+        main = threading.get_ident() == self._owner
+        parent = stack[-1] if stack else self._root
+        cur = 0
+        if main:
+            # reset_peak es global al proceso: un hilo de trabajo lo rompería al resto
+            cur, peak = self._traced()
+            parent.peak_seen = max(parent.peak_seen, peak)
+            if tracemalloc.is_tracing():
+                tracemalloc.reset_peak()
+        frame = _Frame(cur)
+        stack.append(frame)
+        # cProfile sólo en stages de primer nivel del hilo principal (no admite perfiles anidados)
+        prof = None
+        if self.cprofile and main and len(stack) == 1:
+            import cProfile
+
+            prof = cProfile.Profile()
+        # CPU: la del proceso en el hilo principal (incluye a sus workers), la del hilo si no
+        clock = time.process_time if main else time.thread_time
+        t0, c0 = time.perf_counter(), clock()
+        if prof is not None:
+            prof.enable()
+        try:
+            yield
+        finally:
+            if prof is not None:
+                prof.disable()
+            wall, cpu = time.perf_counter() - t0, clock() - c0
+            stack.pop()
+            peak_mb = None
+            if main:
+                peak = max(frame.peak_seen, self._traced()[1])
+                parent.peak_seen = max(parent.peak_seen, peak)
+                peak_mb = (peak - frame.start_bytes) / 1024**2
+            with self._lock:
+                st = self.stages.setdefault(name, StageStats())
+                st.calls += 1
+                st.wall_s += wall
+                st.cpu_s += cpu
+                if peak_mb is not None:
+                    st.peak_mb = peak_mb if st.peak_mb is None else max(st.peak_mb, peak_mb)
+            if prof is not None:
+                import pstats
+
+                if name in self._profiles:
+                    self._profiles[name].add(prof)
+                else:
+                    self._profiles[name] = pstats.Stats(prof)
+
+    def count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + int(n)
+
+    def hottest(self) -> str | None:
+        """Top-level stage with the largest wall time (None if no stage ran)."""
+        top = self._profiles if self._profiles else self.stages
+        return max(top, key=lambda k: self.stages[k].wall_s, default=None)
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "total": {"wall_s": self._wall, "cpu_s": self._cpu,
+                      "peak_mb": (self._root.peak_seen - self._root.start_bytes) / 1024**2},
+            "stages": {k: v.as_dict()
+                       for k, v in sorted(self.stages.items(), key=lambda kv: -kv[1].wall_s)},
+            "counters": dict(sorted(self.counters.items())),
+            "hottest": self.hottest(),
+            "trace_memory": self.trace_memory,
+            "cprofile": self.cprofile,
+        }
+
+    def write(self, path: str | Path, extra: Dict[str, Any] | None = None) -> Path:
+        """JSON report at `path`; with cprofile also `<path stem>.pstats` for the hottest stage."""
+        p = Path(path)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        doc = {**(extra or {}), **self.report(), "pstats": None}
+        hot = doc["hottest"]
+        if self.cprofile and hot in self._profiles:
+            dump = p.with_suffix(".pstats")
+            self._profiles[hot].dump_stats(str(dump))
+            doc["pstats"] = str(dump)
+        p.write_text(json.dumps(doc, indent=2), encoding="utf-8")
+        return p
+
+
+_ACTIVE: Profiler | None = None
+
+
+def enable(*, cprofile: bool = False, trace_memory: bool = True) -> Profiler:
+    global _ACTIVE
+    if _ACTIVE is not None:
+        raise RuntimeError("A profiler is already active")
+    prof = Profiler(cprofile=cprofile, trace_memory=trace_memory)
+    prof.start()
+    _ACTIVE = prof
+    return prof
+
+
+def disable() -> Profiler | None:
+    global _ACTIVE
+    prof, _ACTIVE = _ACTIVE, None
+    if prof is not None:
+        prof.stop()
+    return prof
+
+
+def active() -> Profiler | None:
+    return _ACTIVE
+
+
+def env_setting() -> str | None:
+    """HQCB_PROFILE: unset/"", "0", "false" or "off" disable it; "pstats" also dumps cProfile."""
+    v = os.environ.get(ENV_VAR, "").strip().lower()
+    return None if v in ("", "0", "false", "off", "no") else v
+
+
+def stage(name: str) -> ContextManager[None]:
+    """Time a block as stage `name` when profiling is active (a shared no-op otherwise)."""
+    prof = _ACTIVE
+    return _NULL if prof is None else prof.stage(name)
+
+
+def count(name: str, n: int = 1) -> None:
+    prof = _ACTIVE
+    if prof is not None:
+        prof.count(name, n)
+
+
+def timed(name: str) -> Callable[[F], F]:
+    """Decorator: every call of the function is a stage `name` when profiling is active."""
+    def deco(fn: F) -> F:
+        @wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            prof = _ACTIVE
+            if prof is None:
+                return fn(*args, **kwargs)
+            with prof.stage(name):
+                return fn(*args, **kwargs)
+        return wrapper  # type: ignore[return-value]
+    return deco
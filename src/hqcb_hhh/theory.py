@@ -3,9 +3,11 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Iterable, Tuple
+from typing import Iterable, Sequence, Tuple
 import numpy as np
 
+from .fitting import QUADRATIC, fit_polynomial
+
 @dataclass(frozen=True)
 class QuadraticSigmaModel:
     """"Quadratic parametrization: sigma(k) = a k^2 + b k + c.""" ""
@@ -17,7 +19,9 @@ class QuadraticSigmaModel:
         k = np.asarray(kappa_lambda, dtype=float)
         return self.a * k**2 + self.b * k + self.c
 
-def fit_quadratic_sigma(points: Iterable[Tuple[float, float]]) -> QuadraticSigmaModel:
+def fit_quadratic_sigma(
+    points: Iterable[Tuple[float, float]], *, sigma_err: Sequence[float] | None = None
+) -> QuadraticSigmaModel:
     """"Least-squares fit of a quadratic to (kappa_lambda, sigma_fb) points.""" ""
     pts = list(points)
     if len(pts) < 3:
@@ -26,7 +30,6 @@ def fit_quadratic_sigma(points: Iterable[Tuple[float, float]]) -> QuadraticSigma
     ks = np.array([p[0] for p in pts], dtype=float)
     ys = np.array([p[1] for p in pts], dtype=float)
 
-    X = np.vstack([ks**2, ks, np.ones_like(ks)]).T
-    coeff, *_ = np.linalg.lstsq(X, ys, rcond=None)
-    a, b, c = coeff.tolist()
+    # Pseudo-inversa del diseño en caché (fitting): los nodos se repiten entre escenarios
+    a, b, c = fit_polynomial(ks, ys, QUADRATIC, sigma_err).coeffs.tolist()
     return QuadraticSigmaModel(a=a, b=b, c=c)
@@ -0,0 +1,189 @@
+# Copyright (c) 2026 Oscar Fuentes Fernández
+# SPDX-License-Identifier: AGPL-3.0-or-later
+"""Pseudo-experiments (toy Monte Carlo) for interval coverage and pull studies.
+
+Toys are generated and fitted in fixed-size batches, each with its own
+``numpy.random.Generator`` spawned from one ``SeedSequence``. The batch layout
+does not depend on the number of workers, so a run is reproducible bit for
+bit whether it executes serially or in a process pool.
+"""
+from __future__ import annotations
+
+import math
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from typing import Callable, Dict, Mapping
+
+import numpy as np
+
+from . import profiling
+from .io import Config
+from .theory import QuadraticSigmaModel, fit_quadratic_sigma
+
+# Toys por lote: acota la memoria de cada ajuste vectorizado y fija el reparto de semillas
+DEFAULT_BATCH_SIZE = 1 << 16
+
+BatchFit = Callable[[np.random.Generator, int], Dict[str, np.ndarray]]
+
+
+def run_batches(
+    fit_batch: BatchFit,
+    n_toys: int,
+    *,
+    seed: int | None = 0,
+    workers: int = 1,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Dict[str, np.ndarray]:
+    """Run fit_batch(rng, n) over n_toys in batches and concatenate the per-toy arrays.
+
+    fit_batch debe ser picklable (función de módulo o functools.partial) si workers > 1.
+    """
+    if n_toys < 1:
+        raise ValueError("n_toys must be >= 1")
+    if workers < 1:
+        raise ValueError("workers must be >= 1")
+    if batch_size < 1:
+        raise ValueError("batch_size must be >= 1")
+    sizes = [min(batch_size, n_toys - i) for i in range(0, n_toys, batch_size)]
+    rngs = [np.random.default_rng(s) for s in np.random.SeedSequence(seed).spawn(len(sizes))]
+
+    if workers > 1 and len(sizes) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(sizes))) as pool:
+            parts = list(pool.map(fit_batch, rngs, sizes))
+    else:
+        parts = [fit_batch(r, n) for r, n in zip(rngs, sizes)]
+    return {k: np.concatenate([p[k] for p in parts]) for k in parts[0]}
+
+
+def wilks_coverage(delta: float, dof: int = 1) -> float:
+    """Asymptotic coverage of the region DeltaNLL <= delta (chi2 with dof degrees of freedom)."""
+    if dof == 1:
+        return math.erf(math.sqrt(delta))
+    if dof == 2:
+        return 1.0 - math.exp(-delta)
+    raise ValueError("dof must be 1 or 2")
+
+
+def coverage_summary(delta_nll: np.ndarray, thresholds: Mapping[str, float],
+                     dof: int = 1) -> Dict[str, Dict[str, float]]:
+    """Fraction of toys whose truth lies inside each DeltaNLL region, with its binomial error."""
+    n = int(delta_nll.shape[0])
+    out: Dict[str, Dict[str, float]] = {}
+    for key, thr in thresholds.items():
+        p = float(np.count_nonzero(delta_nll <= thr)) / n
+        out[key] = {
+            "coverage": p,
+            "error": math.sqrt(max(p * (1.0 - p), 1.0 / n) / n),
+            "expected": wilks_coverage(float(thr), dof),
+            "delta_nll": float(thr),
+        }
+    return out
+
+
+def pull_summary(pulls: np.ndarray) -> Dict[str, float]:
+    """Mean and width of a pull distribution (N(0, 1) when the asymptotics hold)."""
+    x = pulls[np.isfinite(pulls)]
+    n = int(x.shape[0])
+    if n < 2:
+        raise ValueError("Need at least 2 finite pulls")
+    sd = float(np.std(x, ddof=1))
+    q = np.quantile(x, [0.16, 0.5, 0.84])
+    return {
+        "n": n,
+        "mean": float(np.mean(x)),
+        "mean_error": sd / math.sqrt(n),
+        "std": sd,
+        "std_error": sd / math.sqrt(2.0 * (n - 1)),
+        "q16": float(q[0]),
+        "median": float(q[1]),
+        "q84": float(q[2]),
+    }
+
+
+# --- kappa_lambda: tasa HH inclusiva ---
+
+@dataclass(frozen=True)
+class RateToyModel:
+    """Gaussian rate measurement sigma_obs ~ N(sigma(kappa_true), sigma_err) on [kappa_min, kappa_max]."""
+    model: QuadraticSigmaModel
+    sigma_err: float
+    kappa_min: float
+    kappa_max: float
+
+    @classmethod
+    def from_config(cls, cfg: Config) -> "RateToyModel":
+        # Mismo error que el Asimov de `asimov`/forecast: rel_uncert_rate * sigma(1)
+        model = fit_quadratic_sigma(cfg.sigma_points)
+        return cls(model, cfg.rel_uncert_rate * float(model.sigma(1.0)), cfg.kappa_min, cfg.kappa_max)
+
+
+def fit_rate_toys(toy: RateToyModel, sigma_obs: np.ndarray) -> Dict[str, np.ndarray]:
+    """Exact MLE of every toy at once: kappa_hat and nll_min, one entry per sigma_obs.
+
+    Los candidatos son los de RateGaussianLikelihood.stationary_points (vértice y
+    raíces de sigma(k) = sigma_obs) más los extremos del rango, evaluados en bloque.
+    """
+    a, b, c = toy.model.a, toy.model.b, toy.model.c
+    s = np.atleast_1d(np.asarray(sigma_obs, dtype=float))
+    lo, hi = toy.kappa_min, toy.kappa_max
+    cands = [np.full(s.shape, lo), np.full(s.shape, hi)]
+    if a != 0.0:
+        cands.append(np.full(s.shape, -b / (2.0 * a)))
+        disc = b * b - 4.0 * a * (c - s)
+        sq = np.sqrt(np.where(disc >= 0.0, disc, np.nan))
+        cands += [(-b - sq) / (2.0 * a), (-b + sq) / (2.0 * a)]
+    elif b != 0.0:
+        cands.append((s - c) / b)
+    k = np.stack(cands)
+    k = np.where((k >= lo) & (k <= hi), k, np.nan)
+    nll = 0.5 * ((toy.model.sigma(k) - s) / toy.sigma_err) ** 2
+    i = np.nanargmin(nll, axis=0)[None, :]
+    return {"kappa_hat": np.take_along_axis(k, i, axis=0)[0],
+            "nll_min": np.take_along_axis(nll, i, axis=0)[0]}
+
+
+def _rate_batch(toy: RateToyModel, kappa_true: float, rng: np.random.Generator, n: int) -> Dict[str, np.ndarray]:
+    s_true = float(toy.model.sigma(kappa_true))
+    sigma_obs = s_true + toy.sigma_err * rng.standard_normal(n)
+    fit = fit_rate_toys(toy, sigma_obs)
+    delta = 0.5 * ((s_true - sigma_obs) / toy.sigma_err) ** 2 - fit["nll_min"]
+    return {"sigma_obs": sigma_obs, "kappa_hat": fit["kappa_hat"], "delta_nll": np.maximum(delta, 0.0)}
+
+
+@profiling.timed("toys")
+def rate_toys(
+    cfg: Config,
+    *,
+    n_toys: int = 100_000,
+    kappa_true: float = 1.0,
+    seed: int | None = 0,
+    workers: int = 1,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    keep_toys: bool = False,
+) -> Dict[str, object]:
+    """Coverage of the kappa_lambda DeltaNLL intervals of `cfg` and pulls, from n_toys toys.
+
+    La cobertura cuenta los toys con NLL(kappa_true) - NLL_min <= delta (el verdadero
+    valor dentro del intervalo, aunque éste sea disjunto). El pull es la raíz con signo
+    sign(kappa_hat - kappa_true) * sqrt(2 DeltaNLL(kappa_true)).
+    """
+    toy = RateToyModel.from_config(cfg)
+    if not toy.kappa_min <= kappa_true <= toy.kappa_max:
+        raise ValueError("kappa_true must lie in [kappa_min, kappa_max]")
+    t = run_batches(partial(_rate_batch, toy, float(kappa_true)), n_toys,
+                    seed=seed, workers=workers, batch_size=batch_size)
+    pull = np.sign(t["kappa_hat"] - kappa_true) * np.sqrt(2.0 * t["delta_nll"])
+    res: Dict[str, object] = {
+        "n_toys": n_toys,
+        "seed": seed,
+        "truth": {"kappa_lambda": float(kappa_true)},
+        "coverage": coverage_summary(
+            t["delta_nll"], {"68": cfg.cl68_delta_nll, "95": cfg.cl95_delta_nll}),
+        "pulls": {"kappa_lambda": pull_summary(pull)},
+        "kappa_hat": {"mean": float(np.mean(t["kappa_hat"])), "std": float(np.std(t["kappa_hat"]))},
+    }
+    if keep_toys:
+        res["toys"] = {**t, "pull": pull}
+    return res
+
@@ -9,4 +9,23 @@ SRC = ROOT / "src"
 
 # Asegura que 'src' esté primero en sys.path (layout src/)
 if str(SRC) not in sys.path:
-    sys.path.insert(0, str(SRC))
\ No newline at end of file
+    sys.path.insert(0, str(SRC))
+import pytest  # noqa: E402
+
+from hqcb_hhh.inference import HQCBInferenceConfig  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def infer_cfg() -> HQCBInferenceConfig:
+    """Toy HQCB inference config shared by the grid, sampler and profile tests (401 x 321 grid).
+
+    Cada test ajusta la malla (u otros campos) con dataclasses.replace.
+    """
+    return HQCBInferenceConfig(
+        z_rec=1100.0, rd0_mpc=147.0,
+        H0_local_obs=73.0, H0_local_sigma=1.0,
+        H0_early_obs=67.4, H0_early_sigma=0.6,
+        gamma_ref=11.0 / 3.0, kappa_b=1.0, beta_rd_sensitivity=0.25,
+        gamma_min=3.0, gamma_max=4.5, H0_min=60.0, H0_max=80.0,
+        grid_gamma=401, grid_H0=321,
+    )
@@ -1,6 +1,12 @@
 ﻿import numpy as np
-from hqcb_hhh.theory import fit_quadratic_sigma
-from hqcb_hhh.likelihood import RateGaussianLikelihood, find_interval_1d
+import pytest
+from hqcb_hhh.theory import QuadraticSigmaModel, fit_quadratic_sigma
+from hqcb_hhh.likelihood import (
+    RateGaussianLikelihood,
+    find_interval_1d,
+    find_intervals_adaptive,
+    quadratic_rate_intervals,
+)
 
 def test_interval_shrinks_when_uncertainty_decreases():
     pts = [(0.0, 71.01), (1.0, 43.00), (2.0, 15.85)]
@@ -18,3 +24,96 @@ def test_interval_shrinks_when_uncertainty_decreases():
     i95_hi = find_interval_1d(grid, nll_hi, 1.92)
 
     assert (i95_lo[1] - i95_lo[0]) < (i95_hi[1] - i95_hi[0])
+
+def test_adaptive_interval_matches_dense_grid_and_is_cheap():
+    pts = [(0.0, 71.01), (1.0, 43.00), (2.0, 15.85)]
+    model = fit_quadratic_sigma(pts)
+    sigma_sm = float(model.sigma(1.0))
+    like = RateGaussianLikelihood(model, sigma_sm, 0.30 * sigma_sm)
+
+    calls = []
+    def nll(k):
+        calls.append(k)
+        return float(like.nll(k))
+
+    ivs = find_intervals_adaptive(nll, 1.92, -5.0, 10.0, breakpoints=like.stationary_points(),
+                                  xtol=1e-12)
+    assert len(ivs) == 1
+    assert len(calls) < 60
+    lo, hi = ivs[0]
+    # En los extremos se cumple exactamente DeltaNLL = delta
+    assert abs(float(like.nll(lo)) - 1.92) < 1e-8
+    assert abs(float(like.nll(hi)) - 1.92) < 1e-8
+
+    grid = np.linspace(-5, 10, 3001)
+    g_lo, g_hi = find_interval_1d(grid, like.nll(grid), 1.92)
+    step = grid[1] - grid[0]
+    assert abs(lo - g_lo) <= step and abs(hi - g_hi) <= step
+
+def test_adaptive_interval_reports_disjoint_branches():
+    # sigma(k) = (k - 3)^2 + 1 -> sigma(1) = sigma(5): dos mínimos de la NLL
+    model = QuadraticSigmaModel(a=1.0, b=-6.0, c=10.0)
+    like = RateGaussianLikelihood(model, float(model.sigma(1.0)), 0.2)
+    ivs = like.intervals(0.5, -5.0, 10.0, method="adaptive")
+    assert len(ivs) == 2
+    (a0, a1), (b0, b1) = ivs
+    assert a0 < 1.0 < a1 < 3.0 < b0 < 5.0 < b1
+
+    # Sin puntos estacionarios analíticos: barrido grueso + minimizador acotado
+    generic = find_intervals_adaptive(lambda k: float(like.nll(k)), 0.5, -5.0, 10.0)
+    np.testing.assert_allclose(np.array(generic), np.array(ivs), atol=1e-8)
+
+def test_analytic_intervals_match_adaptive_and_hit_delta_exactly():
+    model = fit_quadratic_sigma([(0.0, 71.01), (1.0, 43.00), (2.0, 15.85)])
+    s1 = float(model.sigma(1.0))
+    cases = [
+        # (model, sigma_asimov, sigma_err, delta, kappa_min, kappa_max)
+        (model, s1, 0.3 * s1, 1.92, -5.0, 10.0),
+        (model, s1, 2.0 * s1, 1.92, -1.0, 3.0),                             # recortado al rango
+        (QuadraticSigmaModel(1.0, -6.0, 10.0), 5.0, 0.2, 0.5, -5.0, 10.0),  # dos ramas
+        # sigma_asimov inalcanzable
+        (QuadraticSigmaModel(1.0, 0.0, 5.0), 0.0, 1.0, 0.5, -2.0, 2.0),
+        (QuadraticSigmaModel(-0.5, 1.0, 3.0), 2.0, 0.4, 1.92, -4.0, 4.0),   # a < 0
+        (QuadraticSigmaModel(0.0, -2.0, 4.0), 2.0, 0.5, 0.5, -3.0, 3.0),    # lineal
+    ]
+    for m, s0, err, delta, kmin, kmax in cases:
+        like = RateGaussianLikelihood(m, s0, err)
+        ivs = like.intervals(delta, kmin, kmax, method="analytic")
+        ref = like.intervals(delta, kmin, kmax, xtol=1e-13, method="adaptive")
+        assert len(ivs) == len(ref)
+        np.testing.assert_allclose(np.array(ivs), np.array(ref), atol=1e-9)
+        nll_min = like.mle(kmin, kmax)[1]
+        for k in np.array(ivs).ravel():
+            if kmin < k < kmax:
+                assert abs(float(like.nll(k)) - nll_min - delta) < 1e-9
+
+def test_analytic_intervals_vectorize_over_scenarios():
+    rng = np.random.default_rng(1)
+    n = 500
+    a, b = rng.normal(0.0, 1.0, n), rng.normal(0.0, 3.0, n)
+    c = rng.normal(10.0, 2.0, n)
+    err = rng.uniform(0.05, 2.0, n)
+    delta = rng.choice([0.5, 1.92], n)
+    lo, hi = quadratic_rate_intervals(a, b, c, c, err, delta, -3.0, 3.0)
+    assert lo.shape == hi.shape == (n, 2)
+    for i in range(n):
+        like = RateGaussianLikelihood(QuadraticSigmaModel(a[i], b[i], c[i]), c[i], err[i])
+        ivs = like.intervals(delta[i], -3.0, 3.0, method="adaptive", xtol=1e-13)
+        got = [(x, y) for x, y in zip(lo[i], hi[i]) if not np.isnan(x)]
+        assert len(got) == len(ivs)
+        np.testing.assert_allclose(np.array(got), np.array(ivs), atol=1e-8)
+    # Broadcasting: coeficientes (2, 1) x delta (3,) -> (2, 3, 2)
+    lo, hi = quadratic_rate_intervals([[1.0], [2.0]], -6.0, 10.0, 5.0, 0.2, [0.5, 1.0, 2.0],
+                                      -5.0, 10.0)
+    assert lo.shape == (2, 3, 2)
+
+def test_analytic_intervals_reject_invalid_inputs():
+    with pytest.raises(ValueError):
+        quadratic_rate_intervals(1.0, 0.0, 1.0, 1.0, 0.0, 0.5, -1.0, 1.0)
+    with pytest.raises(ValueError):
+        quadratic_rate_intervals(1.0, 0.0, 1.0, 1.0, 0.1, -0.5, -1.0, 1.0)
+    with pytest.raises(ValueError):
+        quadratic_rate_intervals(1.0, 0.0, 1.0, 1.0, 0.1, 0.5, 1.0, -1.0)
+    like = RateGaussianLikelihood(QuadraticSigmaModel(1.0, 0.0, 1.0), 1.0, 0.1)
+    with pytest.raises(ValueError):
+        like.intervals(0.5, -1.0, 1.0, method="grid")
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from hqcb_hhh.inference import load_bao_mock_csv, bao_loglike_hqcb, bao_loglike_hqcb_grid
+
+BAO_DIR = Path(__file__).resolve().parents[1] / "data" / "likelihoods" / "bao_mock"
+BAO_CSV = str(BAO_DIR / "bao.csv")
+BAO_COV = str(BAO_DIR / "cov.txt")
+
+
+def test_grid_matches_scalar_loop() -> None:
+    bao = load_bao_mock_csv(BAO_CSV, BAO_COV)
+    gammas = np.linspace(3.0, 4.5, 37)
+    ref = np.array([bao_loglike_hqcb(bao, g, 11.0/3.0, 1.0, 0.2) for g in gammas])
+    out = bao_loglike_hqcb_grid(bao, gammas, 11.0/3.0, 1.0, 0.2)
+    assert out.shape == gammas.shape
+    np.testing.assert_allclose(out, ref, rtol=1e-12, atol=1e-12)
+
+
+def test_grid_broadcasts_closure_parameters() -> None:
+    bao = load_bao_mock_csv(BAO_CSV, BAO_COV)
+    gammas = np.linspace(3.5, 3.9, 5)
+    kappas = np.array([0.5, 1.0, 2.0])
+    out = bao_loglike_hqcb_grid(bao, gammas[None, :], 11.0/3.0, kappas[:, None], 0.2)
+    assert out.shape == (3, 5)
+    assert abs(out[2, 1] - bao_loglike_hqcb(bao, gammas[1], 11.0/3.0, 2.0, 0.2)) < 1e-12
+
+
+def test_grid_rejects_bad_fiducial() -> None:
+    bao = load_bao_mock_csv(BAO_CSV, BAO_COV)
+    with pytest.raises(ValueError):
+        bao_loglike_hqcb_grid(bao, np.array([3.6]), 11.0/3.0, 1.0, 0.2, dvrd_lcdm_fid=np.ones(2))
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from hqcb_hhh.inference import likelihoods, tables
+from hqcb_hhh.inference.likelihoods import load_bao_mock_csv
+from hqcb_hhh.inference.tables import TableCache, load_matrix, read_csv_columns
+
+_CSV = "# mock BAO\n\nz, dv_over_rd\n0.1, 3.0\n# comentario\n0.5,  8.25\n  1.0 ,12.5\n"
+
+
+def _write(tmp_path: Path, cov: np.ndarray | None = None) -> tuple[Path, Path]:
+    csv = tmp_path / "bao.csv"
+    csv.write_text(_CSV, encoding="utf-8")
+    covp = tmp_path / "bao_cov.txt"
+    np.savetxt(covp, np.diag([0.04, 0.09, 0.16]) if cov is None else cov)
+    return csv, covp
+
+
+def test_csv_columns_skip_comments_header_and_spaces(tmp_path: Path) -> None:
+    csv, _ = _write(tmp_path)
+    rows = read_csv_columns(csv, (0, 1))
+    np.testing.assert_array_equal(rows, [[0.1, 3.0], [0.5, 8.25], [1.0, 12.5]])
+
+
+def test_npy_covariance_is_memory_mapped_and_matches_text(tmp_path: Path) -> None:
+    csv, covp = _write(tmp_path)
+    npy = tmp_path / "bao_cov.npy"
+    np.save(npy, np.loadtxt(covp))
+    assert isinstance(load_matrix(npy), np.memmap)
+    a = load_bao_mock_csv(str(csv), str(covp))
+    b = load_bao_mock_csv(str(csv), str(npy))
+    np.testing.assert_array_equal(a.cov, b.cov)
+    np.testing.assert_array_equal(a.cov_factor.chol, b.cov_factor.chol)
+
+
+def test_cache_hit_skips_parsing_and_factorization(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    csv, covp = _write(tmp_path)
+    cache_dir = tmp_path / "cache"
+    first = load_bao_mock_csv(str(csv), str(covp), cache_dir=cache_dir)
+
+    def boom(*args: object, **kwargs: object) -> None:
+        raise AssertionError("cache miss")
+
+    monkeypatch.setattr(tables, "read_csv_columns", boom)
+    monkeypatch.setattr(tables, "load_matrix", boom)
+    monkeypatch.setattr(likelihoods.GaussianCovFactor, "from_cov", boom)
+    # Tocar el fichero sin cambiar el contenido sigue acertando (vía sha256)
+    os.utime(covp, ns=(covp.stat().st_atime_ns, covp.stat().st_mtime_ns + 10**9))
+    second = load_bao_mock_csv(str(csv), str(covp), cache_dir=cache_dir)
+    np.testing.assert_array_equal(first.z, second.z)
+    np.testing.assert_array_equal(first.cov, second.cov)
+    np.testing.assert_allclose(first.cov_factor.chol, second.cov_factor.chol)
+    assert second.cov_factor.logdet == pytest.approx(first.cov_factor.logdet, rel=1e-14)
+
+
+def test_cache_rebuilds_when_content_changes(tmp_path: Path) -> None:
+    csv, covp = _write(tmp_path)
+    cache_dir = tmp_path / "cache"
+    load_bao_mock_csv(str(csv), str(covp), cache_dir=cache_dir)
+    np.savetxt(covp, np.diag([0.01, 0.04, 0.09]))
+    ds = load_bao_mock_csv(str(csv), str(covp), cache_dir=cache_dir)
+    np.testing.assert_allclose(np.diagonal(ds.cov_factor.chol), [0.1, 0.2, 0.3])
+
+
+def test_table_cache_array_builds_once(tmp_path: Path) -> None:
+    src = tmp_path / "src.txt"
+    src.write_text("1 2 3\n", encoding="utf-8")
+    cache = TableCache(tmp_path / "cache")
+    calls = []
+
+    def build() -> np.ndarray:
+        calls.append(1)
+        return np.arange(3.0)
+
+    np.testing.assert_array_equal(cache.array(src, "x", build), [0.0, 1.0, 2.0])
+    np.testing.assert_array_equal(cache.array(src, "x", build), [0.0, 1.0, 2.0])
+    assert len(calls) == 1
+
+
+@pytest.mark.parametrize("cov, match", [
+    (np.array([[0.04, 0.01, 0.0], [0.0, 0.09, 0.0], [0.0, 0.0, 0.16]]), "symmetric"),
+    (np.array([[1.0, 2.0, 0.0], [2.0, 1.0, 0.0], [0.0, 0.0, 1.0]]), "positive"),
+])
+def test_invalid_covariances_still_rejected(tmp_path: Path, cov: np.ndarray, match: str) -> None:
+    csv, covp = _write(tmp_path, cov)
+    with pytest.raises(ValueError, match=match):
+        load_bao_mock_csv(str(csv), str(covp), cache_dir=tmp_path / "cache")
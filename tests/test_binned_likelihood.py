@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+from scipy.optimize import minimize
+
+from hqcb_hhh.likelihood import BinnedLikelihood, RateGaussianLikelihood
+from hqcb_hhh.theory import QuadraticSigmaModel
+
+MODELS = (
+    QuadraticSigmaModel(a=2.0, b=-9.0, c=20.0),
+    QuadraticSigmaModel(a=1.2, b=-4.0, c=12.0),
+    QuadraticSigmaModel(a=0.4, b=-0.8, c=6.0),
+)
+# Normalización, eficiencia de b-tagging (correlacionada) y forma del último bin
+MODIFIERS = np.array([[0.05, 0.05, 0.05], [0.08, 0.04, -0.02], [0.0, 0.0, 0.10]])
+GRID = np.linspace(-2.0, 6.0, 41)
+
+
+def _scipy_profile(like: BinnedLikelihood, k: float) -> float:
+    def f(t: np.ndarray) -> float:
+        v = float(like.nll(k, t[None, :])[0])
+        return v if np.isfinite(v) else 1e30
+    return float(minimize(f, np.zeros(like.n_nuisance), method="Nelder-Mead",
+                          options={"xatol": 1e-10, "fatol": 1e-13, "maxiter": 20_000}).fun)
+
+
+def test_single_bin_reproduces_rate_likelihood() -> None:
+    m = MODELS[0]
+    rate = RateGaussianLikelihood(m, float(m.sigma(1.0)), 0.3 * float(m.sigma(1.0)))
+    binned = BinnedLikelihood((m,), np.array([rate.sigma_asimov]),
+                              cov=np.array([[rate.sigma_err ** 2]]))
+    np.testing.assert_allclose(binned.profile(GRID)[0], rate.nll(GRID), rtol=1e-12, atol=1e-14)
+    np.testing.assert_allclose(binned.intervals(2.0, -5.0, 10.0),
+                               rate.intervals(2.0, -5.0, 10.0), atol=1e-8)
+
+
+def test_gaussian_profile_is_exact() -> None:
+    cov = np.diag([0.8, 1.0, 1.5]) + 0.2
+    like = BinnedLikelihood(MODELS, np.array([14.0, 9.0, 5.5]), cov=cov, modifiers=MODIFIERS,
+                            scale=1.1)
+    nll, theta = like.profile(GRID)
+    assert theta.shape == (GRID.size, 3)
+    np.testing.assert_allclose(like.nll(GRID, theta), nll, rtol=0, atol=1e-12)
+    for i in (3, 20, 37):
+        assert nll[i] == pytest.approx(_scipy_profile(like, float(GRID[i])), abs=1e-8)
+
+
+def test_poisson_newton_matches_scipy() -> None:
+    like = BinnedLikelihood.asimov(MODELS, stat="poisson", modifiers=MODIFIERS, scale=4.0,
+                                   background=np.array([3.0, 10.0, 25.0]))
+    obs = like.observed + np.array([4.0, -6.0, 5.0])
+    like = BinnedLikelihood(MODELS, np.round(obs), stat="poisson", modifiers=MODIFIERS, scale=4.0,
+                            background=np.array([3.0, 10.0, 25.0]))
+    nll, theta = like.profile(GRID)
+    assert np.all(nll <= like.nll(GRID) + 1e-12)
+    # Los nuisances perfilados reproducen el mínimo en cada punto de la malla
+    assert theta.shape == (GRID.size, like.n_nuisance)
+    np.testing.assert_allclose(like.nll(GRID, theta), nll, rtol=0, atol=1e-12)
+    for i in (0, 12, 30, 40):
+        assert nll[i] == pytest.approx(_scipy_profile(like, float(GRID[i])), abs=1e-8)
+    # Bin vacío: el término n log(n / nu) desaparece
+    empty = BinnedLikelihood(MODELS, np.array([0.0, 30.0, 40.0]), stat="poisson",
+                             modifiers=MODIFIERS, scale=4.0,
+                             background=np.array([3.0, 10.0, 25.0]))
+    assert np.all(np.isfinite(empty.profile(GRID)[0]))
+
+
+def test_asimov_minimum_and_nuisances_widen_intervals() -> None:
+    cov = np.diag([0.5, 0.5, 0.5])
+    bare = BinnedLikelihood.asimov(MODELS, cov=cov)
+    syst = BinnedLikelihood.asimov(MODELS, cov=cov, modifiers=3.0 * MODIFIERS)
+    assert float(syst.profile(1.0)[0][0]) == pytest.approx(0.0, abs=1e-14)
+    width = [sum(b - a for a, b in like.intervals(1.92, -5.0, 10.0)) for like in (bare, syst)]
+    assert width[1] > width[0] > 0.0
+
+
+def test_invalid_inputs() -> None:
+    with pytest.raises(ValueError):
+        BinnedLikelihood(MODELS, np.ones(3))  # gaussiano sin covarianza
+    with pytest.raises(ValueError):
+        BinnedLikelihood(MODELS, np.ones(3), stat="poisson", cov=np.eye(3))
+    with pytest.raises(ValueError):
+        BinnedLikelihood(MODELS, np.ones(3), cov=np.eye(3), modifiers=np.ones((2, 4)))
+    with pytest.raises(ValueError):
+        BinnedLikelihood(MODELS, np.ones(3), cov=-np.eye(3))
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import csv
+from dataclasses import replace
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from hqcb_hhh.cli import main, parse_values
+from hqcb_hhh.inference import HQCBInferenceConfig, grid_posterior, load_bao_mock_csv
+from hqcb_hhh.inference.sweep import SWEEP_COLUMNS, SWEEP_JOINT_COLUMNS, sweep_closure
+from hqcb_hhh.pipelines import _joint_with_bao
+
+ROOT = Path(__file__).resolve().parents[1]
+BAO_CSV = ROOT / "data" / "likelihoods" / "bao_mock" / "bao.csv"
+BAO_COV = ROOT / "data" / "likelihoods" / "bao_mock" / "cov.txt"
+
+@pytest.fixture
+def sweep_cfg(infer_cfg: HQCBInferenceConfig) -> HQCBInferenceConfig:
+    return replace(infer_cfg, grid_gamma=151, grid_H0=121)
+
+KB, BETA, P = [0.5, 1.0, 2.0], [0.125, 0.25], [0.1, 0.3]
+
+
+def test_sweep_matches_grid_posterior_and_bao_reweighting(sweep_cfg: HQCBInferenceConfig) -> None:
+    bao = load_bao_mock_csv(str(BAO_CSV), str(BAO_COV))
+    res = sweep_closure(sweep_cfg, KB, BETA, P, bao=bao)
+    assert res["columns"] == SWEEP_COLUMNS + SWEEP_JOINT_COLUMNS
+    assert res["n_combinations"] == 12
+    # kappa_b * beta: {0.0625, 0.125, 0.25, 0.5}; kappa_b * p: {0.05, 0.1, 0.15, 0.2, 0.3, 0.6}
+    assert (res["n_h0_grids"], res["n_bao_curves"]) == (4, 6)
+    for row in res["rows"]:
+        cfg = replace(sweep_cfg, kappa_b=row["kappa_b"],
+                      beta_rd_sensitivity=row["beta_rd_sensitivity"])
+        ref = grid_posterior(cfg, method="grid", as_arrays=True)
+        s = ref["summary"]
+        assert row["gamma_mean"] == pytest.approx(s["gamma_mean"], rel=1e-10)
+        assert (row["gamma_map"], row["H0_local_map"]) == (s["gamma_map"], s["H0_local_map"])
+        for level in ("68", "95"):
+            bounds = [row[f"gamma_{level}_lo"], row[f"gamma_{level}_hi"]]
+            np.testing.assert_allclose(bounds, s[f"gamma_{level}"], rtol=1e-10)
+        assert row["delta_AIC"] == pytest.approx(ref["model_comparison"]["delta_AIC"], rel=1e-10)
+        assert row["delta_BIC"] == pytest.approx(ref["model_comparison"]["delta_BIC"], rel=1e-10)
+        joint = _joint_with_bao(cfg, ref, BAO_CSV, BAO_COV, row["bao_p_sensitivity"])["joint"]
+        assert row["gamma_mean_joint"] == pytest.approx(joint["gamma_mean_joint"], rel=1e-10)
+        assert row["gamma_map_joint"] == joint["gamma_map_joint"]
+
+
+def test_joint_delta_aic_uses_bao_at_the_joint_maximum(sweep_cfg: HQCBInferenceConfig) -> None:
+    from hqcb_hhh.inference import bao_loglike_hqcb_grid
+    from hqcb_hhh.inference.models import grid_axes, loglike_grid
+
+    bao = load_bao_mock_csv(str(BAO_CSV), str(BAO_COV))
+    row = sweep_closure(sweep_cfg, [2.0], [0.25], [0.3], bao=bao)["rows"][0]
+    gammas, H0s = grid_axes(sweep_cfg)
+    ll = loglike_grid(replace(sweep_cfg, kappa_b=2.0), gammas, H0s)
+    ll += bao_loglike_hqcb_grid(bao, gammas, sweep_cfg.gamma_ref, 2.0, 0.3)[:, None]
+    assert row["logL_max_joint"] == pytest.approx(float(np.max(ll)), rel=1e-12)
+
+
+def test_workers_and_blocks_do_not_change_the_table(sweep_cfg: HQCBInferenceConfig) -> None:
+    ref = sweep_closure(sweep_cfg, KB, BETA)
+    for kwargs in ({"memory_budget_mb": 0.5}, {"workers": 3}, {"workers": 2, "backend": "process"}):
+        assert sweep_closure(sweep_cfg, KB, BETA, **kwargs)["rows"] == ref["rows"]
+
+
+def test_p_sens_requires_bao(sweep_cfg: HQCBInferenceConfig) -> None:
+    with pytest.raises(ValueError):
+        sweep_closure(sweep_cfg, KB, BETA, P)
+
+
+def test_parse_values() -> None:
+    assert parse_values("0.5,1,2") == [0.5, 1.0, 2.0]
+    np.testing.assert_allclose(parse_values("0:1:5"), [0.0, 0.25, 0.5, 0.75, 1.0])
+    assert parse_values(None) is None
+    with pytest.raises(SystemExit):
+        parse_values("1:2")
+
+
+def test_sweep_cli_writes_table(tmp_path: Path) -> None:
+    out = tmp_path / "sweep.csv"
+    args = ["sweep", "--config", str(ROOT / "data" / "cosmology" / "hqcb_infer_data_mock.yaml"),
+            "--kappa-b", "0.5:1.5:3", "--beta", "0.25", "--p-sens", "0.1,0.2", "--out", str(out)]
+    assert main(args) == 0
+    with out.open(encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == 6
+    assert list(rows[0]) == SWEEP_COLUMNS + SWEEP_JOINT_COLUMNS
+    assert [float(r["kappa_b"]) for r in rows] == [0.5, 0.5, 1.0, 1.0, 1.5, 1.5]
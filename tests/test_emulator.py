@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+from dataclasses import replace
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from hqcb_hhh.cli import main
+from hqcb_hhh.cache import ResultCache
+from hqcb_hhh.inference import (
+    HQCBInferenceConfig,
+    bao_loglike_hqcb_grid,
+    grid_posterior,
+    load_bao_mock_csv,
+)
+from hqcb_hhh.inference.emulator import (
+    EmulatorSpec,
+    HQCBEmulator,
+    emulated_bao_loglike,
+    emulated_loglike_grid,
+    emulator_path,
+    load_or_build,
+)
+from hqcb_hhh.inference.models import grid_axes, loglike_grid
+from hqcb_hhh.io import load_result
+from hqcb_hhh.pipelines import run_infer_data
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _bao():
+    return load_bao_mock_csv(str(ROOT / "data" / "likelihoods" / "bao_mock" / "bao.csv"),
+                             str(ROOT / "data" / "likelihoods" / "bao_mock" / "cov.txt"))
+
+
+def test_emulated_likelihoods_match_direct_evaluation(infer_cfg: HQCBInferenceConfig) -> None:
+    bao = _bao()
+    emu = HQCBEmulator.build(EmulatorSpec.from_config(infer_cfg, bao=bao, bao_p_sensitivity=0.2))
+    g, h = grid_axes(infer_cfg)
+    np.testing.assert_allclose(emulated_loglike_grid(emu, infer_cfg, g, h),
+                               loglike_grid(infer_cfg, g, h), rtol=1e-8)
+    ref = bao_loglike_hqcb_grid(bao, g, infer_cfg.gamma_ref, infer_cfg.kappa_b, 0.2)
+    np.testing.assert_allclose(emulated_bao_loglike(emu, bao, g), ref, rtol=1e-8)
+    with pytest.raises(ValueError):
+        emu.h0_early_ratio(4.6)
+
+
+@pytest.mark.parametrize("kind,n_gamma,tol", [
+    ("cubic", 257, 1e-8), ("linear", 257, 1e-4), ("cubic", 33, 1e-4),
+])
+def test_accuracy_report(
+    infer_cfg: HQCBInferenceConfig, kind: str, n_gamma: int, tol: float
+) -> None:
+    spec = EmulatorSpec.from_config(infer_cfg, bao=_bao(), bao_p_sensitivity=0.2,
+                                    n_gamma=n_gamma, kind=kind)
+    acc = HQCBEmulator.build(spec).accuracy()
+    for name in ("h0_early_ratio", "dv_over_rd_ratio"):
+        assert 0.0 < acc[name]["max_rel_error"] < tol
+
+
+def test_tables_are_reused_and_rebuilt_on_config_change(
+    infer_cfg: HQCBInferenceConfig, tmp_path: Path
+) -> None:
+    spec = EmulatorSpec.from_config(infer_cfg)
+    emu, built = load_or_build(spec, tmp_path)
+    assert built and emulator_path(spec, tmp_path).exists()
+    again, built = load_or_build(spec, tmp_path)
+    assert not built
+    np.testing.assert_array_equal(again.h0_ratio, emu.h0_ratio)
+
+    changed = EmulatorSpec.from_config(replace(infer_cfg, beta_rd_sensitivity=0.3))
+    assert changed.fingerprint() != spec.fingerprint()
+    emu2, built = load_or_build(changed, tmp_path)
+    assert built and not np.allclose(emu2.h0_ratio, emu.h0_ratio)
+    # Tabla corrupta en la ruta esperada: se reconstruye
+    emulator_path(spec, tmp_path).write_bytes(b"not a table")
+    assert load_or_build(spec, tmp_path)[1]
+
+
+@pytest.mark.parametrize("options", [
+    {}, {"memory_budget_mb": 0.05}, {"memory_budget_mb": 0.05, "workers": 3},
+])
+def test_grid_posterior_served_by_emulator_matches_direct_path(
+    infer_cfg: HQCBInferenceConfig, options: dict[str, float]
+) -> None:
+    emu = HQCBEmulator.build(EmulatorSpec.from_config(infer_cfg))
+    ref = grid_posterior(infer_cfg, method="grid", as_arrays=True, **options)
+    res = grid_posterior(infer_cfg, method="grid", as_arrays=True, emulator=emu, **options)
+    for key in ("p_gamma", "p_H0_local"):
+        np.testing.assert_allclose(res["posterior"][key], ref["posterior"][key],
+                                   rtol=1e-6, atol=1e-12)
+    assert (res["summary"]["gamma_map"], res["summary"]["H0_local_map"]) == (
+        ref["summary"]["gamma_map"], ref["summary"]["H0_local_map"])
+    assert res["summary"]["gamma_mean"] == pytest.approx(ref["summary"]["gamma_mean"], rel=1e-10)
+    delta = ref["model_comparison"]["delta_AIC"]
+    assert res["model_comparison"]["delta_AIC"] == pytest.approx(delta, abs=1e-6)
+
+
+def test_grid_posterior_rejects_mismatched_emulator(infer_cfg: HQCBInferenceConfig) -> None:
+    emu = HQCBEmulator.build(EmulatorSpec.from_config(infer_cfg))
+    with pytest.raises(ValueError, match="closure"):
+        grid_posterior(replace(infer_cfg, kappa_b=2.0), emulator=emu)
+    with pytest.raises(ValueError, match="box"):
+        grid_posterior(replace(infer_cfg, gamma_max=5.0), emulator=emu)
+    with pytest.raises(ValueError):
+        grid_posterior(infer_cfg, method="analytic", emulator=emu)
+    with pytest.raises(ValueError):
+        grid_posterior(infer_cfg, adaptive_eps=1e-6, emulator=emu)
+    # auto con emulador: siempre la malla
+    assert "analytic" not in grid_posterior(infer_cfg, method="auto", emulator=emu)
+
+
+def test_infer_data_with_emulator_matches_direct_path(tmp_path: Path) -> None:
+    config = ROOT / "data" / "cosmology" / "hqcb_infer_data_mock.yaml"
+    cache = ResultCache(tmp_path / "cache")
+    run_infer_data(config, out=tmp_path / "direct.json", figures=False)
+    run_infer_data(config, out=tmp_path / "emu.json", figures=False, cache=cache,
+                   emulator={"n_gamma": 257, "kind": "cubic"})
+    assert len(list((cache.root / "emulator").glob("*.npz"))) == 1
+    ref, res = load_result(tmp_path / "direct.json"), load_result(tmp_path / "emu.json")
+    np.testing.assert_allclose(res["joint"]["p_gamma_joint"], ref["joint"]["p_gamma_joint"],
+                               rtol=1e-6, atol=1e-12)
+    assert res["joint"]["gamma_map_joint"] == ref["joint"]["gamma_map_joint"]
+    assert res["joint"]["gamma_mean_joint"] == pytest.approx(ref["joint"]["gamma_mean_joint"],
+                                                             rel=1e-10)
+
+
+def test_infer_toy_emulator_cli(tmp_path: Path) -> None:
+    config = ROOT / "data" / "cosmology" / "hqcb_infer_toy.yaml"
+    for name, extra in (("direct", []), ("emu", ["--emulator", "--emulator-nodes", "129"])):
+        assert main(["infer-toy", "--config", str(config), "--out", str(tmp_path / f"{name}.json"),
+                     "--no-figures", "--cache-dir", str(tmp_path / "cache"), *extra]) == 0
+    assert list((tmp_path / "cache" / "emulator").glob("*.npz"))
+    ref, res = load_result(tmp_path / "direct.json"), load_result(tmp_path / "emu.json")
+    assert res["summary"]["gamma_mean"] == pytest.approx(ref["summary"]["gamma_mean"], rel=1e-8)
+
+
+def test_emulator_cli(tmp_path: Path) -> None:
+    cfg = ROOT / "data" / "cosmology" / "hqcb_infer_data_mock.yaml"
+    args = ["emulator", "--config", str(cfg),
+            "--out", str(tmp_path / "e.json"), "--dir", str(tmp_path / "tables"), "--n-gamma", "65"]
+    assert main(args) == 0
+    assert load_result(tmp_path / "e.json")["built"] is True
+    assert main(args) == 0
+    res = load_result(tmp_path / "e.json")
+    assert res["built"] is False
+    assert res["accuracy"]["dv_over_rd_ratio"]["max_rel_error"] < 1e-6
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from hqcb_hhh.fitting import QUADRATIC, PolynomialBasis, _cached_solver, design_pinv, fit_polynomial
+from hqcb_hhh.forecast import expand_sweep, fit_coefficients
+from hqcb_hhh.theory import fit_quadratic_sigma
+
+PROJ = Path(__file__).resolve().parents[1] / "data" / "projections"
+
+KS = np.array([-2.0, 0.0, 1.0, 2.0, 3.0, 5.0])
+
+
+def _tables(n: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    coeffs = np.column_stack([rng.uniform(5, 15, n), rng.uniform(-40, -20, n),
+                              rng.uniform(60, 80, n)])
+    return coeffs @ QUADRATIC.design(KS).T + rng.normal(0.0, 0.5, (n, KS.size))
+
+
+def test_quadratic_fit_matches_lstsq() -> None:
+    ys = _tables(1)[0]
+    model = fit_quadratic_sigma(zip(KS, ys))
+    X = np.vstack([KS**2, KS, np.ones_like(KS)]).T
+    ref, *_ = np.linalg.lstsq(X, ys, rcond=None)
+    np.testing.assert_allclose([model.a, model.b, model.c], ref, rtol=1e-12)
+
+
+def test_batched_fit_uses_one_cached_pinv() -> None:
+    ys = _tables(200)
+    nodes = KS + 0.125   # nodos nuevos: fuera de la caché
+    before = _cached_solver.cache_info()
+    fit = fit_polynomial(nodes, ys)
+    for _ in range(3):
+        fit_polynomial(nodes, ys[0])
+    after = _cached_solver.cache_info()
+    assert (after.misses - before.misses, after.hits - before.hits) == (1, 3)
+    assert fit.coeffs.shape == (200, 3) and fit.chi2.shape == (200,) and fit.ndof == 3
+    for i in (0, 57, 199):
+        np.testing.assert_allclose(fit.coeffs[i], fit_polynomial(nodes, ys[i]).coeffs, rtol=1e-12)
+    P, cov = design_pinv(QUADRATIC, nodes)
+    assert cov is None and not P.flags.writeable
+
+
+def test_weighted_fit_coefficient_covariance() -> None:
+    ys = _tables(4, seed=1)
+    err = np.array([0.5, 1.0, 0.3, 0.3, 1.0, 2.0])
+    X = QUADRATIC.design(KS)
+    W = np.diag(err**-2)
+    cov_ref = np.linalg.inv(X.T @ W @ X)
+    fit = fit_polynomial(KS, ys, sigma_err=err)
+    np.testing.assert_allclose(fit.cov[0], cov_ref, rtol=1e-10)
+    np.testing.assert_allclose(fit.coeffs, (cov_ref @ X.T @ W @ ys.T).T, rtol=1e-10)
+    resid = (ys - fit.coeffs @ X.T) / err
+    np.testing.assert_allclose(fit.chi2, np.sum(resid**2, axis=1), rtol=1e-10)
+    np.testing.assert_allclose(fit.errors()[0], np.sqrt(np.diag(cov_ref)), rtol=1e-10)
+
+    # Errores distintos por tabla: pila de pseudo-inversas, igual que tabla a tabla
+    errs = np.vstack([err, err[::-1], 2.0 * err, np.ones_like(err)])
+    per_set = fit_polynomial(KS, ys, sigma_err=errs)
+    for i in range(4):
+        one = fit_polynomial(KS, ys[i], sigma_err=errs[i])
+        np.testing.assert_allclose(per_set.coeffs[i], one.coeffs, rtol=1e-10)
+        np.testing.assert_allclose(per_set.cov[i], one.cov, rtol=1e-10)
+        assert per_set.chi2[i] == pytest.approx(one.chi2, rel=1e-10)
+
+
+def test_multi_coupling_basis_recovers_coefficients() -> None:
+    # sigma(kl, kt, c2) con los monomios del ggF HH a LO
+    basis = PolynomialBasis(
+        ("kappa_lambda", "kappa_t", "c2"),
+        ((0, 4, 0), (0, 0, 2), (2, 2, 0), (0, 2, 1), (1, 3, 0), (1, 1, 1)),
+    )
+    rng = np.random.default_rng(2)
+    nodes = rng.uniform(-3.0, 3.0, (12, 3))
+    truth = rng.normal(size=(5, basis.n_terms))
+    fit = fit_polynomial(nodes, truth @ basis.design(nodes).T, basis)
+    np.testing.assert_allclose(fit.coeffs, truth, atol=1e-9)
+    np.testing.assert_allclose(fit.sigma(nodes[:3]), truth @ basis.design(nodes[:3]).T, atol=1e-9)
+
+
+def test_fit_input_validation() -> None:
+    with pytest.raises(ValueError):
+        fit_polynomial([0.0, 1.0], [1.0, 2.0])
+    with pytest.raises(ValueError):
+        fit_polynomial(KS, _tables(1)[0], sigma_err=np.zeros(KS.size))
+    with pytest.raises(ValueError):
+        fit_polynomial(KS, _tables(2), sigma_err=np.ones((3, KS.size)))
+    with pytest.raises(ValueError):
+        PolynomialBasis(("kappa_lambda",), ((2,), (2,)))
+    with pytest.raises(ValueError):
+        fit_quadratic_sigma([(0.0, 1.0), (1.0, 2.0)])
+
+
+def test_forecast_coefficients_match_single_fits() -> None:
+    configs = [s.config for s in expand_sweep(PROJ / "sweeps" / "hl_lhc_sweep.yaml")]
+    coeffs = fit_coefficients(configs)
+    for i in (0, len(configs) // 2, len(configs) - 1):
+        m = fit_quadratic_sigma(configs[i].sigma_points)
+        np.testing.assert_allclose(coeffs[i], [m.a, m.b, m.c], rtol=1e-12)
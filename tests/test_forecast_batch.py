@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+import hqcb_hhh.forecast as forecast
+from hqcb_hhh.forecast import batch_forecast, expand_sweep, load_scenarios, write_table
+from hqcb_hhh.likelihood import RateGaussianLikelihood, find_interval_1d
+from hqcb_hhh.theory import fit_quadratic_sigma
+
+PROJ = Path(__file__).resolve().parents[1] / "data" / "projections"
+
+
+def test_batch_matches_single_scenario_scan() -> None:
+    scenarios = load_scenarios([str(PROJ)])
+    expected = {"hl_lhc_baseline", "hl_lhc_optimistic", "hl_lhc_conservative"}
+    assert {s.name for s in scenarios} >= expected
+    rows = batch_forecast(scenarios)
+    for sc, row in zip(scenarios, rows):
+        cfg = sc.config
+        model = fit_quadratic_sigma(cfg.sigma_points)
+        sigma_sm = float(model.sigma(1.0))
+        like = RateGaussianLikelihood(model, sigma_sm, cfg.rel_uncert_rate * sigma_sm)
+        grid = np.linspace(cfg.kappa_min, cfg.kappa_max, cfg.n_grid)
+        nll = like.nll(grid)
+        assert (row["cl68_lo"], row["cl68_hi"]) == find_interval_1d(grid, nll, cfg.cl68_delta_nll)
+        assert (row["cl95_lo"], row["cl95_hi"]) == find_interval_1d(grid, nll, cfg.cl95_delta_nll)
+
+
+def test_sweep_expansion_and_lumi_scaling() -> None:
+    scenarios = expand_sweep(PROJ / "sweeps" / "hl_lhc_sweep.yaml")
+    assert len(scenarios) == 7 * 5 * 3
+    by_name = {s.name: s.config for s in scenarios}
+    # Doble luminosidad respecto a la base (3/ab -> 6/ab): factor sqrt(1/2)
+    assert by_name["rel0.3_lumi6_scale1"].rel_uncert_rate == pytest.approx(0.3 * np.sqrt(0.5))
+    assert by_name["rel0.3_lumi3_scale1.1"].sigma_points[0][1] == pytest.approx(71.01 * 1.1)
+
+
+def test_process_pool_preserves_order(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.setattr(forecast, "MIN_SCENARIOS_PER_WORKER", 10)
+    scenarios = expand_sweep(PROJ / "sweeps" / "hl_lhc_sweep.yaml")
+    serial = batch_forecast(scenarios)
+    par = batch_forecast(scenarios, workers=3)
+    assert par == serial
+    out = write_table(par, tmp_path / "table.csv")
+    assert len(out.read_text(encoding="utf-8").splitlines()) == len(scenarios) + 1
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from hqcb_hhh.inference import HQCBInferenceConfig, grid_posterior
+from hqcb_hhh.inference.adaptive import adaptive_grid_posterior
+
+
+def test_adaptive_matches_dense_within_bounds(infer_cfg: HQCBInferenceConfig) -> None:
+    cfg = replace(infer_cfg, grid_gamma=1001, grid_H0=801)
+    dense = grid_posterior(cfg, method="grid")
+    res = grid_posterior(cfg, adaptive_eps=1e-6)
+
+    info = res["adaptive"]
+    assert info["n_evaluations"] < info["n_dense_cells"] / 20
+    bound = info["error_bound"]
+    assert bound["tail_mass"] <= 1e-6
+
+    # Las CDF marginales difieren como mucho la cota declarada
+    for key, b in (("p_gamma", bound["cdf_gamma"]), ("p_H0_local", bound["cdf_H0_local"])):
+        cdf_a = np.cumsum(res["posterior"][key])
+        cdf_d = np.cumsum(dense["posterior"][key])
+        assert np.max(np.abs(cdf_a - cdf_d)) <= b
+
+    step = (cfg.gamma_max - cfg.gamma_min) / (cfg.grid_gamma - 1)
+    for key in ("gamma_68", "gamma_95"):
+        np.testing.assert_allclose(res["summary"][key], dense["summary"][key], atol=step)
+    assert abs(res["summary"]["gamma_mean"] - dense["summary"]["gamma_mean"]) < step
+    # logL_max en modo adaptativo usa también medios nodos: nunca peor que el grid
+    logL_ada = res["model_comparison"]["HQCB"]["logL_max"]
+    assert logL_ada >= dense["model_comparison"]["HQCB"]["logL_max"] - 1e-12
+
+
+def test_adaptive_fully_refined_equals_dense_on_small_grid(infer_cfg: HQCBInferenceConfig) -> None:
+    cfg = replace(infer_cfg, grid_gamma=21, grid_H0=17)
+    dense = grid_posterior(cfg, method="grid")
+    res = adaptive_grid_posterior(cfg, eps=1e-12, cell_tol=1e-15, cdf_tol=1e-15, coarse=(4, 4))
+    np.testing.assert_allclose(res["posterior"]["p_gamma"], dense["posterior"]["p_gamma"],
+                               rtol=1e-9, atol=1e-12)
+
+
+def test_adaptive_rejects_bad_eps(infer_cfg: HQCBInferenceConfig) -> None:
+    with pytest.raises(ValueError):
+        adaptive_grid_posterior(replace(infer_cfg, grid_gamma=11), eps=0.0)
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from hqcb_hhh.inference import HQCBInferenceConfig, grid_posterior
+from hqcb_hhh.inference.analytic import analytic_applicable
+
+@pytest.mark.parametrize("overrides", [
+    {},
+    {"H0_min": 71.5, "H0_max": 74.0, "grid_H0": 101},   # truncación fuerte por el prior
+    {"H0_min": 73.5, "H0_max": 90.0, "grid_H0": 200},   # pico fuera del rango de H0
+    {"kappa_b": 2.0, "beta_rd_sensitivity": 0.4, "grid_gamma": 1001},
+])
+def test_analytic_matches_dense_grid(
+    infer_cfg: HQCBInferenceConfig, overrides: dict[str, float]
+) -> None:
+    cfg = replace(infer_cfg, **overrides)
+    ref = grid_posterior(cfg, method="grid")
+    res = grid_posterior(cfg, method="analytic")
+    assert "analytic" in res and "analytic" not in ref
+    np.testing.assert_allclose(res["posterior"]["p_gamma"], ref["posterior"]["p_gamma"],
+                               rtol=0, atol=1e-10 * max(ref["posterior"]["p_gamma"]))
+    np.testing.assert_allclose(res["posterior"]["p_H0_local"], ref["posterior"]["p_H0_local"],
+                               rtol=0, atol=1e-12)
+    for key, val in ref["summary"].items():
+        assert res["summary"][key] == pytest.approx(val, rel=1e-9)
+    assert res["model_comparison"] == ref["model_comparison"]
+
+
+def test_analytic_H0_moments_match_grid_within_discretization(
+    infer_cfg: HQCBInferenceConfig,
+) -> None:
+    res = grid_posterior(infer_cfg, method="analytic")
+    mean = res["summary"]["H0_local_mean"]
+    assert res["analytic"]["H0_local_mean"] == pytest.approx(mean, abs=1e-6)
+    H0s = np.asarray(res["grid"]["H0_local"])
+    p = np.asarray(res["posterior"]["p_H0_local"])
+    sd = float(np.sqrt(np.sum(p * (H0s - np.sum(p * H0s)) ** 2)))
+    assert res["analytic"]["H0_local_std"] == pytest.approx(sd, rel=1e-3)
+
+
+def test_auto_selection(infer_cfg: HQCBInferenceConfig) -> None:
+    # La malla densa sigue siendo el valor por defecto; la vía analítica es opcional
+    assert "analytic" not in grid_posterior(infer_cfg)
+    assert "analytic" in grid_posterior(infer_cfg, method="auto")
+    assert "analytic" not in grid_posterior(infer_cfg, method="auto", memory_budget_mb=1.0)
+    coarse = replace(infer_cfg, grid_H0=5)  # paso de 5 en H0 frente a sigma ~ 0.5
+    assert not analytic_applicable(coarse)
+    assert "analytic" not in grid_posterior(coarse, method="auto")
+    with pytest.raises(ValueError):
+        grid_posterior(infer_cfg, method="analytic", workers=2)
+    with pytest.raises(ValueError):
+        grid_posterior(infer_cfg, method="exact")
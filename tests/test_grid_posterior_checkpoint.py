@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from dataclasses import replace
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+import hqcb_hhh.inference.checkpoint as checkpoint
+from hqcb_hhh.inference import HQCBInferenceConfig, grid_posterior
+
+
+@pytest.fixture
+def cfg(infer_cfg: HQCBInferenceConfig) -> HQCBInferenceConfig:
+    return replace(infer_cfg, grid_gamma=61, grid_H0=41)
+
+
+def _assert_same_posterior(a: dict, b: dict) -> None:
+    for key in ("p_gamma", "p_H0_local"):
+        np.testing.assert_allclose(a["posterior"][key], b["posterior"][key],
+                                   rtol=1e-12, atol=1e-300)
+    assert a["summary"]["gamma_map"] == b["summary"]["gamma_map"]
+    delta = b["model_comparison"]["delta_AIC"]
+    assert a["model_comparison"]["delta_AIC"] == pytest.approx(delta, abs=1e-12)
+
+
+def test_checkpointed_scan_matches_dense_and_second_run_reuses_everything(
+    cfg: HQCBInferenceConfig, tmp_path: Path
+) -> None:
+    ref = grid_posterior(cfg, method="grid")
+    res = grid_posterior(cfg, checkpoint_dir=tmp_path, memory_budget_mb=0.01)
+    _assert_same_posterior(res, ref)
+    assert res["checkpoint"]["new_tiles"] > 1
+    again = grid_posterior(cfg, checkpoint_dir=tmp_path)
+    assert again["checkpoint"]["cells_evaluated"] == 0
+    _assert_same_posterior(again, ref)
+
+
+def test_resume_after_interruption(
+    cfg: HQCBInferenceConfig, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    real = checkpoint.loglike_grid
+    calls: list[int] = []
+
+    def preempted(config, g, h):  # type: ignore[no-untyped-def]
+        if len(calls) == 3:
+            raise KeyboardInterrupt
+        calls.append(g.shape[0])
+        return real(config, g, h)
+
+    monkeypatch.setattr(checkpoint, "loglike_grid", preempted)
+    with pytest.raises(KeyboardInterrupt):
+        checkpoint.checkpointed_grid_posterior(cfg, tmp_path, block_rows=8)
+    assert len(list(tmp_path.glob("tile_*.npz"))) == 3
+
+    monkeypatch.setattr(checkpoint, "loglike_grid", real)
+    res = checkpoint.checkpointed_grid_posterior(cfg, tmp_path, block_rows=8)
+    assert res["checkpoint"]["cells_reused"] == 3 * 8 * 41
+    assert res["checkpoint"]["cells_evaluated"] == (61 - 24) * 41
+    _assert_same_posterior(res, grid_posterior(cfg, method="grid"))
+
+
+def test_extend_gamma_range_and_H0_nodes_only_evaluates_new_cells(
+    cfg: HQCBInferenceConfig, tmp_path: Path
+) -> None:
+    checkpoint.checkpointed_grid_posterior(cfg, tmp_path)
+    # gamma_max 4.5 -> 5.0 con el mismo paso (0.025) y H0 con nodos intermedios (paso 0.5 -> 0.25)
+    wide = replace(cfg, gamma_max=5.0, grid_gamma=81, grid_H0=81)
+    res = checkpoint.checkpointed_grid_posterior(wide, tmp_path)
+    assert res["checkpoint"]["cells_reused"] == 61 * 41
+    assert res["checkpoint"]["cells_evaluated"] == 81 * 81 - 61 * 41
+    _assert_same_posterior(res, grid_posterior(wide, method="grid"))
+
+
+def test_refuses_checkpoint_of_other_model(cfg: HQCBInferenceConfig, tmp_path: Path) -> None:
+    checkpoint.checkpointed_grid_posterior(cfg, tmp_path)
+    with pytest.raises(ValueError, match="different model"):
+        checkpoint.checkpointed_grid_posterior(replace(cfg, kappa_b=2.0), tmp_path)
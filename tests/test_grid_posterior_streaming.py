@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from hqcb_hhh.inference import HQCBInferenceConfig, grid_posterior
+from hqcb_hhh.inference.models import block_rows_for_budget
+
+
+@pytest.fixture
+def cfg(infer_cfg: HQCBInferenceConfig) -> HQCBInferenceConfig:
+    return replace(infer_cfg, grid_gamma=201, grid_H0=161)
+
+
+@pytest.mark.parametrize("budget_mb", [0.001, 0.05, 1.0, 1000.0])
+def test_streaming_matches_in_memory(cfg: HQCBInferenceConfig, budget_mb: float) -> None:
+    ref = grid_posterior(cfg, method="grid")
+    res = grid_posterior(cfg, memory_budget_mb=budget_mb)
+
+    for key in ("p_gamma", "p_H0_local"):
+        np.testing.assert_allclose(res["posterior"][key], ref["posterior"][key],
+                                   rtol=1e-10, atol=1e-15)
+    for key, val in ref["summary"].items():
+        np.testing.assert_allclose(res["summary"][key], val, rtol=1e-12)
+    assert res["model_comparison"] == ref["model_comparison"]
+
+
+def test_block_rows_respects_budget() -> None:
+    assert block_rows_for_budget(1000, 1e-6) == 1
+    rows = block_rows_for_budget(20000, 256.0)
+    assert rows * 20000 * 32 <= 256 * 1024 * 1024
+    with pytest.raises(ValueError):
+        block_rows_for_budget(10, 0.0)
+
+
+@pytest.mark.parametrize("backend", ["thread", "process"])
+def test_parallel_identical_to_serial_blocks(cfg: HQCBInferenceConfig, backend: str) -> None:
+    serial = grid_posterior(cfg, memory_budget_mb=0.05)
+    par = grid_posterior(cfg, memory_budget_mb=0.05, workers=3, backend=backend)
+    assert par == serial
+
+
+def test_parallel_default_blocks_match_in_memory(cfg: HQCBInferenceConfig) -> None:
+    ref = grid_posterior(cfg, method="grid")
+    par = grid_posterior(cfg, workers=2)
+    np.testing.assert_allclose(par["posterior"]["p_gamma"], ref["posterior"]["p_gamma"],
+                               rtol=1e-10, atol=1e-15)
+    assert par["summary"]["gamma_map"] == ref["summary"]["gamma_map"]
+
+
+def test_invalid_parallel_options(cfg: HQCBInferenceConfig) -> None:
+    with pytest.raises(ValueError):
+        grid_posterior(cfg, workers=0)
+    with pytest.raises(ValueError):
+        grid_posterior(cfg, workers=2, backend="mpi")
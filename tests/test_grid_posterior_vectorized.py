@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from hqcb_hhh.inference import HQCBInferenceConfig, grid_posterior
+from hqcb_hhh.inference.models import loglike_gaussian, loglike_grid, predict_H0_early
+
+
+@pytest.fixture
+def cfg(infer_cfg: HQCBInferenceConfig) -> HQCBInferenceConfig:
+    return replace(infer_cfg, grid_gamma=61, grid_H0=47)
+
+
+def test_loglike_grid_matches_scalar_loop(cfg: HQCBInferenceConfig) -> None:
+    gammas = np.linspace(cfg.gamma_min, cfg.gamma_max, cfg.grid_gamma)
+    H0s = np.linspace(cfg.H0_min, cfg.H0_max, cfg.grid_H0)
+
+    ref = np.empty((cfg.grid_gamma, cfg.grid_H0))
+    for i, g in enumerate(gammas):
+        for j, h0 in enumerate(H0s):
+            pred = predict_H0_early(float(h0), cfg.z_rec, float(g), cfg.gamma_ref, cfg.kappa_b,
+                                    cfg.beta_rd_sensitivity)
+            ref[i, j] = (loglike_gaussian(cfg.H0_local_obs, float(h0), cfg.H0_local_sigma)
+                         + loglike_gaussian(cfg.H0_early_obs, pred, cfg.H0_early_sigma))
+
+    ll = loglike_grid(cfg, gammas, H0s)
+    assert ll.shape == ref.shape
+    np.testing.assert_allclose(ll, ref, rtol=1e-13, atol=1e-13)
+
+
+def test_scalar_inputs_still_return_floats() -> None:
+    v = loglike_gaussian(1.0, 0.0, 2.0)
+    assert isinstance(v, float)
+    h = predict_H0_early(73.0, 1100.0, 3.7, 11.0/3.0, 1.0, 0.25)
+    assert isinstance(h, float)
+
+
+def test_grid_posterior_normalized_and_map_on_grid(cfg: HQCBInferenceConfig) -> None:
+    res = grid_posterior(cfg, method="grid")
+    p_gamma = np.array(res["posterior"]["p_gamma"])
+    p_H0 = np.array(res["posterior"]["p_H0_local"])
+    assert abs(p_gamma.sum() - 1.0) < 1e-12
+    assert abs(p_H0.sum() - 1.0) < 1e-12
+    assert res["summary"]["gamma_map"] in res["grid"]["gamma"]
@@ -1,8 +1,14 @@
 from __future__ import annotations
 
 import numpy as np
+import pytest
 
-from hqcb_hhh.inference.likelihoods import chi2_gaussian_cov, loglike_gaussian_cov
+from hqcb_hhh.inference.likelihoods import (
+    BAOMockDataset,
+    GaussianCovFactor,
+    chi2_gaussian_cov,
+    loglike_gaussian_cov,
+)
 
 
 def test_cov_gaussian_loglike_matches_chi2_for_identity() -> None:
@@ -19,4 +25,42 @@ def test_chi2_positive() -> None:
     r = np.array([0.1, 0.2])
     cov = np.array([[0.04, 0.0],[0.0, 0.09]])
     chi2 = chi2_gaussian_cov(r, cov)
-    assert chi2 >= 0.0
\ No newline at end of file
+    assert chi2 >= 0.0
+
+def _spd(n: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    a = rng.normal(size=(n, n))
+    return a @ a.T + n * np.eye(n)
+
+
+def test_cholesky_factor_matches_explicit_inverse() -> None:
+    cov = _spd(6)
+    r = np.linspace(-1.0, 1.0, 6)
+    factor = GaussianCovFactor.from_cov(cov)
+    expected = float(r @ np.linalg.inv(cov) @ r)
+    assert abs(factor.chi2(r) - expected) < 1e-10
+    assert abs(factor.logdet - np.linalg.slogdet(cov)[1]) < 1e-10
+    assert abs(loglike_gaussian_cov(r, factor) - loglike_gaussian_cov(r, cov)) < 1e-12
+
+
+def test_batched_loglike_matches_rowwise() -> None:
+    cov = _spd(5, seed=1)
+    factor = GaussianCovFactor.from_cov(cov)
+    res = np.random.default_rng(2).normal(size=(7, 5))
+    batch = factor.loglike(res)
+    assert isinstance(batch, np.ndarray) and batch.shape == (7,)
+    for m in range(7):
+        assert abs(batch[m] - factor.loglike(res[m])) < 1e-12
+
+
+def test_non_positive_definite_cov_rejected() -> None:
+    cov = np.array([[1.0, 2.0], [2.0, 1.0]])
+    with pytest.raises(ValueError):
+        GaussianCovFactor.from_cov(cov)
+
+
+def test_dataset_builds_factor_once() -> None:
+    ds = BAOMockDataset(z=np.array([0.1, 0.5]), dv_over_rd=np.array([3.0, 8.0]),
+                        cov=np.diag([0.04, 0.09]))
+    assert ds.cov_factor.n == 2
+    assert abs(ds.cov_factor.logdet - np.log(0.04 * 0.09)) < 1e-12
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from hqcb_hhh.cli import main
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def test_infer_data_runs_in_process_outside_repo_root(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    # Las rutas BAO del YAML son relativas a la raíz del repo: deben resolverse desde cualquier cwd
+    monkeypatch.chdir(tmp_path)
+    cfg = ROOT / "data" / "cosmology" / "hqcb_infer_data_mock.yaml"
+    rc = main(["infer-data", "--config", str(cfg), "--out", "res.json", "--figdir", "figs"])
+    assert rc == 0
+    res = json.loads((tmp_path / "res.json").read_text(encoding="utf-8"))
+    assert res["bao_mock"]["N"] == 4
+    assert (tmp_path / "figs" / "hqcb_infer_joint_gamma.png").exists()
+
+
+def test_demo_b_figdir_override(tmp_path: Path) -> None:
+    rc = main(["demo-b", "--config", str(ROOT / "data" / "cosmology" / "hqcb_b_toy.yaml"),
+               "--figdir", str(tmp_path)])
+    assert rc == 0
+    assert (tmp_path / "hqcb_b_v_ratio.png").exists()
+    assert (tmp_path / "hqcb_b_H0_ratio.png").exists()
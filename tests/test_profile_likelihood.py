@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+from dataclasses import replace
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from hqcb_hhh.cli import main
+from hqcb_hhh.inference import HQCBInferenceConfig, grid_posterior
+from hqcb_hhh.inference.analytic import h0_conditional
+from hqcb_hhh.inference.profile import (
+    exact_model_comparison,
+    maximize_likelihood,
+    profile_likelihood,
+)
+from hqcb_hhh.io import load_result
+from hqcb_hhh.likelihood import RateGaussianLikelihood, wilks_delta
+from hqcb_hhh.theory import QuadraticSigmaModel
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def test_mle_is_exact_and_bounds_the_grid_maximum(infer_cfg: HQCBInferenceConfig) -> None:
+    mle = maximize_likelihood(infer_cfg)
+    # El modelo reproduce ambas medidas: log L_max = -log(2 pi s1 s2)
+    assert mle["logL_max"] == pytest.approx(-np.log(2 * np.pi * 1.0 * 0.6), abs=1e-9)
+    assert mle["theta"]["H0_local"] == pytest.approx(73.0, abs=1e-6)
+    grid = grid_posterior(infer_cfg, method="grid")
+    assert mle["logL_max"] >= grid["model_comparison"]["HQCB"]["logL_max"]
+    mc = exact_model_comparison(infer_cfg, mle)
+    assert mc["LCDM_toy"]["logL_max"] >= grid["model_comparison"]["LCDM_toy"]["logL_max"]
+    assert mc["delta_AIC"] == pytest.approx(grid["model_comparison"]["delta_AIC"], abs=1e-2)
+
+
+def test_gamma_profile_matches_closed_form(infer_cfg: HQCBInferenceConfig) -> None:
+    # Con mu(gamma) dentro de [H0_min, H0_max] el máximo en H0_local es C(gamma)
+    prof = profile_likelihood(infer_cfg, "gamma", values=np.linspace(3.65, 3.78, 27))
+    _, mu, C = h0_conditional(infer_cfg, np.asarray(prof["values"]))
+    assert np.all((mu > infer_cfg.H0_min) & (mu < infer_cfg.H0_max))
+    np.testing.assert_allclose(prof["nll"], -C, rtol=0, atol=1e-8)
+    np.testing.assert_allclose(prof["nuisance"]["H0_local"], mu, rtol=0, atol=1e-4)
+
+
+@pytest.mark.parametrize("parameter", ["gamma", "H0_local"])
+def test_wilks_intervals_hit_the_threshold_and_match_a_fine_grid(
+    infer_cfg: HQCBInferenceConfig, parameter: str
+) -> None:
+    prof = profile_likelihood(infer_cfg, parameter)
+    mle = maximize_likelihood(infer_cfg)
+    [(lo, hi)] = prof["intervals"]["95"]
+    for v in (lo, hi):
+        at = profile_likelihood(infer_cfg, parameter, values=np.array([v]), mle=mle)
+        assert at["nll"][0] + mle["logL_max"] == pytest.approx(wilks_delta(0.95), abs=1e-6)
+
+    cfg = replace(infer_cfg, grid_gamma=1501, grid_H0=1501,
+                  gamma_min=3.6, gamma_max=3.8, H0_min=70.0, H0_max=76.0)
+    res = grid_posterior(cfg, method="grid", as_arrays=True, keep_logpost=True)
+    axis = 0 if parameter == "gamma" else 1
+    xs = np.asarray(res["grid"]["gamma" if axis == 0 else "H0_local"])
+    prof_grid = -np.max(res["posterior"]["logpost"], axis=1 - axis)
+    inside = xs[prof_grid - prof_grid.min() <= wilks_delta(0.95)]
+    step = xs[1] - xs[0]
+    assert abs(inside.min() - lo) <= step and abs(inside.max() - hi) <= step
+
+
+def test_profile_with_free_nuisance_widens_interval(infer_cfg: HQCBInferenceConfig) -> None:
+    from hqcb_hhh.inference.sampling import FreeParameter, default_free_parameters
+
+    free = default_free_parameters(infer_cfg) + (FreeParameter("kappa_b", 0.5, 2.0),)
+    fixed = profile_likelihood(infer_cfg, "gamma")["intervals"]["68"][0]
+    wide = profile_likelihood(infer_cfg, "gamma", free=free)["intervals"]["68"][0]
+    assert wide[1] - wide[0] > fixed[1] - fixed[0]
+
+
+def test_rate_likelihood_mle_in_closed_form() -> None:
+    # sigma(k) = (k - 3)^2 + 1 con sigma_asimov = sigma(1): mínimos en k = 1 y k = 5
+    like = RateGaussianLikelihood(QuadraticSigmaModel(a=1.0, b=-6.0, c=10.0), 5.0, 0.2)
+    k, nll = like.mle(-5.0, 10.0)
+    assert k in (pytest.approx(1.0), pytest.approx(5.0))
+    assert nll == pytest.approx(0.0, abs=1e-20)
+    k, nll = like.mle(-5.0, 0.0)
+    assert k == 0.0 and nll == pytest.approx(float(like.nll(0.0)))
+    assert wilks_delta(0.95) == pytest.approx(1.920729, abs=1e-6)
+
+
+def test_profile_cli(tmp_path: Path) -> None:
+    cfg = ROOT / "data" / "cosmology" / "hqcb_infer_data_mock.yaml"
+    rc = main(["profile", "--config", str(cfg),
+               "--out", str(tmp_path / "p.json"), "--free", "bao_p_sensitivity=0.0:2.0",
+               "--parameter", "gamma", "--n-points", "11", "--format", "npz"])
+    assert rc == 0
+    res = load_result(tmp_path / "p.json")
+    assert set(res["profiles"]) == {"gamma"}
+    assert res["profiles"]["gamma"]["values"].shape == (11,)
+    assert set(res["profiles"]["gamma"]["nuisance"]) == {"H0_local", "bao_p_sensitivity"}
+    assert res["model_comparison"]["HQCB"]["k"] == 3
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import json
+import threading
+import tracemalloc
+from dataclasses import replace
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from hqcb_hhh import profiling
+from hqcb_hhh.cli import main
+from hqcb_hhh.inference import HQCBInferenceConfig, grid_posterior
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def test_disabled_instrumentation_is_a_no_op() -> None:
+    assert profiling.active() is None
+    assert profiling.stage("a") is profiling.stage("b")
+    profiling.count("x")
+    with profiling.stage("a"):
+        pass
+    assert not tracemalloc.is_tracing()
+
+
+def test_nested_stages_wall_cpu_and_peak_memory() -> None:
+    prof = profiling.enable()
+    try:
+        for _ in range(2):
+            with profiling.stage("outer"):
+                with profiling.stage("inner"):
+                    a = np.ones(1_000_000)  # 8 MB
+                    profiling.count("cells", a.size)
+                    del a
+    finally:
+        profiling.disable()
+    rep = prof.report()
+    assert rep["stages"]["outer"]["calls"] == 2 and rep["counters"]["cells"] == 2_000_000
+    for name in ("outer", "inner"):
+        assert 7.5 < rep["stages"][name]["peak_mb"] < 9.0
+    assert rep["stages"]["outer"]["wall_s"] >= rep["stages"]["inner"]["wall_s"]
+    assert rep["total"]["peak_mb"] > 7.5 and rep["hottest"] == "outer"
+    assert profiling.active() is None and not tracemalloc.is_tracing()
+
+
+def test_worker_thread_stages_keep_their_own_stack_and_skip_peaks() -> None:
+    barrier = threading.Barrier(4)
+
+    def work() -> None:
+        # Todos los hilos entran y salen a la vez: con una pila compartida se cruzarían
+        with profiling.stage("outer"):
+            barrier.wait()
+            with profiling.stage("inner"):
+                barrier.wait()
+                np.ones(100_000).sum()
+            barrier.wait()
+
+    prof = profiling.enable()
+    try:
+        with profiling.stage("main"):
+            threads = [threading.Thread(target=work) for _ in range(4)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            a = np.ones(1_000_000)  # 8 MB
+            del a
+    finally:
+        profiling.disable()
+    rep = prof.report()
+    assert rep["stages"]["outer"]["calls"] == rep["stages"]["inner"]["calls"] == 4
+    assert rep["stages"]["outer"]["peak_mb"] is None and rep["stages"]["inner"]["peak_mb"] is None
+    assert 7.5 < rep["stages"]["main"]["peak_mb"] < 12.0
+    assert prof._frames() == []
+
+
+def test_thread_backend_grid_posterior(infer_cfg: HQCBInferenceConfig) -> None:
+    cfg = replace(infer_cfg, grid_gamma=201, grid_H0=161)
+    prof = profiling.enable()
+    try:
+        grid_posterior(cfg, workers=4, backend="thread", memory_budget_mb=0.05)
+    finally:
+        profiling.disable()
+    rep = prof.report()["stages"]
+    assert rep["loglike_grid"]["calls"] > 4 and rep["loglike_grid"]["peak_mb"] is None
+    assert rep["grid_posterior"]["calls"] == 1 and rep["grid_posterior"]["peak_mb"] > 0.0
+    assert rep["grid_posterior"]["wall_s"] > 0.0
+
+
+def test_cli_profile_report_next_to_results(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    config = str(ROOT / "data" / "cosmology" / "hqcb_infer_data_mock.yaml")
+    out = tmp_path / "res.json"
+    assert main(["infer-data", "--config", config, "--out", str(out), "--no-figures", "--no-cache",
+                 "--profile"]) == 0
+    rep = json.loads((tmp_path / "res.profile.json").read_text(encoding="utf-8"))
+    stages = {"load_config", "grid_posterior", "load_bao_mock_csv", "bao_reweight", "write_result"}
+    assert stages <= set(rep["stages"])
+    assert rep["counters"]["bao_loglike.rows"] > 0 and rep["pstats"] is None
+
+    monkeypatch.setenv(profiling.ENV_VAR, "pstats")
+    out = str(tmp_path / "p.json")
+    assert main(["profile", "--config", config, "--out", out, "--n-points", "5"]) == 0
+    rep = json.loads((tmp_path / "p.profile.json").read_text(encoding="utf-8"))
+    assert rep["hottest"] == "profile" and Path(rep["pstats"]).exists()
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+import yaml
+
+import hqcb_hhh.cache as cache_mod
+import hqcb_hhh.pipelines as pipelines
+from hqcb_hhh.cache import ResultCache, cache_key
+from hqcb_hhh.pipelines import run_infer_data, run_infer_toy
+
+ROOT = Path(__file__).resolve().parents[1]
+TOY = ROOT / "data" / "cosmology" / "hqcb_infer_toy.yaml"
+DATA = ROOT / "data" / "cosmology" / "hqcb_infer_data_mock.yaml"
+
+
+def _count_grid_calls(monkeypatch: pytest.MonkeyPatch) -> list[int]:
+    calls: list[int] = []
+    real = pipelines.grid_posterior
+
+    def counting(*args, **kwargs):  # type: ignore[no-untyped-def]
+        calls.append(1)
+        return real(*args, **kwargs)
+
+    monkeypatch.setattr(pipelines, "grid_posterior", counting)
+    return calls
+
+
+def test_roundtrip_keeps_arrays_and_scalars(tmp_path: Path) -> None:
+    cache = ResultCache(tmp_path)
+    x = np.linspace(0.0, 1.0, 100)
+    res = {"a": {"x": x, "l": x.tolist(), "n": [1, 2, 3]}, "s": 1.25, "t": "ok"}
+    key = cache_key("demo", {"k": 1})
+    assert cache.get(key) is None
+    cache.put(key, res)
+    got = cache.get(key)
+    assert got is not None
+    np.testing.assert_array_equal(got["a"]["x"], x)
+    np.testing.assert_array_equal(got["a"]["l"], x)  # listas largas de floats -> array
+    assert (got["a"]["n"], got["s"], got["t"]) == ([1, 2, 3], 1.25, "ok")
+    assert list(tmp_path.glob("*/*.npz"))
+    assert (cache.stats.hits, cache.stats.misses, cache.stats.writes) == (1, 1, 1)
+    assert cache_key("demo", {"k": 2}) != key
+
+
+def test_key_tracks_package_sources(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    # Misma versión, fuentes distintas -> otra clave
+    pkg = tmp_path / "pkg"
+    (pkg / "sub").mkdir(parents=True)
+    (pkg / "sub" / "model.py").write_text("A = 1\n", encoding="utf-8")
+    monkeypatch.setattr(cache_mod, "_PACKAGE_DIR", pkg)
+    cache_mod.code_digest.cache_clear()
+    try:
+        key = cache_key("demo", {"k": 1})
+        assert cache_key("demo", {"k": 1}) == key
+        (pkg / "sub" / "model.py").write_text("A = 2\n", encoding="utf-8")
+        cache_mod.code_digest.cache_clear()
+        assert cache_key("demo", {"k": 1}) != key
+    finally:
+        cache_mod.code_digest.cache_clear()
+
+
+def test_repeat_infer_toy_is_served_from_cache(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    calls = _count_grid_calls(monkeypatch)
+    cache = ResultCache(tmp_path / "cache")
+    out1, out2 = tmp_path / "r1.json", tmp_path / "r2.json"
+    run_infer_toy(TOY, out=out1, figures=False, cache=cache)
+    run_infer_toy(TOY, out=out2, figures=False, cache=cache)
+    assert len(calls) == 1
+    assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+    assert json.loads(out1.read_text()) == json.loads(out2.read_text())
+
+    # --refresh recalcula y reescribe
+    run_infer_toy(TOY, out=out2, figures=False, cache=ResultCache(tmp_path / "cache", refresh=True))
+    assert len(calls) == 2
+
+
+def test_bao_sensitivity_change_reuses_h0_posterior(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    calls = _count_grid_calls(monkeypatch)
+    cache = ResultCache(tmp_path / "cache")
+    run_infer_data(DATA, out=tmp_path / "a.json", figures=False, cache=cache)
+
+    y = yaml.safe_load(DATA.read_text(encoding="utf-8"))
+    y["bao_p_sensitivity"] = float(y["bao_p_sensitivity"]) * 2.0
+    cfg2 = tmp_path / "mock.yaml"
+    for key in ("bao_csv", "bao_cov"):
+        y[key] = str(ROOT / y[key])
+    cfg2.write_text(yaml.safe_dump(y), encoding="utf-8")
+    run_infer_data(cfg2, out=tmp_path / "b.json", figures=False, cache=cache)
+
+    assert len(calls) == 1  # el posterior H0-only no se recalcula
+    a = json.loads((tmp_path / "a.json").read_text())
+    b = json.loads((tmp_path / "b.json").read_text())
+    assert a["base_H0_results"] == b["base_H0_results"]
+    assert a["joint"]["p_gamma_joint"] != b["joint"]["p_gamma_joint"]
+
+
+def test_lru_eviction_keeps_most_recent(tmp_path: Path) -> None:
+    cache = ResultCache(tmp_path, max_mb=0.05)  # ~52 kB
+    big = {"x": [float(i) for i in range(2000)]}  # ~16 kB en .npz
+    keys = [cache_key("lru", {"i": i}) for i in range(5)]
+    for i, key in enumerate(keys):
+        cache.put(key, big)
+        if i == 2:
+            cache.get(keys[0])  # refresca la entrada más antigua
+    assert cache.stats.evictions >= 1
+    assert cache.info()["bytes"] <= cache.max_bytes
+    assert cache.get(keys[-1]) is not None
+
+
+def test_tables_count_towards_budget_and_clear_empties_root(tmp_path: Path) -> None:
+    cache = ResultCache(tmp_path / "cache")
+    run_infer_data(DATA, out=tmp_path / "a.json", figures=False, cache=cache)
+    tables = [p for p in (cache.root / "tables").rglob("*") if p.is_file()]
+    assert any(p.suffix == ".npy" for p in tables)
+    info = cache.info()
+    assert info["bytes"] >= sum(p.stat().st_size for p in tables)
+
+    # Un presupuesto mínimo desaloja también las tablas de BAO
+    small = ResultCache(cache.root, max_mb=1e-6)
+    assert small.evict() == info["entries"]
+    run_infer_data(DATA, out=tmp_path / "b.json", figures=False, cache=cache)
+    assert cache.clear() > 0
+    assert list(cache.root.iterdir()) == []
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import json
+from dataclasses import replace
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from hqcb_hhh.cli import main
+from hqcb_hhh.inference import HQCBInferenceConfig, grid_posterior
+from hqcb_hhh.io import load_result, write_result
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+@pytest.fixture
+def cfg(infer_cfg: HQCBInferenceConfig) -> HQCBInferenceConfig:
+    return replace(infer_cfg, grid_gamma=61, grid_H0=41)
+
+
+def test_as_arrays_matches_list_output_and_logpost_is_normalized(cfg: HQCBInferenceConfig) -> None:
+    ref = grid_posterior(cfg, method="grid")
+    res = grid_posterior(cfg, as_arrays=True, keep_logpost=True)
+    assert isinstance(res["posterior"]["p_gamma"], np.ndarray)
+    assert res["posterior"]["p_gamma"].tolist() == ref["posterior"]["p_gamma"]
+    assert res["summary"] == ref["summary"]
+    lp = res["posterior"]["logpost"]
+    assert lp.shape == (61, 41)
+    assert np.exp(lp).sum() == pytest.approx(1.0)
+    np.testing.assert_allclose(np.exp(lp).sum(axis=1), res["posterior"]["p_gamma"], rtol=1e-12)
+
+
+def test_keep_logpost_requires_in_memory_array_output(cfg: HQCBInferenceConfig) -> None:
+    with pytest.raises(ValueError):
+        grid_posterior(cfg, keep_logpost=True)
+    with pytest.raises(ValueError):
+        grid_posterior(cfg, as_arrays=True, keep_logpost=True, memory_budget_mb=1.0)
+
+
+@pytest.mark.parametrize("fmt", ["json", "npy", "npz"])
+def test_write_load_roundtrip(cfg: HQCBInferenceConfig, tmp_path: Path, fmt: str) -> None:
+    res = grid_posterior(cfg, as_arrays=True, keep_logpost=fmt != "json")
+    written = write_result(res, tmp_path / "res.json", fmt)
+    back = load_result(written if fmt != "npy" else tmp_path / "res")
+    assert back["summary"] == res["summary"]
+    assert back["model_comparison"] == res["model_comparison"]
+    np.testing.assert_array_equal(back["posterior"]["p_H0_local"], res["posterior"]["p_H0_local"])
+    if fmt == "npy":
+        assert isinstance(back["posterior"]["logpost"], np.memmap)
+        sidecar = json.loads((tmp_path / "res" / "result.json").read_text(encoding="utf-8"))
+        assert sidecar["posterior"]["logpost"] == {"__array__": "posterior.logpost"}
+
+
+def test_npy_rewrite_drops_arrays_of_the_previous_result(
+    cfg: HQCBInferenceConfig, tmp_path: Path
+) -> None:
+    write_result(grid_posterior(cfg, as_arrays=True, keep_logpost=True), tmp_path / "res", "npy")
+    assert (tmp_path / "res" / "posterior.logpost.npy").exists()
+    write_result(grid_posterior(cfg, as_arrays=True), tmp_path / "res", "npy")
+    assert not (tmp_path / "res" / "posterior.logpost.npy").exists()
+    assert (tmp_path / "res" / "posterior.p_gamma.npy").exists()
+    assert "logpost" not in load_result(tmp_path / "res")["posterior"]
+
+
+def test_infer_data_npy_output_from_cli(tmp_path: Path) -> None:
+    cfg = ROOT / "data" / "cosmology" / "hqcb_infer_data_mock.yaml"
+    rc = main(["infer-data", "--config", str(cfg), "--out", str(tmp_path / "d.json"),
+               "--no-figures", "--no-cache", "--format", "npy", "--store-logpost"])
+    assert rc == 0
+    res = load_result(tmp_path / "d")
+    assert res["bao_mock"]["N"] == 4
+    p = res["joint"]["p_gamma_joint"]
+    assert p.shape == res["base_H0_results"]["grid"]["gamma"].shape
+    assert float(np.sum(p)) == pytest.approx(1.0)
+    assert res["base_H0_results"]["posterior"]["logpost"].ndim == 2
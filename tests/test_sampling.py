@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from hqcb_hhh.cli import main
+from hqcb_hhh.inference import HQCBInferenceConfig, grid_posterior
+from hqcb_hhh.inference.models import loglike_points
+from hqcb_hhh.inference.sampling import (
+    FreeParameter,
+    default_free_parameters,
+    integrated_autocorr_time,
+    make_log_posterior,
+    sample_posterior,
+)
+from hqcb_hhh.io import load_result
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def test_log_posterior_matches_grid_terms_and_prior_box(infer_cfg: HQCBInferenceConfig) -> None:
+    logp = make_log_posterior(infer_cfg, default_free_parameters(infer_cfg))
+    theta = np.array([[3.7, 73.0], [3.5, 70.0], [5.0, 73.0]])
+    lp = logp(theta)
+    ref = loglike_points(infer_cfg, theta[:2, 0], theta[:2, 1])
+    np.testing.assert_allclose(lp[:2], ref, rtol=0, atol=0)
+    assert lp[2] == -np.inf
+    with pytest.raises(ValueError):
+        make_log_posterior(infer_cfg, (FreeParameter("gamma", 3, 4), FreeParameter("sigma8", 0, 1)))
+    with pytest.raises(ValueError):
+        make_log_posterior(infer_cfg, (FreeParameter("gamma", 3, 4),))
+
+
+def test_autocorr_time_of_ar1_process() -> None:
+    rng = np.random.default_rng(1)
+    rho, n, w = 0.8, 20000, 8
+    x = np.empty((n, w))
+    x[0] = rng.normal(size=w)
+    for t in range(1, n):
+        x[t] = rho * x[t - 1] + rng.normal(size=w)
+    tau = integrated_autocorr_time(x)
+    assert tau == pytest.approx((1 + rho) / (1 - rho), rel=0.1)
+
+
+def test_2d_sampler_agrees_with_grid_and_keeps_result_structure(
+    infer_cfg: HQCBInferenceConfig,
+) -> None:
+    grid = grid_posterior(infer_cfg, method="grid")
+    res = sample_posterior(infer_cfg, n_walkers=32, n_steps=2500, seed=3)
+    assert set(res["summary"]) == set(grid["summary"])
+    assert set(res["model_comparison"]) == set(grid["model_comparison"])
+    g_sd = (grid["summary"]["gamma_68"][1] - grid["summary"]["gamma_68"][0]) / 2
+    assert abs(res["summary"]["gamma_mean"] - grid["summary"]["gamma_mean"]) < 0.1 * g_sd
+    assert abs(res["summary"]["H0_local_mean"] - grid["summary"]["H0_local_mean"]) < 0.1
+    d_aic = grid["model_comparison"]["delta_AIC"]
+    assert res["model_comparison"]["delta_AIC"] == pytest.approx(d_aic, abs=0.05)
+    diag = res["diagnostics"]
+    assert 0.2 < diag["acceptance_fraction"] < 0.9
+    assert diag["converged"]
+    assert all(e > 500 for e in diag["ess"].values())
+    assert len(res["samples"]["gamma"]) == 32 * (2500 - 625)
+
+
+def test_sample_cli_with_extra_free_parameters(tmp_path: Path) -> None:
+    rc = main(["sample", "--config", str(ROOT / "data" / "cosmology" / "hqcb_infer_data_mock.yaml"),
+               "--out", str(tmp_path / "s.json"), "--free", "kappa_b=0.5:2.0",
+               "--free", "bao_p_sensitivity=0.0:2.0", "--n-steps", "300", "--format", "npz"])
+    assert rc == 0
+    res = load_result(tmp_path / "s.json")
+    assert set(res["parameters"]) == {"gamma", "H0_local", "kappa_b", "bao_p_sensitivity"}
+    assert res["model_comparison"]["HQCB"]["k"] == 4
+    assert res["model_comparison"]["HQCB"]["n"] == 6
+    assert res["samples"]["kappa_b"].shape == (32 * 225,)
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+from dataclasses import replace
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from hqcb_hhh.cli import main
+from hqcb_hhh.inference import HQCBInferenceConfig, load_bao_mock_csv
+from hqcb_hhh.inference.profile import maximize_likelihood
+from hqcb_hhh.inference.toys import HQCBToyModel, fit_toys, hqcb_toys
+from hqcb_hhh.io import load_config, load_result
+from hqcb_hhh.likelihood import RateGaussianLikelihood
+from hqcb_hhh.toys import RateToyModel, fit_rate_toys, rate_toys
+
+ROOT = Path(__file__).resolve().parents[1]
+PROJECTION = ROOT / "data" / "projections" / "hl_lhc_baseline.yaml"
+INFER_DATA = ROOT / "data" / "cosmology" / "hqcb_infer_data_mock.yaml"
+
+
+def _bao():
+    return load_bao_mock_csv(str(ROOT / "data" / "likelihoods" / "bao_mock" / "bao.csv"),
+                             str(ROOT / "data" / "likelihoods" / "bao_mock" / "cov.txt"))
+
+
+def test_batched_rate_fit_matches_closed_form_mle() -> None:
+    toy = RateToyModel.from_config(load_config(PROJECTION))
+    sigma_obs = np.array([-5.0, 10.0, 30.0, 43.0, 80.0, 200.0])
+    fit = fit_rate_toys(toy, sigma_obs)
+    for s, k, nll in zip(sigma_obs, fit["kappa_hat"], fit["nll_min"]):
+        like = RateGaussianLikelihood(toy.model, float(s), toy.sigma_err)
+        k_ref, nll_ref = like.mle(toy.kappa_min, toy.kappa_max)
+        assert nll == pytest.approx(nll_ref, abs=1e-12)
+        assert float(like.nll(k)) == pytest.approx(nll_ref, abs=1e-12)
+        # sigma cuadrática: el mínimo puede estar en cualquiera de las dos ramas simétricas
+        assert min(abs(k - k_ref), abs(k + k_ref + toy.model.b / toy.model.a)) < 1e-6
+
+
+def test_rate_toys_are_reproducible_and_cover() -> None:
+    cfg = load_config(PROJECTION)
+    res = rate_toys(cfg, n_toys=200_000, seed=7, keep_toys=True)
+    par = rate_toys(cfg, n_toys=200_000, seed=7, workers=2, batch_size=50_000, keep_toys=True)
+    # Mismo reparto en lotes => mismos toys con y sin pool
+    again = rate_toys(cfg, n_toys=200_000, seed=7, batch_size=50_000, keep_toys=True)
+    np.testing.assert_array_equal(par["toys"]["sigma_obs"], again["toys"]["sigma_obs"])
+    assert res["toys"]["sigma_obs"].shape == (200_000,)
+    for key, c in res["coverage"].items():
+        assert abs(c["coverage"] - c["expected"]) < 5 * c["error"] + 2e-3, key
+    pull = res["pulls"]["kappa_lambda"]
+    assert abs(pull["mean"]) < 5 * pull["mean_error"]
+    assert pull["std"] == pytest.approx(1.0, abs=0.02)
+
+
+def test_batched_hqcb_fit_matches_profile_engine(infer_cfg: HQCBInferenceConfig) -> None:
+    model = HQCBToyModel(infer_cfg)
+    obs = model.draw(np.random.default_rng(3), 4, 3.7, 72.0)
+    fit = fit_toys(model, obs)
+    for i in range(4):
+        cfg = replace(infer_cfg, H0_local_obs=float(obs["H0_local"][i]),
+                      H0_early_obs=float(obs["H0_early"][i]))
+        mle = maximize_likelihood(cfg)
+        assert fit["gamma_hat"][i] == pytest.approx(mle["theta"]["gamma"], abs=1e-6)
+        assert fit["H0_local_hat"][i] == pytest.approx(mle["theta"]["H0_local"], abs=1e-5)
+
+
+def test_batched_hqcb_fit_with_bao_reaches_grid_minimum(infer_cfg: HQCBInferenceConfig) -> None:
+    model = HQCBToyModel(infer_cfg, _bao(), 0.2)
+    obs = model.draw(np.random.default_rng(4), 8, infer_cfg.gamma_ref, 73.0)
+    fit = fit_toys(model, obs)
+    g = np.linspace(3.5, 3.85, 3501)
+    for i in range(8):
+        one = {k: np.repeat(v[i:i + 1], g.size, axis=0) for k, v in obs.items()}
+        brute = model.profile(g, one)
+        assert fit["nll_min"][i] <= brute.min() + 1e-12
+
+
+def test_hqcb_toys_with_bao_cover(infer_cfg: HQCBInferenceConfig) -> None:
+    res = hqcb_toys(infer_cfg, n_toys=20_000, bao=_bao(), bao_p_sensitivity=0.2, seed=1)
+    for group in ("gamma", "H0_local", "joint"):
+        for key, c in res["coverage"][group].items():
+            assert abs(c["coverage"] - c["expected"]) < 5 * c["error"], (group, key)
+    for p in res["pulls"].values():
+        assert abs(p["mean"]) < 5 * p["mean_error"]
+        assert p["std"] == pytest.approx(1.0, abs=0.05)
+    with pytest.raises(ValueError):
+        hqcb_toys(infer_cfg, n_toys=10, gamma_true=9.0)
+
+
+@pytest.mark.parametrize("model,config", [("kappa-lambda", PROJECTION), ("hqcb", INFER_DATA)])
+def test_toys_cli(tmp_path: Path, model: str, config: Path) -> None:
+    rc = main(["toys", "--model", model, "--config", str(config), "--n-toys", "3000",
+               "--out", str(tmp_path / "t.json"), "--keep-toys", "--format", "npz"])
+    assert rc == 0
+    res = load_result(tmp_path / "t.json")
+    assert res["n_toys"] == 3000
+    assert all(v.shape == (3000,) for v in res["toys"].values())